@@ -0,0 +1,269 @@
+import argparse
+import sys
+
+from db.connection import PERFORMANCE_PROFILES, close_all_connections
+from db.init_db import initialize_database
+from services import export as export_service
+from services import importer as importer_service
+from services import seasonality
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    parser.add_argument("--db", dest="db_path", help="Chemin de la base SQLite.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_dir = commands.add_parser(
+        "import-dir",
+        help="Importer tous les fichiers JSON d'un dossier en une transaction.",
+    )
+    import_dir.add_argument("directory")
+    import_dir.add_argument("--workers", type=int, default=None)
+    import_dir.add_argument(
+        "--force",
+        action="store_true",
+        help="Réimporter les fichiers et enregistrements inchangés.",
+    )
+    import_dir.add_argument(
+        "--profile", choices=sorted(PERFORMANCE_PROFILES), default="bulk-import"
+    )
+    import_dir.set_defaults(handler=_import_dir)
+
+    import_file = commands.add_parser(
+        "import", help="Importer un fichier JSON d'ingrédients ou de recettes."
+    )
+    import_file.add_argument(
+        "kind", choices=[importer_service.INGREDIENTS, importer_service.RECIPES]
+    )
+    import_file.add_argument("file")
+    import_file.add_argument(
+        "--stream",
+        action="store_true",
+        help="Lire le fichier par morceaux, à mémoire constante.",
+    )
+    import_file.add_argument(
+        "--checkpoint-every",
+        type=_positive_int,
+        default=None,
+        help="Valider tous les N enregistrements et reprendre après un échec.",
+    )
+    import_file.add_argument("--force", action="store_true")
+    _add_fuzzy_arguments(import_file)
+    import_file.add_argument(
+        "--profile", choices=sorted(PERFORMANCE_PROFILES), default="bulk-import"
+    )
+    import_file.set_defaults(handler=_import_file)
+
+    validate = commands.add_parser(
+        "validate",
+        help="Vérifier un fichier JSON sans rien écrire et lister ses erreurs.",
+    )
+    validate.add_argument(
+        "kind", choices=[importer_service.INGREDIENTS, importer_service.RECIPES]
+    )
+    validate.add_argument("file")
+    validate.add_argument("--stream", action="store_true")
+    validate.add_argument(
+        "--max-errors",
+        type=_positive_int,
+        default=importer_service.DEFAULT_MAX_ERRORS,
+    )
+    _add_fuzzy_arguments(validate)
+    validate.set_defaults(handler=_validate)
+
+    export = commands.add_parser(
+        "export", help="Exporter le catalogue au format NDJSON, une ligne par entrée."
+    )
+    export.add_argument(
+        "kind", choices=[importer_service.INGREDIENTS, importer_service.RECIPES]
+    )
+    export.add_argument("output")
+    export.set_defaults(handler=_export)
+
+    check_seasons = commands.add_parser(
+        "check-seasons",
+        help="Comparer les saisons des recettes à leurs ingrédients.",
+    )
+    check_seasons.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Reconstruire entièrement la table si elle diverge.",
+    )
+    check_seasons.set_defaults(handler=_check_seasons)
+    return parser
+
+
+def _positive_int(value: str) -> int:
+    # Rejected by argparse with a usage message rather than a traceback
+    # from the service.
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            f"un entier positif est attendu, pas « {value} »"
+        )
+    return number
+
+
+def _add_fuzzy_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--fuzzy",
+        action="store_true",
+        help="Proposer les ingrédients les plus proches d'un nom inconnu (recettes).",
+    )
+    parser.add_argument(
+        "--auto-resolve",
+        action="store_true",
+        help="Avec --fuzzy, retenir la proposition quand elle est sans ambiguïté.",
+    )
+
+
+def _fuzzy_options(args: argparse.Namespace) -> dict[str, bool]:
+    if args.kind != importer_service.RECIPES:
+        return {}
+    return {"fuzzy": args.fuzzy, "auto_resolve": args.auto_resolve}
+
+
+def _check_seasons(args: argparse.Namespace) -> int:
+    check = seasonality.check_recipe_seasons(args.db_path)
+    print(
+        f"{len(check.missing)} saison(s) de recette manquante(s), "
+        f"{len(check.extra)} en trop."
+    )
+    if check.consistent:
+        return 0
+    if not args.rebuild:
+        return 1
+    rebuilt = seasonality.rebuild_recipe_seasons(args.db_path)
+    print(f"Saisons des recettes reconstruites: {rebuilt} association(s).")
+    return 0
+
+
+def _export(args: argparse.Namespace) -> int:
+    if args.kind == importer_service.INGREDIENTS:
+        export = export_service.export_ingredients_ndjson
+    else:
+        export = export_service.export_recipes_ndjson
+    try:
+        written = export(args.output, args.db_path)
+    except OSError as exc:
+        print(f"Impossible d'écrire le fichier: {exc}", file=sys.stderr)
+        return 1
+    print(f"{written} enregistrement(s) exporté(s) vers {args.output}.")
+    return 0
+
+
+def _validate(args: argparse.Namespace) -> int:
+    if args.kind == importer_service.INGREDIENTS:
+        validate = importer_service.validate_ingredient_json
+    else:
+        validate = importer_service.validate_recipe_json
+    try:
+        report = validate(
+            args.file,
+            args.db_path,
+            stream=args.stream,
+            max_errors=args.max_errors,
+            **_fuzzy_options(args),
+        )
+    except OSError as exc:
+        print(f"Impossible de lire le fichier: {exc}", file=sys.stderr)
+        return 1
+    for issue in report.issues:
+        location = f"#{issue.index}" if issue.index is not None else "fichier"
+        if issue.field:
+            location = f"{location} {issue.field}"
+        print(f"{location}: {issue.reason}")
+    summary = f"{report.records} enregistrement(s) vérifié(s), "
+    summary += f"{len(report.issues)} erreur(s)"
+    if report.truncated:
+        summary += " (limite atteinte, vérification arrêtée)"
+    print(f"{summary}.")
+    return 0 if report.valid else 1
+
+
+def _import_file(args: argparse.Namespace) -> int:
+    if args.kind == importer_service.INGREDIENTS:
+        import_file = importer_service.import_ingredients_from_json
+    else:
+        import_file = importer_service.import_recipes_from_json
+    try:
+        result = import_file(
+            args.file,
+            args.db_path,
+            profile=args.profile,
+            stream=args.stream,
+            force=args.force,
+            checkpoint_every=args.checkpoint_every,
+            **_fuzzy_options(args),
+        )
+    except (
+        importer_service.IngredientImportError,
+        importer_service.RecipeImportError,
+    ) as exc:
+        print(f"Import interrompu: {exc}", file=sys.stderr)
+        return 1
+    except OSError as exc:
+        print(f"Impossible de lire le fichier: {exc}", file=sys.stderr)
+        return 1
+    summary = (
+        f"{result.records} enregistrement(s) importé(s), "
+        f"{result.skipped_records} inchangé(s) ignoré(s)"
+    )
+    if result.resumed_records:
+        summary += f", reprise après {result.resumed_records} enregistrement(s)"
+    print(f"{summary}.")
+    return 0
+
+
+def _import_dir(args: argparse.Namespace) -> int:
+    try:
+        report = importer_service.import_directory(
+            args.directory,
+            args.db_path,
+            profile=args.profile,
+            workers=args.workers,
+            force=args.force,
+        )
+    except (
+        importer_service.IngredientImportError,
+        importer_service.RecipeImportError,
+    ) as exc:
+        print(f"Import annulé: {exc}", file=sys.stderr)
+        return 1
+    except OSError as exc:
+        print(f"Impossible de lire le fichier: {exc}", file=sys.stderr)
+        return 1
+
+    for result in report.files:
+        if result.unchanged:
+            print(f"{result.path.name:<32} {result.kind:<12} inchangé")
+            continue
+        print(
+            f"{result.path.name:<32} {result.kind:<12} {result.records:>6}"
+            f"  ignorés {result.skipped_records:>6}"
+            f"  lecture {result.parse_seconds:.3f}s"
+            f"  écriture {result.write_seconds:.3f}s"
+        )
+    print(
+        f"{report.count(importer_service.INGREDIENTS)} ingrédient(s) et "
+        f"{report.count(importer_service.RECIPES)} recette(s) importé(s) "
+        f"en {report.total_seconds:.3f}s; {report.skipped_files} fichier(s) "
+        f"et {report.skipped_records} enregistrement(s) inchangé(s) ignoré(s)."
+    )
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        initialize_database(args.db_path)
+        return args.handler(args)
+    finally:
+        close_all_connections()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
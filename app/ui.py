@@ -1,18 +1,21 @@
 import customtkinter as ctk
 import math
+import sqlite3
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from tkinter import font as tkfont
 
+from db.connection import close_all_connections, set_active_profile
 from db.init_db import initialize_database
 from services import ingredients as ingredient_service
 from services import importer as importer_service
 from services import recipes as recipes_service
-from services.consolidation import (
-    ShoppingItem,
-    consolidate_items,
-    group_by_aisle,
-)
+from services.changes import ChangeWatcher
+from services.consolidation import ShoppingItem, ShoppingListModel
+
+MANUAL_PREVIEW_IID = "manual-items"
+RECIPE_PAGE_SIZE = 50
+CHANGE_POLL_MS = 1000
 
 
 def format_quantity_and_unit(quantity: float, unit: str) -> tuple[str, str]:
@@ -157,6 +160,10 @@ class IngredientDialog(ctk.CTkToplevel):
 
 
 class IngredientsTab(ctk.CTkFrame):
+    WATCHED_TABLES = frozenset(
+        {"aisle", "unit", "season", "ingredient", "ingredient_season"}
+    )
+
     def __init__(self, master, body_font):
         super().__init__(master)
         self.tree = None
@@ -208,6 +215,11 @@ class IngredientsTab(ctk.CTkFrame):
                 ),
             )
 
+    def on_data_changed(self, _tables):
+        selected = self.tree.selection()
+        self.refresh()
+        self.tree.selection_set([iid for iid in selected if self.tree.exists(iid)])
+
     def _add(self):
         aisles = ingredient_service.list_aisles()
         units = ingredient_service.list_units()
@@ -217,7 +229,11 @@ class IngredientsTab(ctk.CTkFrame):
         )
         self.wait_window(dialog)
         if dialog.result:
-            ingredient_service.create_ingredient(**dialog.result)
+            try:
+                ingredient_service.create_ingredient(**dialog.result)
+            except ValueError as exc:
+                messagebox.showerror("Validation", str(exc))
+                return
             self.refresh()
 
     def _edit(self):
@@ -247,7 +263,11 @@ class IngredientsTab(ctk.CTkFrame):
         )
         self.wait_window(dialog)
         if dialog.result:
-            ingredient_service.update_ingredient(ingredient_id, **dialog.result)
+            try:
+                ingredient_service.update_ingredient(ingredient_id, **dialog.result)
+            except ValueError as exc:
+                messagebox.showerror("Validation", str(exc))
+                return
             self.refresh()
 
     def _delete(self):
@@ -271,7 +291,9 @@ class IngredientsTab(ctk.CTkFrame):
         if not file_path:
             return
         try:
-            imported = importer_service.import_ingredients_from_json(file_path)
+            result = importer_service.import_ingredients_from_json(
+                file_path, profile="bulk-import"
+            )
         except importer_service.IngredientImportError as exc:
             messagebox.showerror("Import", str(exc))
             return
@@ -281,7 +303,9 @@ class IngredientsTab(ctk.CTkFrame):
             )
             return
         messagebox.showinfo(
-            "Import", f"{imported} ingrédient(s) importé(s)."
+            "Import",
+            f"{result.records} ingrédient(s) importé(s), "
+            f"{result.skipped_records} inchangé(s) ignoré(s).",
         )
         self.refresh()
 
@@ -483,6 +507,10 @@ class RecipeIngredientDialog(ctk.CTkToplevel):
 
 
 class RecipesTab(ctk.CTkFrame):
+    WATCHED_TABLES = frozenset(
+        {"unit", "ingredient", "ingredient_alias", "recipe", "recipe_ingredient"}
+    )
+
     def __init__(self, master, body_font):
         super().__init__(master)
         self.tree = None
@@ -619,6 +647,25 @@ class RecipesTab(ctk.CTkFrame):
         self._refresh_ingredient_options()
         self._refresh_recipe_ingredients()
 
+    def on_data_changed(self, tables):
+        chosen = self.ingredient_var.get()
+        if "recipe" in tables:
+            self.refresh()
+            if self.selected_recipe_id is not None:
+                if self.tree.exists(str(self.selected_recipe_id)):
+                    self.tree.selection_set(str(self.selected_recipe_id))
+                else:
+                    self.selected_recipe_id = None
+                    self._refresh_recipe_ingredients()
+        else:
+            if tables & {"ingredient", "ingredient_alias"}:
+                self._refresh_ingredient_options()
+            if tables & {"unit", "ingredient", "recipe_ingredient"}:
+                self._refresh_recipe_ingredients()
+        # Keep the ingredient being picked if it still exists.
+        if chosen in self.ingredient_combo.cget("values"):
+            self.ingredient_var.set(chosen)
+
     def _add(self):
         dialog = RecipeDialog(self, "Ajouter une recette", self.body_font)
         self.wait_window(dialog)
@@ -662,7 +709,9 @@ class RecipesTab(ctk.CTkFrame):
         if not file_path:
             return
         try:
-            imported = importer_service.import_recipes_from_json(file_path)
+            result = importer_service.import_recipes_from_json(
+                file_path, profile="bulk-import"
+            )
         except importer_service.RecipeImportError as exc:
             messagebox.showerror("Import", str(exc))
             return
@@ -672,7 +721,9 @@ class RecipesTab(ctk.CTkFrame):
             )
             return
         messagebox.showinfo(
-            "Import", f"{imported} recette(s) importée(s)."
+            "Import",
+            f"{result.records} recette(s) importée(s), "
+            f"{result.skipped_records} inchangée(s) ignorée(s).",
         )
         self.refresh()
 
@@ -694,13 +745,11 @@ class RecipesTab(ctk.CTkFrame):
             self.ingredient_var.set("")
 
     def _filter_ingredients(self, query: str) -> list[str]:
-        cleaned = query.strip().lower()
-        if not cleaned:
+        if not query.strip():
             return [ingredient["name"] for ingredient in self.ingredients]
         return [
             ingredient["name"]
-            for ingredient in self.ingredients
-            if cleaned in ingredient["name"].lower()
+            for ingredient in ingredient_service.search_ingredients(query)
         ]
 
     def _on_search_changed(self, _event):
@@ -816,10 +865,27 @@ class RecipesTab(ctk.CTkFrame):
 
 
 class ShoppingListTab(ctk.CTkFrame):
+    WATCHED_TABLES = frozenset(
+        {
+            "aisle",
+            "unit",
+            "season",
+            "ingredient",
+            "ingredient_season",
+            "ingredient_alias",
+            "recipe",
+            "recipe_ingredient",
+            "recipe_season",
+        }
+    )
+
     def __init__(self, master, body_font, tk_body_font):
         super().__init__(master)
         self.recipes = []
         self.recipe_lookup = {}
+        self.recipe_filters = {}
+        self.recipe_query = ""
+        self.recipes_exhausted = True
         self.selected_recipe_ids = []
         self.selected_recipe_servings = {}
         self.manual_items = {}
@@ -858,6 +924,9 @@ class ShoppingListTab(ctk.CTkFrame):
         self.manual_items_tree = None
         self.preview_tree = None
         self.grouped_tree = None
+        self.grouped_aisle_rows = {}
+        self.shopping_model = ShoppingListModel()
+        self.recipe_ingredient_rows = {}
         self.selected_ingredient = None
         self.body_font = body_font
         self.tk_body_font = tk_body_font
@@ -950,6 +1019,7 @@ class ShoppingListTab(ctk.CTkFrame):
             height=6,
             exportselection=False,
             font=self.tk_body_font,
+            yscrollcommand=self._on_recipe_list_scrolled,
         )
         self.available_recipes_list.grid(
             row=2, column=0, rowspan=2, sticky="nsew", pady=(4, 0)
@@ -1188,8 +1258,8 @@ class ShoppingListTab(ctk.CTkFrame):
         self.aisles = ingredient_service.list_aisles()
         self.units = ingredient_service.list_units()
         self.seasons = ingredient_service.list_seasons()
-        self.recipes = recipes_service.list_recipes()
-        self.recipe_lookup = {recipe["id"]: recipe for recipe in self.recipes}
+        self.recipes = []
+        self.recipe_lookup = {}
         self.selected_recipe_servings = {}
         self.recipe_servings_var.set("")
         self._refresh_recipe_filter_options()
@@ -1197,6 +1267,34 @@ class ShoppingListTab(ctk.CTkFrame):
         self._refresh_manual_options()
         self._refresh_previews()
 
+    def on_data_changed(self, tables):
+        # Unlike _load_data, keeps the selected recipes, servings and
+        # manual items; only the views fed by the changed tables reload.
+        if tables & {"aisle", "unit", "season"}:
+            self.aisles = ingredient_service.list_aisles()
+            self.units = ingredient_service.list_units()
+            self.seasons = ingredient_service.list_seasons()
+            self._refresh_recipe_filter_options()
+            self._refresh_manual_options(show_dropdown=False)
+        elif tables & {"ingredient", "ingredient_season", "ingredient_alias"}:
+            self._refresh_ingredient_options(show_dropdown=False)
+        if tables & {"recipe", "recipe_season"}:
+            for recipe_id in self.selected_recipe_ids:
+                recipe = recipes_service.get_recipe(recipe_id)
+                if recipe is None:
+                    self.recipe_lookup.pop(recipe_id, None)
+                else:
+                    self.recipe_lookup[recipe_id] = recipe
+            self._refresh_recipe_list()
+        if self.selected_recipe_ids and tables & {
+            "aisle",
+            "unit",
+            "ingredient",
+            "recipe",
+            "recipe_ingredient",
+        }:
+            self._refresh_previews()
+
     def _refresh_recipe_filter_options(self):
         season_names = [season["name"] for season in self.seasons]
         self.recipe_time_combo.configure(values=["Tous"] + recipes_service.TIME_OPTIONS)
@@ -1216,46 +1314,69 @@ class ShoppingListTab(ctk.CTkFrame):
         )
 
     def _refresh_recipe_list(self):
-        season_id = self._get_selected_recipe_season_id()
-        base_recipes = recipes_service.list_recipes(season_id=season_id)
-        search_text = self.recipe_search_var.get().strip().lower()
         time_filter = self.recipe_time_var.get()
-        selected_difficulties = [
-            difficulty
-            for difficulty, var in self.recipe_difficulty_vars.items()
-            if var.get()
-        ]
         filter_minutes = None
         if time_filter and time_filter != "Tous":
             _, filter_minutes = recipes_service.normalize_time_label(time_filter)
-        filtered_recipes = []
-        for recipe in base_recipes:
-            if search_text and search_text not in recipe["name"].lower():
-                continue
-            if filter_minutes is not None:
-                if not recipe["time_label"]:
-                    continue
-                _, recipe_minutes = recipes_service.normalize_time_label(
-                    recipe["time_label"]
-                )
-                if recipe_minutes > filter_minutes:
-                    continue
-            if selected_difficulties and recipe["difficulty"] not in selected_difficulties:
-                continue
-            filtered_recipes.append(recipe)
-            self.recipe_lookup[recipe["id"]] = recipe
-        self.recipes = filtered_recipes
+        self.recipe_filters = {
+            "season_id": self._get_selected_recipe_season_id(),
+            "max_minutes": filter_minutes,
+            "difficulties": [
+                difficulty
+                for difficulty, var in self.recipe_difficulty_vars.items()
+                if var.get()
+            ],
+        }
+        self.recipe_query = self.recipe_search_var.get().strip()
+        self.recipes = []
+        self.recipes_exhausted = False
         self.available_recipes_list.delete(0, tk.END)
-        for recipe in self.recipes:
-            self.available_recipes_list.insert(tk.END, recipe["name"])
+        self._load_more_recipes()
         self._refresh_selected_recipes_list()
 
+    def _load_more_recipes(self):
+        # Filters run in the database and the list is filled one page at a
+        # time: the first on each change, the next ones as it scrolls.
+        if self.recipes_exhausted:
+            return
+        if self.recipe_query:
+            # Ranked matches on the name and instructions page by offset.
+            page = recipes_service.search_recipes(
+                self.recipe_query,
+                limit=RECIPE_PAGE_SIZE,
+                offset=len(self.recipes),
+                **self.recipe_filters,
+            )
+        else:
+            after = None
+            if self.recipes:
+                after = (self.recipes[-1]["name"], self.recipes[-1]["id"])
+            page = recipes_service.list_recipes(
+                limit=RECIPE_PAGE_SIZE, after=after, **self.recipe_filters
+            )
+        self.recipes_exhausted = len(page) < RECIPE_PAGE_SIZE
+        for recipe in page:
+            self.recipes.append(recipe)
+            self.recipe_lookup[recipe["id"]] = recipe
+            self.available_recipes_list.insert(tk.END, recipe["name"])
+
+    def _on_recipe_list_scrolled(self, first, last):
+        if float(last) >= 0.9:
+            self._load_more_recipes()
+
     def _refresh_selected_recipes_list(self):
-        self.selected_recipe_ids = [
+        dropped = [
             recipe_id
             for recipe_id in self.selected_recipe_ids
-            if recipe_id in self.recipe_lookup
+            if recipe_id not in self.recipe_lookup
         ]
+        if dropped:
+            self.selected_recipe_ids = [
+                recipe_id
+                for recipe_id in self.selected_recipe_ids
+                if recipe_id in self.recipe_lookup
+            ]
+            self._remove_recipes_from_list(dropped)
         for recipe_id in self.selected_recipe_ids:
             recipe = self.recipe_lookup.get(recipe_id)
             if not recipe:
@@ -1281,7 +1402,7 @@ class ShoppingListTab(ctk.CTkFrame):
             return None
         return self.selected_recipe_ids[index]
 
-    def _refresh_manual_options(self):
+    def _refresh_manual_options(self, show_dropdown=True):
         unit_names = [unit["name"] for unit in self.units]
         aisle_names = [aisle["name"] for aisle in self.aisles]
         season_names = [season["name"] for season in self.seasons]
@@ -1300,9 +1421,9 @@ class ShoppingListTab(ctk.CTkFrame):
             self.manual_unit_var.set(unit_names[0])
         if aisle_names and not self.manual_aisle_var.get():
             self.manual_aisle_var.set(aisle_names[0])
-        self._refresh_ingredient_options()
+        self._refresh_ingredient_options(show_dropdown)
 
-    def _refresh_ingredient_options(self):
+    def _refresh_ingredient_options(self, show_dropdown=True):
         selected_season = self.manual_season_var.get()
         season_id = next(
             (season["id"] for season in self.seasons if season["name"] == selected_season),
@@ -1312,14 +1433,17 @@ class ShoppingListTab(ctk.CTkFrame):
         search_text = self.manual_search_var.get().strip().lower()
         aisle_filter = self.manual_filter_aisle_var.get()
         unit_filter = self.manual_filter_unit_var.get()
+        candidates = self.ingredients
+        if search_text:
+            candidates = ingredient_service.search_ingredients(
+                search_text, season_id=season_id
+            )
         filtered = []
-        for ingredient in self.ingredients:
+        for ingredient in candidates:
             if aisle_filter and aisle_filter != "Tous" and ingredient["aisle_name"] != aisle_filter:
                 continue
             if unit_filter and unit_filter != "Toutes" and ingredient["unit_name"] != unit_filter:
                 continue
-            if search_text and search_text not in ingredient["name"].lower():
-                continue
             filtered.append(ingredient)
         self.ingredient_lookup = {
             ingredient["name"]: ingredient for ingredient in self.ingredients
@@ -1330,7 +1454,7 @@ class ShoppingListTab(ctk.CTkFrame):
             self.manual_ingredient_var.set(filtered_names[0])
         self._update_manual_search_suggestions(search_text, filtered_names)
         self._sync_selected_ingredient()
-        if search_text and filtered_names:
+        if show_dropdown and search_text and filtered_names:
             self.after(0, self._show_manual_ingredient_dropdown)
 
     def _on_manual_filter_changed(self, *_):
@@ -1377,7 +1501,7 @@ class ShoppingListTab(ctk.CTkFrame):
             return
         self.selected_recipe_servings[recipe_id] = servings
         self._refresh_selected_recipes_list()
-        self._refresh_previews()
+        self._rescale_recipe_in_list(recipe_id)
 
     def _sync_selected_ingredient(self):
         name = self.manual_ingredient_var.get().strip()
@@ -1443,17 +1567,19 @@ class ShoppingListTab(ctk.CTkFrame):
                 "Sélection", "Choisissez une recette à ajouter."
             )
             return
+        added = []
         for index in selection:
             recipe_id = self.recipes[index]["id"]
             if recipe_id not in self.selected_recipe_ids:
                 self.selected_recipe_ids.append(recipe_id)
+                added.append(recipe_id)
                 recipe = self.recipe_lookup.get(recipe_id)
                 if recipe:
                     self.selected_recipe_servings.setdefault(
                         recipe_id, recipe.get("servings") or 1
                     )
         self._refresh_selected_recipes_list()
-        self._refresh_previews()
+        self._add_recipes_to_list(added)
 
     def _remove_recipe(self):
         selection = self.selected_recipes_list.curselection()
@@ -1462,11 +1588,13 @@ class ShoppingListTab(ctk.CTkFrame):
                 "Sélection", "Choisissez une recette à retirer."
             )
             return
+        removed = []
         for index in reversed(selection):
             recipe_id = self.selected_recipe_ids.pop(index)
             self.selected_recipe_servings.pop(recipe_id, None)
+            removed.append(recipe_id)
         self._refresh_selected_recipes_list()
-        self._refresh_previews()
+        self._remove_recipes_from_list(removed)
 
     def _add_manual_item(self):
         name = self.manual_ingredient_var.get().strip()
@@ -1527,7 +1655,11 @@ class ShoppingListTab(ctk.CTkFrame):
         self.manual_ingredient_var.set("")
         self.manual_quantity_var.set("")
         self._clear_selected_ingredient()
-        self._refresh_previews()
+        self._insert_manual_preview(item_id)
+        changed = self.shopping_model.add_manual_item(
+            item_id, self._manual_shopping_item(self.manual_items[item_id])
+        )
+        self._apply_grouped_changes(changed)
 
     def _remove_manual_item(self):
         selection = self.manual_items_tree.selection()
@@ -1536,80 +1668,157 @@ class ShoppingListTab(ctk.CTkFrame):
                 "Sélection", "Choisissez un article à supprimer."
             )
             return
+        changed = set()
         for item_id in selection:
             self.manual_items_tree.delete(item_id)
             self.manual_items.pop(item_id, None)
-        self._refresh_previews()
+            changed |= self.shopping_model.remove_manual_item(item_id)
+            preview_iid = f"preview-{item_id}"
+            if self.preview_tree.exists(preview_iid):
+                self.preview_tree.delete(preview_iid)
+        if not self.manual_items and self.preview_tree.exists(MANUAL_PREVIEW_IID):
+            self.preview_tree.delete(MANUAL_PREVIEW_IID)
+        self._apply_grouped_changes(changed)
 
     def _refresh_previews(self):
+        # Full rebuild; individual edits go through the incremental
+        # helpers below and only touch the rows they affect.
         for item in self.preview_tree.get_children():
             self.preview_tree.delete(item)
-        for recipe_id in self.selected_recipe_ids:
-            recipe = self.recipe_lookup.get(recipe_id)
-            if not recipe:
+        self.shopping_model.clear()
+        self.recipe_ingredient_rows = {}
+        self._add_recipes_to_list(self.selected_recipe_ids)
+        for item_id, item in self.manual_items.items():
+            self._insert_manual_preview(item_id)
+            self.shopping_model.add_manual_item(
+                item_id, self._manual_shopping_item(item)
+            )
+        self._refresh_grouped_list()
+
+    def _add_recipes_to_list(self, recipe_ids):
+        missing = [
+            recipe_id
+            for recipe_id in recipe_ids
+            if recipe_id not in self.recipe_ingredient_rows
+        ]
+        if missing:
+            self.recipe_ingredient_rows.update(
+                recipes_service.list_ingredients_for_recipes(missing)
+            )
+        changed = set()
+        for recipe_id in recipe_ids:
+            if recipe_id not in self.recipe_lookup:
                 continue
-            base_servings = recipe.get("servings") or 1
-            selected_servings = self.selected_recipe_servings.get(
-                recipe_id, base_servings
+            self._render_recipe_preview(recipe_id)
+            changed |= self.shopping_model.add_recipe(
+                recipe_id,
+                self._recipe_shopping_items(recipe_id),
+                self._recipe_multiplier(recipe_id),
             )
-            multiplier = selected_servings / base_servings
-            parent = self.preview_tree.insert(
-                "",
-                tk.END,
-                text=f"{recipe['name']} ({selected_servings} pers.)",
-                values=("", ""),
+        self._apply_grouped_changes(changed)
+
+    def _remove_recipes_from_list(self, recipe_ids):
+        changed = set()
+        for recipe_id in recipe_ids:
+            changed |= self.shopping_model.remove_recipe(recipe_id)
+            self.recipe_ingredient_rows.pop(recipe_id, None)
+            preview_iid = f"recipe-{recipe_id}"
+            if self.preview_tree.exists(preview_iid):
+                self.preview_tree.delete(preview_iid)
+        self._apply_grouped_changes(changed)
+
+    def _rescale_recipe_in_list(self, recipe_id):
+        if recipe_id not in self.shopping_model.recipe_ids():
+            return
+        self._render_recipe_preview(recipe_id)
+        changed = self.shopping_model.rescale_recipe(
+            recipe_id, self._recipe_multiplier(recipe_id)
+        )
+        self._apply_grouped_changes(changed)
+
+    def _render_recipe_preview(self, recipe_id):
+        recipe = self.recipe_lookup[recipe_id]
+        selected_servings = self.selected_recipe_servings.get(
+            recipe_id, recipe.get("servings") or 1
+        )
+        multiplier = self._recipe_multiplier(recipe_id)
+        parent = f"recipe-{recipe_id}"
+        text = f"{recipe['name']} ({selected_servings} pers.)"
+        if self.preview_tree.exists(parent):
+            self.preview_tree.item(parent, text=text)
+            self.preview_tree.delete(*self.preview_tree.get_children(parent))
+        else:
+            index = len(self.preview_tree.get_children())
+            if self.preview_tree.exists(MANUAL_PREVIEW_IID):
+                index -= 1
+            self.preview_tree.insert(
+                "", index, iid=parent, text=text, values=("", "")
             )
-            for ingredient in recipes_service.list_recipe_ingredients_with_metadata(
-                recipe_id
-            ):
-                scaled_quantity = float(ingredient["quantity"]) * multiplier
-                self.preview_tree.insert(
-                    parent,
-                    tk.END,
-                    text=ingredient["ingredient_name"],
-                    values=(
-                        *format_quantity_and_unit(
-                            scaled_quantity, ingredient["unit_name"]
-                        ),
+        for ingredient in self.recipe_ingredient_rows.get(recipe_id, []):
+            scaled_quantity = float(ingredient["quantity"]) * multiplier
+            self.preview_tree.insert(
+                parent,
+                tk.END,
+                text=ingredient["ingredient_name"],
+                values=(
+                    *format_quantity_and_unit(
+                        scaled_quantity, ingredient["unit_name"]
                     ),
-                )
-            self.preview_tree.item(parent, open=True)
-        if self.manual_items:
-            manual_parent = self.preview_tree.insert(
+                ),
+            )
+        self.preview_tree.item(parent, open=True)
+
+    def _insert_manual_preview(self, item_id):
+        item = self.manual_items[item_id]
+        if not self.preview_tree.exists(MANUAL_PREVIEW_IID):
+            self.preview_tree.insert(
                 "",
                 tk.END,
+                iid=MANUAL_PREVIEW_IID,
                 text="Articles manuels",
                 values=("", ""),
+                open=True,
             )
-            for item in self.manual_items.values():
-                self.preview_tree.insert(
-                    manual_parent,
-                    tk.END,
-                    text=item["name"],
-                    values=(
-                        *format_quantity_and_unit(
-                            item["quantity"], item["unit"]
-                        ),
-                    ),
-                )
-            self.preview_tree.item(manual_parent, open=True)
-        self._refresh_grouped_list()
+        self.preview_tree.insert(
+            MANUAL_PREVIEW_IID,
+            tk.END,
+            iid=f"preview-{item_id}",
+            text=item["name"],
+            values=(
+                *format_quantity_and_unit(item["quantity"], item["unit"]),
+            ),
+        )
 
     def _refresh_grouped_list(self):
         for item in self.grouped_tree.get_children():
             self.grouped_tree.delete(item)
-        items = self._build_shopping_items()
-        if not items:
+        self.grouped_aisle_rows = {}
+        self._apply_grouped_changes(self.shopping_model.aisle_names())
+
+    def _apply_grouped_changes(self, changed_aisles):
+        if not changed_aisles:
             return
-        consolidated = consolidate_items(items)
-        grouped = group_by_aisle(consolidated)
-        for aisle_name, aisle_items in grouped:
-            parent = self.grouped_tree.insert(
-                "",
-                tk.END,
-                text=aisle_name,
-                values=("", ""),
-            )
+        inserted = False
+        for aisle_name in changed_aisles:
+            aisle_items = self.shopping_model.aisle_items(aisle_name)
+            parent = self.grouped_aisle_rows.get(aisle_name)
+            if not aisle_items:
+                if parent is not None:
+                    self.grouped_tree.delete(parent)
+                    del self.grouped_aisle_rows[aisle_name]
+                continue
+            if parent is None:
+                parent = self.grouped_tree.insert(
+                    "",
+                    tk.END,
+                    text=aisle_name,
+                    values=("", ""),
+                    open=True,
+                )
+                self.grouped_aisle_rows[aisle_name] = parent
+                inserted = True
+            else:
+                self.grouped_tree.delete(*self.grouped_tree.get_children(parent))
             for item in aisle_items:
                 label = item.ingredient_name
                 if item.note:
@@ -1622,42 +1831,38 @@ class ShoppingListTab(ctk.CTkFrame):
                         *format_quantity_and_unit(item.quantity, item.unit),
                     ),
                 )
-            self.grouped_tree.item(parent, open=True)
+        if inserted:
+            for index, aisle_name in enumerate(self.shopping_model.aisle_names()):
+                self.grouped_tree.move(self.grouped_aisle_rows[aisle_name], "", index)
 
-    def _build_shopping_items(self):
-        items = []
-        for recipe_id in self.selected_recipe_ids:
-            recipe = self.recipe_lookup.get(recipe_id)
-            if not recipe:
-                continue
-            base_servings = recipe.get("servings") or 1
-            selected_servings = self.selected_recipe_servings.get(
-                recipe_id, base_servings
-            )
-            multiplier = selected_servings / base_servings
-            for ingredient in recipes_service.list_recipe_ingredients_with_metadata(
-                recipe_id
-            ):
-                items.append(
-                    ShoppingItem(
-                        ingredient_name=ingredient["ingredient_name"],
-                        aisle_name=ingredient["aisle_name"],
-                        aisle_order=ingredient["aisle_order"],
-                        unit=ingredient["unit_name"],
-                        quantity=float(ingredient["quantity"]) * multiplier,
-                    )
-                )
-        for item in self.manual_items.values():
-            items.append(
-                ShoppingItem(
-                    ingredient_name=item["name"],
-                    aisle_name=item["aisle_name"],
-                    aisle_order=item["aisle_order"],
-                    unit=item["unit"],
-                    quantity=float(item["quantity"]),
-                )
+    def _recipe_multiplier(self, recipe_id):
+        recipe = self.recipe_lookup[recipe_id]
+        base_servings = recipe.get("servings") or 1
+        selected_servings = self.selected_recipe_servings.get(
+            recipe_id, base_servings
+        )
+        return selected_servings / base_servings
+
+    def _recipe_shopping_items(self, recipe_id):
+        return [
+            ShoppingItem(
+                ingredient_name=ingredient["ingredient_name"],
+                aisle_name=ingredient["aisle_name"],
+                aisle_order=ingredient["aisle_order"],
+                unit=ingredient["unit_name"],
+                quantity=float(ingredient["quantity"]),
             )
-        return items
+            for ingredient in self.recipe_ingredient_rows.get(recipe_id, [])
+        ]
+
+    def _manual_shopping_item(self, item):
+        return ShoppingItem(
+            ingredient_name=item["name"],
+            aisle_name=item["aisle_name"],
+            aisle_order=item["aisle_order"],
+            unit=item["unit"],
+            quantity=float(item["quantity"]),
+        )
 
 class RecipesApp(ctk.CTk):
     def __init__(self):
@@ -1673,9 +1878,28 @@ class RecipesApp(ctk.CTk):
             "Treeview.Heading",
             font=self.tk_heading_font,
         )
+        set_active_profile("balanced")
         initialize_database()
+        self.tabs = []
         self._build()
         self._maximize_window()
+        self.change_watcher = ChangeWatcher()
+        self.after(CHANGE_POLL_MS, self._poll_changes)
+
+    def _poll_changes(self):
+        # Picks up writes from other instances and import scripts sharing
+        # the database; each tab reloads only when a table it shows changed.
+        try:
+            changed = self.change_watcher.poll()
+            for tab in self.tabs:
+                if changed & tab.WATCHED_TABLES:
+                    tab.on_data_changed(changed)
+        except sqlite3.OperationalError:
+            # The database is busy, e.g. locked by a long import: the next
+            # poll sees the same changes.
+            pass
+        finally:
+            self.after(CHANGE_POLL_MS, self._poll_changes)
 
     def _maximize_window(self):
         self.update_idletasks()
@@ -1706,18 +1930,23 @@ class RecipesApp(ctk.CTk):
         recipes_tab = tabview.add("Recettes")
         shopping_tab = tabview.add("Liste de courses")
 
-        IngredientsTab(ingredients_tab, self.body_font).pack(fill=tk.BOTH, expand=True)
-        RecipesTab(recipes_tab, self.body_font).pack(fill=tk.BOTH, expand=True)
-        ShoppingListTab(
-            shopping_tab, self.body_font, self.tk_body_font
-        ).pack(fill=tk.BOTH, expand=True)
+        self.tabs = [
+            IngredientsTab(ingredients_tab, self.body_font),
+            RecipesTab(recipes_tab, self.body_font),
+            ShoppingListTab(shopping_tab, self.body_font, self.tk_body_font),
+        ]
+        for tab in self.tabs:
+            tab.pack(fill=tk.BOTH, expand=True)
 
 
 def main():
     ctk.set_appearance_mode("system")
     ctk.set_default_color_theme("blue")
     app = RecipesApp()
-    app.mainloop()
+    try:
+        app.mainloop()
+    finally:
+        close_all_connections()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+import argparse
+import random
+import time
+
+from services.consolidation import ConsolidatedItem, ShoppingItem, consolidate_items
+
+AISLES = [
+    (1, "Fruits et légumes"),
+    (2, "Viandes et fruits de mer"),
+    (3, "Produits laitiers et œufs"),
+    (4, "Boulangerie"),
+    (5, "Épicerie"),
+]
+UNITS = ["pièce", "gramme", "millilitre", "cuillère à soupe"]
+NOTES = [None, None, None, "haché", "émincé"]
+
+
+def reference_consolidate_items(items):
+    # The original implementation: one new ConsolidatedItem per merge.
+    grouped = {}
+    for item in items:
+        key = (item.ingredient_name, item.unit, item.aisle_name)
+        if key in grouped:
+            existing = grouped[key]
+            if existing.note == item.note:
+                merged_note = existing.note
+            elif existing.note is None:
+                merged_note = item.note
+            elif item.note is None:
+                merged_note = existing.note
+            else:
+                merged_note = None
+            grouped[key] = ConsolidatedItem(
+                ingredient_name=existing.ingredient_name,
+                aisle_name=existing.aisle_name,
+                aisle_order=existing.aisle_order,
+                unit=existing.unit,
+                quantity=existing.quantity + item.quantity,
+                note=merged_note,
+            )
+        else:
+            grouped[key] = ConsolidatedItem(
+                ingredient_name=item.ingredient_name,
+                aisle_name=item.aisle_name,
+                aisle_order=item.aisle_order,
+                unit=item.unit,
+                quantity=item.quantity,
+                note=item.note,
+            )
+    return sorted(
+        grouped.values(),
+        key=lambda item: (
+            item.aisle_order,
+            item.aisle_name.lower(),
+            item.ingredient_name.lower(),
+        ),
+    )
+
+
+def synthetic_items(count: int, distinct: int, seed: int) -> list[ShoppingItem]:
+    rng = random.Random(seed)
+    names = [f"Ingrédient {index}" for index in range(distinct)]
+    items = []
+    for _ in range(count):
+        aisle_order, aisle_name = rng.choice(AISLES)
+        items.append(
+            ShoppingItem(
+                ingredient_name=rng.choice(names),
+                aisle_name=aisle_name,
+                aisle_order=aisle_order,
+                unit=rng.choice(UNITS),
+                quantity=rng.randint(1, 500) / 4,
+                note=rng.choice(NOTES),
+            )
+        )
+    return items
+
+
+def _time(function, items) -> tuple[float, list[ConsolidatedItem]]:
+    started = time.perf_counter()
+    result = function(items)
+    return time.perf_counter() - started, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare consolidate_items with the original implementation."
+    )
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--distinct", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    items = synthetic_items(args.items, args.distinct, args.seed)
+    reference_seconds, expected = _time(reference_consolidate_items, items)
+    current_seconds, actual = _time(consolidate_items, items)
+    if actual != expected:
+        raise SystemExit("consolidate_items diverged from the reference result.")
+
+    print(f"items:      {args.items:,} ({len(actual):,} consolidated rows)")
+    print(f"reference:  {reference_seconds:.3f}s")
+    print(f"current:    {current_seconds:.3f}s")
+    print(f"speedup:    {reference_seconds / current_seconds:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from db.connection import close_all_connections, connection_scope
+from db.init_db import initialize_database
+from db.normalize import name_key
+from services import seasonality
+from services.importer import (
+    IMPORT_BATCH_SIZE,
+    _Lookup,
+    _write_ingredients,
+    parse_ingredient_json,
+)
+
+AISLES = ["Fruits et légumes", "Boulangerie", "Épicerie"]
+SEASONS = ["printemps", "été", "automne", "hiver"]
+
+
+def reference_write(connection, rows) -> None:
+    # The original implementation: SELECT, then UPDATE or INSERT, then a
+    # DELETE and an executemany of season links for every record. It keeps
+    # the derived data current the same way the bulk path does: name key,
+    # season mask and the seasons of the recipes using the ingredient.
+    for name, aisle_id, unit_id, season_ids, _ in rows:
+        key = name_key(name)
+        existing = connection.execute(
+            "SELECT id FROM ingredient WHERE name_key = ?;", (key,)
+        ).fetchone()
+        if existing:
+            ingredient_id = existing["id"]
+            connection.execute(
+                "UPDATE ingredient SET default_aisle_id = ?, unit_id = ? WHERE id = ?;",
+                (aisle_id, unit_id, ingredient_id),
+            )
+        else:
+            ingredient_id = connection.execute(
+                """
+                INSERT INTO ingredient (name, name_key, default_aisle_id, unit_id)
+                VALUES (?, ?, ?, ?);
+                """,
+                (name, key, aisle_id, unit_id),
+            ).lastrowid
+        connection.execute(
+            "DELETE FROM ingredient_season WHERE ingredient_id = ?;",
+            (ingredient_id,),
+        )
+        connection.executemany(
+            "INSERT INTO ingredient_season (ingredient_id, season_id) VALUES (?, ?);",
+            [(ingredient_id, season_id) for season_id in season_ids],
+        )
+        connection.execute(
+            "UPDATE ingredient SET season_mask = ? WHERE id = ?;",
+            (seasonality.season_mask(season_ids), ingredient_id),
+        )
+        seasonality.refresh_ingredients(connection, [ingredient_id])
+
+
+def current_write(connection, rows) -> None:
+    for start in range(0, len(rows), IMPORT_BATCH_SIZE):
+        _write_ingredients(connection, rows[start:start + IMPORT_BATCH_SIZE])
+
+
+def resolve_rows(file_path: Path, connection) -> list:
+    ingredients = parse_ingredient_json(file_path.read_text(encoding="utf-8"))
+    aisle_lookup = _Lookup(connection, "aisle", "rayon")
+    unit_lookup = _Lookup(connection, "unit", "unité")
+    season_lookup = _Lookup(connection, "season", "saison")
+    return [
+        (
+            ingredient["name"],
+            aisle_lookup.resolve(ingredient["aisle"]),
+            unit_lookup.resolve(ingredient["unit"]),
+            [
+                season_lookup.resolve(season_name)
+                for season_name in ingredient["seasons"]
+            ],
+            None,
+        )
+        for ingredient in ingredients
+    ]
+
+
+def write_catalog(path: Path, rows: int) -> None:
+    path.write_text(
+        json.dumps(
+            {
+                "ingredients": [
+                    {
+                        "name": f"Ingrédient {index}",
+                        "aisle": AISLES[index % len(AISLES)],
+                        "unit": "pièce",
+                        "seasons": SEASONS[: index % len(SEASONS) + 1],
+                    }
+                    for index in range(rows)
+                ]
+            }
+        ),
+        encoding="utf-8",
+    )
+
+
+def run(write, file_path: Path, db_path: str) -> float:
+    # Parsing is shared by both paths and left out of the timing. Each run
+    # writes the catalog twice so both the insert and the update paths count.
+    initialize_database(db_path)
+    with connection_scope(db_path, profile="bulk-import") as connection:
+        rows = resolve_rows(file_path, connection)
+        started = time.perf_counter()
+        for _ in range(2):
+            write(connection, rows)
+            connection.commit()
+        elapsed = time.perf_counter() - started
+    close_all_connections()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare the bulk ingredient upsert with the per-row writes."
+    )
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        catalog = Path(tmpdir) / "ingredients.json"
+        write_catalog(catalog, args.rows)
+        reference_seconds = run(
+            reference_write, catalog, str(Path(tmpdir) / "reference.db")
+        )
+        current_seconds = run(current_write, catalog, str(Path(tmpdir) / "current.db"))
+
+    print(f"rows:       {args.rows:,} (written twice)")
+    print(f"reference:  {reference_seconds:.3f}s")
+    print(f"current:    {current_seconds:.3f}s")
+    print(f"speedup:    {reference_seconds / current_seconds:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
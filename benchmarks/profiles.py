@@ -0,0 +1,61 @@
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from db.connection import (
+    PERFORMANCE_PROFILES,
+    close_all_connections,
+    connection_scope,
+    describe_connection,
+)
+from db.init_db import initialize_database
+from services.ingredients import create_ingredient, list_aisles, list_units
+from services.recipes import add_recipe_ingredient, create_recipe
+
+
+def run_profile(profile: str, rows: int) -> tuple[float, dict[str, object]]:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = str(Path(tmpdir) / "bench.db")
+        initialize_database(db_path)
+        with connection_scope(db_path, profile=profile) as connection:
+            report = describe_connection(connection)
+            aisle_id = list_aisles(connection=connection)[0]["id"]
+            unit_id = list_units(connection=connection)[0]["id"]
+            recipe_id = create_recipe("Banc d'essai", None, connection=connection)
+            ingredient_ids = [
+                create_ingredient(
+                    f"Ingrédient {index}", aisle_id, unit_id, [], connection=connection
+                )
+                for index in range(rows)
+            ]
+            started = time.perf_counter()
+            for ingredient_id in ingredient_ids:
+                add_recipe_ingredient(
+                    recipe_id, ingredient_id, 1, connection=connection
+                )
+                # Services leave a caller's connection uncommitted.
+                connection.commit()
+            elapsed = time.perf_counter() - started
+        close_all_connections()
+    return elapsed, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare single-row commit throughput per SQLite profile."
+    )
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+    for profile in PERFORMANCE_PROFILES:
+        elapsed, report = run_profile(profile, args.rows)
+        settings = ", ".join(
+            f"{key}={value}" for key, value in report.items() if key != "profile"
+        )
+        print(
+            f"{profile:<12} {args.rows / elapsed:>10.0f} commits/s  ({settings})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,63 @@
 import os
 import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator
+
+
+@dataclass(frozen=True)
+class PerformanceProfile:
+    name: str
+    synchronous: str
+    cache_size: int
+    mmap_size: int
+    temp_store: str
+    busy_timeout: int
+
+
+# Profiles only hold per-connection settings. The journal mode is stored in
+# the database file and shared by every connection, so it is set once by
+# initialize_database (see JOURNAL_MODE).
+# cache_size follows SQLite's convention: a negative value is a size in KiB.
+PERFORMANCE_PROFILES = {
+    "durable": PerformanceProfile(
+        name="durable",
+        synchronous="FULL",
+        cache_size=-2000,
+        mmap_size=0,
+        temp_store="DEFAULT",
+        busy_timeout=5000,
+    ),
+    "balanced": PerformanceProfile(
+        name="balanced",
+        synchronous="NORMAL",
+        cache_size=-16000,
+        mmap_size=64 * 1024 * 1024,
+        temp_store="MEMORY",
+        busy_timeout=5000,
+    ),
+    "bulk-import": PerformanceProfile(
+        name="bulk-import",
+        synchronous="OFF",
+        cache_size=-64000,
+        mmap_size=256 * 1024 * 1024,
+        temp_store="MEMORY",
+        busy_timeout=30000,
+    ),
+}
+
+DEFAULT_PROFILE = "durable"
+# WAL lets readers, such as another instance of the app, work alongside an
+# import.
+JOURNAL_MODE = "WAL"
+
+_active_profile = PERFORMANCE_PROFILES[DEFAULT_PROFILE]
+_pool_lock = threading.Lock()
+_pool_local = threading.local()
+_pooled_connections: list[sqlite3.Connection] = []
+_pool_generation = 0
+_commit_listeners: list[Callable[[], None]] = []
 
 
 def get_db_path() -> str:
@@ -9,9 +67,166 @@ def get_db_path() -> str:
     return os.path.join(data_dir, "recipes.db")
 
 
-def get_connection(db_path: str | None = None) -> sqlite3.Connection:
+def get_profile(profile: str | PerformanceProfile | None = None) -> PerformanceProfile:
+    if profile is None:
+        return _active_profile
+    if isinstance(profile, PerformanceProfile):
+        return profile
+    if profile not in PERFORMANCE_PROFILES:
+        raise ValueError(f"Unknown performance profile: {profile!r}.")
+    return PERFORMANCE_PROFILES[profile]
+
+
+def get_active_profile() -> PerformanceProfile:
+    return _active_profile
+
+
+def set_active_profile(profile: str | PerformanceProfile) -> PerformanceProfile:
+    global _active_profile
+    _active_profile = get_profile(profile)
+    return _active_profile
+
+
+def apply_profile(
+    connection: sqlite3.Connection, profile: str | PerformanceProfile | None = None
+) -> PerformanceProfile:
+    selected = get_profile(profile)
+    connection.execute(f"PRAGMA busy_timeout = {int(selected.busy_timeout)};")
+    connection.execute(f"PRAGMA synchronous = {selected.synchronous};")
+    connection.execute(f"PRAGMA cache_size = {int(selected.cache_size)};")
+    connection.execute(f"PRAGMA mmap_size = {int(selected.mmap_size)};")
+    connection.execute(f"PRAGMA temp_store = {selected.temp_store};")
+    return selected
+
+
+def set_journal_mode(
+    connection: sqlite3.Connection, journal_mode: str = JOURNAL_MODE
+) -> str:
+    # Must run outside a transaction. SQLite answers with the mode in effect,
+    # which stays "memory" for an in-memory database.
+    current = connection.execute("PRAGMA journal_mode;").fetchone()[0]
+    if current.lower() == journal_mode.lower():
+        return current
+    return connection.execute(f"PRAGMA journal_mode = {journal_mode};").fetchone()[0]
+
+
+def describe_connection(connection: sqlite3.Connection) -> dict[str, object]:
+    # Reports what SQLite actually applied, which can differ from the
+    # requested profile (e.g. an in-memory database never runs in WAL).
+    report: dict[str, object] = {
+        "profile": getattr(connection, "profile_name", None),
+    }
+    for pragma in (
+        "journal_mode",
+        "synchronous",
+        "cache_size",
+        "mmap_size",
+        "temp_store",
+        "busy_timeout",
+    ):
+        report[pragma] = connection.execute(f"PRAGMA {pragma};").fetchone()[0]
+    return report
+
+
+def get_connection(
+    db_path: str | None = None, profile: str | PerformanceProfile | None = None
+) -> sqlite3.Connection:
     path = db_path or get_db_path()
-    connection = sqlite3.connect(path)
+    connection = sqlite3.connect(path, factory=_ProfiledConnection)
+    _configure(connection, profile)
+    return connection
+
+
+def checkout_connection(
+    db_path: str | None = None, profile: str | PerformanceProfile | None = None
+) -> sqlite3.Connection:
+    # One long-lived connection per thread, database file and profile, kept
+    # open until close_all_connections().
+    path = db_path or get_db_path()
+    selected = get_profile(profile)
+    key = (path, selected.name)
+    connections = _thread_connections()
+    connection = connections.get(key)
+    if connection is None:
+        connection = sqlite3.connect(
+            path, check_same_thread=False, factory=_ProfiledConnection
+        )
+        _configure(connection, selected)
+        connections[key] = connection
+        with _pool_lock:
+            _pooled_connections.append(connection)
+    return connection
+
+
+def release_connection(connection: sqlite3.Connection) -> None:
+    if connection.in_transaction:
+        connection.rollback()
+
+
+def close_all_connections() -> None:
+    global _pool_generation
+    with _pool_lock:
+        connections = list(_pooled_connections)
+        _pooled_connections.clear()
+        _pool_generation += 1
+    for connection in connections:
+        try:
+            connection.close()
+        except sqlite3.Error:
+            pass
+
+
+@contextmanager
+def connection_scope(
+    db_path: str | None = None,
+    connection: sqlite3.Connection | None = None,
+    profile: str | PerformanceProfile | None = None,
+) -> Iterator[sqlite3.Connection]:
+    # A caller-provided connection is used as is; its transaction stays
+    # under the caller's control.
+    if connection is not None:
+        yield connection
+        return
+    pooled = checkout_connection(db_path, profile)
+    try:
+        yield pooled
+        # Called explicitly: the connection's context manager commits
+        # without going through commit(), so listeners would miss it.
+        pooled.commit()
+    finally:
+        release_connection(pooled)
+
+
+def add_commit_listener(listener: Callable[[], None]) -> None:
+    # Run after every commit that ended a write transaction on a connection
+    # from this module, whether the pool or a caller owns it.
+    _commit_listeners.append(listener)
+
+
+def _thread_connections() -> dict[tuple[str, str], sqlite3.Connection]:
+    connections = getattr(_pool_local, "connections", None)
+    if connections is None or _pool_local.generation != _pool_generation:
+        connections = {}
+        _pool_local.connections = connections
+        _pool_local.generation = _pool_generation
+    return connections
+
+
+class _ProfiledConnection(sqlite3.Connection):
+    profile_name: str | None = None
+
+    def commit(self) -> None:
+        wrote = self.in_transaction
+        super().commit()
+        if wrote:
+            for listener in _commit_listeners:
+                listener()
+
+
+def _configure(
+    connection: sqlite3.Connection,
+    profile: str | PerformanceProfile | None = None,
+) -> None:
     connection.row_factory = sqlite3.Row
     connection.execute("PRAGMA foreign_keys = ON;")
-    return connection
+    connection.profile_name = apply_profile(connection, profile).name
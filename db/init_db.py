@@ -1,16 +1,141 @@
-from db.connection import get_connection
-from db.schema import SCHEMA_SQL, DEFAULT_AISLES, DEFAULT_UNITS, DEFAULT_SEASONS
+import sqlite3
+from contextlib import closing
 
+from db.connection import get_connection, set_journal_mode
+from db.migrations import Migration, apply_migrations
+from db.schema import (
+    CHANGE_LOG_SQL,
+    DEFAULT_AISLES,
+    DEFAULT_SEASONS,
+    DEFAULT_UNITS,
+    IMPORT_CHECKPOINT_SQL,
+    IMPORT_MANIFEST_RESET_SQL,
+    IMPORT_MANIFEST_SQL,
+    INDEX_SQL,
+    INGREDIENT_ALIAS_SQL,
+    INGREDIENT_SEARCH_SQL,
+    NAME_KEY_TABLES,
+    RECIPE_FILTER_INDEX_SQL,
+    RECIPE_KEYS_SQL,
+    RECIPE_SEARCH_SQL,
+    RECIPE_SEASON_SQL,
+    SCHEMA_SQL,
+    SEASON_MASK_SQL,
+)
+from db.normalize import name_key
 
-def initialize_database(db_path: str | None = None) -> None:
-    with get_connection(db_path) as connection:
-        connection.executescript(SCHEMA_SQL)
-        ensure_recipe_columns(connection)
-        seed_aisles(connection)
-        seed_units(connection)
-        seed_seasons(connection)
-        normalize_seasons(connection)
-        connection.commit()
+
+def initialize_database(db_path: str | None = None) -> list[int]:
+    with closing(get_connection(db_path)) as connection:
+        applied = apply_migrations(connection, MIGRATIONS)
+        set_journal_mode(connection)
+        return applied
+
+
+def create_base_schema(connection) -> None:
+    _execute_statements(connection, SCHEMA_SQL)
+    ensure_recipe_columns(connection)
+    seed_aisles(connection)
+    seed_units(connection)
+    seed_seasons(connection)
+    normalize_seasons(connection)
+
+
+def create_indexes(connection) -> None:
+    _execute_statements(connection, INDEX_SQL)
+
+
+def create_import_manifest(connection) -> None:
+    _execute_statements(connection, IMPORT_MANIFEST_SQL)
+
+
+def create_recipe_keys(connection) -> None:
+    _execute_statements(connection, RECIPE_KEYS_SQL)
+    rows = connection.execute("SELECT id, name FROM recipe;").fetchall()
+    connection.executemany(
+        "UPDATE recipe SET name_key = ? WHERE id = ?;",
+        [(name_key(row["name"]), row["id"]) for row in rows],
+    )
+
+
+def create_import_checkpoints(connection) -> None:
+    _execute_statements(connection, IMPORT_CHECKPOINT_SQL)
+
+
+def create_name_keys(connection) -> None:
+    for table in NAME_KEY_TABLES:
+        connection.execute(f"ALTER TABLE {table} ADD COLUMN name_key TEXT;")
+        rows = connection.execute(f"SELECT id, name FROM {table} ORDER BY id;")
+        keys: set[str] = set()
+        updates = []
+        for row in rows.fetchall():
+            # Names that only differed by case or accents now collide; the
+            # oldest row keeps the key and later ones stay reachable by id.
+            key = name_key(row["name"])
+            if key in keys:
+                key = f"{key}#{row['id']}"
+            keys.add(key)
+            updates.append((key, row["id"]))
+        connection.executemany(
+            f"UPDATE {table} SET name_key = ? WHERE id = ?;", updates
+        )
+        connection.execute(
+            f"CREATE UNIQUE INDEX idx_{table}_name_key ON {table} (name_key);"
+        )
+
+
+def create_ingredient_aliases(connection) -> None:
+    _execute_statements(connection, INGREDIENT_ALIAS_SQL)
+
+
+def create_recipe_search(connection) -> None:
+    _execute_statements(connection, RECIPE_SEARCH_SQL)
+
+
+def create_recipe_filter_indexes(connection) -> None:
+    _execute_statements(connection, RECIPE_FILTER_INDEX_SQL)
+
+
+def create_recipe_seasons(connection) -> None:
+    _execute_statements(connection, RECIPE_SEASON_SQL)
+
+
+def create_season_masks(connection) -> None:
+    _execute_statements(connection, SEASON_MASK_SQL)
+
+
+def create_change_log(connection) -> None:
+    _execute_statements(connection, CHANGE_LOG_SQL)
+
+
+def create_ingredient_search(connection) -> None:
+    _execute_statements(connection, INGREDIENT_SEARCH_SQL)
+
+
+def create_import_manifest_resets(connection) -> None:
+    _execute_statements(connection, IMPORT_MANIFEST_RESET_SQL)
+    # Rows already edited by hand may have files skipped by the manifest.
+    connection.execute(
+        """
+        DELETE FROM import_manifest
+        WHERE (kind = 'ingredients'
+               AND EXISTS (SELECT 1 FROM ingredient WHERE import_hash IS NULL))
+           OR (kind = 'recipes'
+               AND EXISTS (SELECT 1 FROM recipe WHERE import_hash IS NULL));
+        """
+    )
+
+
+def _execute_statements(connection, script: str) -> None:
+    # executescript() would commit the migration's open transaction. Lines
+    # are gathered until they form a complete statement, so trigger bodies
+    # keep their inner semicolons.
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            connection.execute(statement)
+            statement = ""
 
 
 def ensure_recipe_columns(connection) -> None:
@@ -83,3 +208,26 @@ def normalize_seasons(connection) -> None:
                 (french_name, english_id),
             )
             name_to_id[french_key] = english_id
+
+
+# Append new migrations with the next version number; never edit or
+# renumber one that has shipped. PRAGMA user_version records the last
+# version applied to a database file.
+MIGRATIONS = [
+    Migration(1, "base schema", create_base_schema),
+    Migration(2, "join and filter indexes", create_indexes),
+    Migration(3, "import manifest and record hashes", create_import_manifest),
+    Migration(4, "recipe name keys and external ids", create_recipe_keys),
+    Migration(5, "resumable import checkpoints", create_import_checkpoints),
+    Migration(6, "accent-insensitive name keys", create_name_keys),
+    Migration(7, "ingredient aliases", create_ingredient_aliases),
+    Migration(8, "recipe full-text search", create_recipe_search),
+    Migration(9, "recipe difficulty index", create_recipe_filter_indexes),
+    Migration(10, "materialized recipe seasons", create_recipe_seasons),
+    Migration(11, "ingredient season masks", create_season_masks),
+    Migration(12, "change log for other processes", create_change_log),
+    Migration(13, "import manifest resets on hand edits", create_import_manifest_resets),
+    Migration(14, "ingredient word search", create_ingredient_search),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+from typing import Callable, Sequence
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+def get_schema_version(connection: sqlite3.Connection) -> int:
+    return connection.execute("PRAGMA user_version;").fetchone()[0]
+
+
+def set_schema_version(connection: sqlite3.Connection, version: int) -> None:
+    connection.execute(f"PRAGMA user_version = {int(version)};")
+
+
+def pending_migrations(
+    connection: sqlite3.Connection, migrations: Sequence[Migration]
+) -> list[Migration]:
+    current = get_schema_version(connection)
+    return [migration for migration in migrations if migration.version > current]
+
+
+def apply_migrations(
+    connection: sqlite3.Connection, migrations: Sequence[Migration]
+) -> list[int]:
+    versions = [migration.version for migration in migrations]
+    if versions != sorted(set(versions)):
+        raise ValueError("Migrations must have unique, increasing versions.")
+    if not migrations or get_schema_version(connection) >= versions[-1]:
+        return []
+
+    applied = []
+    for migration in pending_migrations(connection, migrations):
+        # BEGIN IMMEDIATE takes the write lock before user_version is read
+        # again, so two processes opening an old database cannot both apply
+        # a migration: the second waits, then skips what the first recorded.
+        connection.execute("BEGIN IMMEDIATE;")
+        try:
+            if get_schema_version(connection) >= migration.version:
+                connection.rollback()
+                continue
+            migration.apply(connection)
+            set_schema_version(connection, migration.version)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        applied.append(migration.version)
+    return applied
@@ -0,0 +1,27 @@
+import re
+import unicodedata
+
+# Letters that NFKD does not decompose but that French spellings treat as
+# two letters ("œuf" and "oeuf" are the same word).
+_LIGATURES = str.maketrans({"œ": "oe", "Œ": "OE", "æ": "ae", "Æ": "AE"})
+# unicode61 splits on anything that is not a letter or a digit.
+_SEARCH_TERM = re.compile(r"[^\W_]+")
+
+
+def name_key(value: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", value.translate(_LIGATURES))
+    folded = "".join(
+        char for char in decomposed if not unicodedata.combining(char)
+    ).casefold()
+    return " ".join(folded.split())
+
+
+def fts_query(query: str, column: str | None = None) -> str | None:
+    # Every word must match the start of a term, in ``column`` or else in
+    # any indexed column. Quoting keeps FTS5 operators in user input
+    # literal.
+    terms = _SEARCH_TERM.findall(name_key(query))
+    if not terms:
+        return None
+    match = " ".join(f'"{term}"*' for term in terms)
+    return f"{column} : ({match})" if column else match
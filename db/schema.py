@@ -93,3 +93,239 @@ DEFAULT_SEASONS = [
     "été",
     "automne",
 ]
+
+INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_recipe_ingredient_recipe
+    ON recipe_ingredient (recipe_id, ingredient_id);
+CREATE INDEX IF NOT EXISTS idx_recipe_ingredient_ingredient
+    ON recipe_ingredient (ingredient_id);
+CREATE INDEX IF NOT EXISTS idx_ingredient_season_season
+    ON ingredient_season (season_id);
+CREATE INDEX IF NOT EXISTS idx_ingredient_default_aisle
+    ON ingredient (default_aisle_id);
+CREATE INDEX IF NOT EXISTS idx_recipe_name
+    ON recipe (name);
+CREATE INDEX IF NOT EXISTS idx_recipe_total_minutes
+    ON recipe (total_minutes);
+"""
+
+IMPORT_MANIFEST_SQL = """
+CREATE TABLE IF NOT EXISTS import_manifest (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    imported_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+ALTER TABLE ingredient ADD COLUMN import_hash TEXT;
+ALTER TABLE recipe ADD COLUMN import_hash TEXT;
+"""
+
+RECIPE_KEYS_SQL = """
+ALTER TABLE recipe ADD COLUMN name_key TEXT;
+ALTER TABLE recipe ADD COLUMN external_id TEXT;
+CREATE INDEX IF NOT EXISTS idx_recipe_name_key
+    ON recipe (name_key);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_recipe_external_id
+    ON recipe (external_id);
+"""
+
+IMPORT_CHECKPOINT_SQL = """
+CREATE TABLE IF NOT EXISTS import_checkpoint (
+    content_hash TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    records_committed INTEGER NOT NULL,
+    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_import_checkpoint_path
+    ON import_checkpoint (path);
+"""
+
+NAME_KEY_TABLES = ("aisle", "unit", "season", "ingredient")
+
+INGREDIENT_ALIAS_SQL = """
+CREATE TABLE IF NOT EXISTS ingredient_alias (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL UNIQUE,
+    ingredient_id INTEGER NOT NULL,
+    FOREIGN KEY (ingredient_id) REFERENCES ingredient(id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_ingredient_alias_ingredient
+    ON ingredient_alias (ingredient_id);
+"""
+
+# unicode61 folds case and accents but keeps œ and æ as single letters, so
+# they are expanded before indexing, as name_key does.
+_FOLD = "replace(replace(replace(replace({}, 'œ', 'oe'), 'Œ', 'oe'), 'æ', 'ae'), 'Æ', 'ae')"
+_NEW = f"new.id, {_FOLD.format('new.name')}, {_FOLD.format('new.notes')}"
+_OLD = f"'delete', old.id, {_FOLD.format('old.name')}, {_FOLD.format('old.notes')}"
+
+# A contentless index: it only holds the terms, and matches are joined back
+# to recipe by rowid.
+RECIPE_SEARCH_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS recipe_fts USING fts5(
+    name,
+    notes,
+    content = '',
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS recipe_fts_insert AFTER INSERT ON recipe BEGIN
+    INSERT INTO recipe_fts (rowid, name, notes) VALUES ({_NEW});
+END;
+CREATE TRIGGER IF NOT EXISTS recipe_fts_delete AFTER DELETE ON recipe BEGIN
+    INSERT INTO recipe_fts (recipe_fts, rowid, name, notes) VALUES ({_OLD});
+END;
+CREATE TRIGGER IF NOT EXISTS recipe_fts_update
+AFTER UPDATE OF name, notes ON recipe BEGIN
+    INSERT INTO recipe_fts (recipe_fts, rowid, name, notes) VALUES ({_OLD});
+    INSERT INTO recipe_fts (rowid, name, notes) VALUES ({_NEW});
+END;
+INSERT INTO recipe_fts (rowid, name, notes)
+SELECT id, {_FOLD.format('name')}, {_FOLD.format('notes')} FROM recipe;
+"""
+
+_NAME_SEARCH_INDEX = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {{table}}_fts USING fts5(
+    name,
+    content = '',
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS {{table}}_fts_insert AFTER INSERT ON {{table}} BEGIN
+    INSERT INTO {{table}}_fts (rowid, name)
+    VALUES (new.id, {_FOLD.format('new.name')});
+END;
+CREATE TRIGGER IF NOT EXISTS {{table}}_fts_delete AFTER DELETE ON {{table}} BEGIN
+    INSERT INTO {{table}}_fts ({{table}}_fts, rowid, name)
+    VALUES ('delete', old.id, {_FOLD.format('old.name')});
+END;
+CREATE TRIGGER IF NOT EXISTS {{table}}_fts_update
+AFTER UPDATE OF name ON {{table}} BEGIN
+    INSERT INTO {{table}}_fts ({{table}}_fts, rowid, name)
+    VALUES ('delete', old.id, {_FOLD.format('old.name')});
+    INSERT INTO {{table}}_fts (rowid, name)
+    VALUES (new.id, {_FOLD.format('new.name')});
+END;
+INSERT INTO {{table}}_fts (rowid, name)
+SELECT id, {_FOLD.format('name')} FROM {{table}};
+"""
+
+# Ingredient names and aliases are searched by the start of each word, like
+# recipe names. Aliases have ids of their own, hence a second index.
+INGREDIENT_SEARCH_SQL = "".join(
+    _NAME_SEARCH_INDEX.format(table=table)
+    for table in ("ingredient", "ingredient_alias")
+)
+
+RECIPE_FILTER_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_recipe_difficulty
+    ON recipe (difficulty);
+"""
+
+# A recipe fits a season unless one of its ingredients has seasons and that
+# season is not among them; ingredients without seasons fit all of them.
+RECIPE_SEASON_SELECT = """
+SELECT recipe.id AS recipe_id, season.id AS season_id
+FROM recipe
+JOIN season
+WHERE NOT EXISTS (
+    SELECT 1
+    FROM recipe_ingredient
+    JOIN ingredient_season AS seasonal
+        ON seasonal.ingredient_id = recipe_ingredient.ingredient_id
+    WHERE recipe_ingredient.recipe_id = recipe.id
+      AND NOT EXISTS (
+          SELECT 1
+          FROM ingredient_season
+          WHERE ingredient_season.ingredient_id = recipe_ingredient.ingredient_id
+            AND ingredient_season.season_id = season.id
+      )
+)
+"""
+
+# recipe_season holds the seasons each recipe fits. The services refresh the
+# recipes touched by a change to their lines or to an ingredient's seasons.
+RECIPE_SEASON_SQL = f"""
+CREATE INDEX IF NOT EXISTS idx_recipe_season_season
+    ON recipe_season (season_id, recipe_id);
+DELETE FROM recipe_season;
+INSERT INTO recipe_season (recipe_id, season_id)
+{RECIPE_SEASON_SELECT};
+"""
+
+# season_mask mirrors ingredient_season as one bit per season, bit id - 1,
+# so lists can filter and name seasons without joining the link table.
+SEASON_MASK_SQL = """
+ALTER TABLE ingredient ADD COLUMN season_mask INTEGER NOT NULL DEFAULT 0;
+UPDATE ingredient
+SET season_mask = (
+    SELECT COALESCE(SUM(1 << (ingredient_season.season_id - 1)), 0)
+    FROM ingredient_season
+    WHERE ingredient_season.ingredient_id = ingredient.id
+);
+"""
+
+# Tables whose changes other processes sharing the database file need to
+# hear about; import bookkeeping and the search index are left out.
+CHANGE_LOG_TABLES = (
+    "aisle",
+    "unit",
+    "season",
+    "ingredient",
+    "ingredient_season",
+    "ingredient_alias",
+    "recipe",
+    "recipe_ingredient",
+    "recipe_season",
+)
+
+_CHANGE_LOG_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS change_log_{table}_{suffix}
+AFTER {event} ON {table} BEGIN
+    UPDATE change_log SET version = version + 1 WHERE table_name = '{table}';
+END;
+"""
+
+# One counter per table, bumped by every write to it. A reader compares the
+# counters it saw last to learn which tables another connection changed.
+CHANGE_LOG_SQL = """
+CREATE TABLE IF NOT EXISTS change_log (
+    table_name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+""" + "".join(
+    f"INSERT OR IGNORE INTO change_log (table_name) VALUES ('{table}');\n"
+    for table in CHANGE_LOG_TABLES
+) + "".join(
+    _CHANGE_LOG_TRIGGER.format(table=table, event=event, suffix=event.lower())
+    for table in CHANGE_LOG_TABLES
+    for event in ("INSERT", "UPDATE", "DELETE")
+)
+
+_MANIFEST_RESET_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS import_manifest_reset_{table}_{suffix}
+AFTER {event} ON {table}
+WHEN OLD.import_hash IS NOT NULL{condition} BEGIN
+    DELETE FROM import_manifest WHERE kind = '{kind}';
+END;
+"""
+
+# An imported row edited or deleted by hand no longer matches its file. The
+# files of its kind are dropped from the manifest, so the next directory
+# import parses them again and restores the row, like a file import would.
+# Unchanged records are still skipped by their own hash.
+IMPORT_MANIFEST_RESET_SQL = "".join(
+    _MANIFEST_RESET_TRIGGER.format(
+        table=table,
+        kind=kind,
+        event=event,
+        suffix=suffix,
+        condition=condition,
+    )
+    for table, kind in (("ingredient", "ingredients"), ("recipe", "recipes"))
+    for event, suffix, condition in (
+        ("UPDATE OF import_hash", "update", " AND NEW.import_hash IS NULL"),
+        ("DELETE", "delete", ""),
+    )
+)
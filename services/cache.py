@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import inspect
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+from types import MappingProxyType
+from typing import Any, Callable, Hashable
+
+from db.connection import add_commit_listener
+
+DEFAULT_MAXSIZE = 128
+
+_lock = threading.Lock()
+_data_version = 0
+_caches: dict[str, _QueryCache] = {}
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    size: int
+    maxsize: int
+
+
+def data_version() -> int:
+    return _data_version
+
+
+def invalidate() -> None:
+    # Runs on every commit of a write, including one made by a caller on its
+    # own connection. Entries remember the version they were read at and
+    # are dropped when it moves on.
+    global _data_version
+    with _lock:
+        _data_version += 1
+
+
+add_commit_listener(invalidate)
+
+
+def cache_info() -> dict[str, CacheStats]:
+    with _lock:
+        return {name: cache.stats() for name, cache in _caches.items()}
+
+
+def clear() -> None:
+    with _lock:
+        for cache in _caches.values():
+            cache.entries.clear()
+            cache.hits = cache.misses = 0
+
+
+def cached(maxsize: int = DEFAULT_MAXSIZE) -> Callable[[Callable], Callable]:
+    # Read-through cache for service readers taking db_path and connection.
+    # A caller passing its own connection may be reading its uncommitted
+    # writes, so those calls always go to the database. Lists come back as
+    # tuples and dicts as read-only views either way: cached results are
+    # shared by every caller, and both paths return the same types.
+    def decorate(function: Callable) -> Callable:
+        cache = _QueryCache(function, maxsize)
+        _caches[f"{function.__module__}.{function.__qualname__}"] = cache
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            return cache.call(args, kwargs)
+
+        wrapper.cache_info = lambda: cache.stats()
+        return wrapper
+
+    return decorate
+
+
+class _QueryCache:
+    def __init__(self, function: Callable, maxsize: int) -> None:
+        self.function = function
+        self.maxsize = maxsize
+        self.signature = inspect.signature(function)
+        self.entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self.version = _data_version
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.misses, len(self.entries), self.maxsize)
+
+    def call(self, args: tuple, kwargs: dict[str, Any]) -> Any:
+        bound = self.signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        if bound.arguments.get("connection") is not None:
+            return _freeze(self.function(*args, **kwargs))
+        key = tuple(
+            (name, _freeze(value))
+            for name, value in bound.arguments.items()
+            if name != "connection"
+        )
+        with _lock:
+            if self.version != _data_version:
+                self.entries.clear()
+                self.version = _data_version
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            version = _data_version
+
+        result = _freeze(self.function(*args, **kwargs))
+        with _lock:
+            # A write that landed during the read may not be in the result.
+            if version == _data_version == self.version:
+                self.entries[key] = result
+                if len(self.entries) > self.maxsize:
+                    self.entries.popitem(last=False)
+        return result
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, set):
+        return frozenset(value)
+    if isinstance(value, dict):
+        return MappingProxyType(value)
+    return value
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from db.connection import checkout_connection
+from services import cache
+
+
+class ChangeWatcher:
+    # Tells which tables other connections changed since the last poll:
+    # another instance of the app, an import script, or this app's own
+    # imports, which run on a connection of their own. PRAGMA data_version
+    # only moves when another connection commits, so an idle poll costs one
+    # pragma; change_log is read only then.
+    #
+    # The watcher reads through the same pooled connection as the services
+    # on this thread. Their commits leave data_version alone, as the views
+    # making them already refresh themselves.
+    def __init__(self, db_path: str | None = None) -> None:
+        self.db_path = db_path
+        self._data_version = self._read_data_version()
+        self._versions = self._read_versions()
+
+    def poll(self) -> frozenset[str]:
+        data_version = self._read_data_version()
+        if data_version == self._data_version:
+            return frozenset()
+        versions = self._read_versions()
+        # Only moved on once change_log was read, so a poll that failed on a
+        # locked database is retried in full.
+        self._data_version = data_version
+        changed = frozenset(
+            table
+            for table, version in versions.items()
+            if self._versions.get(table) != version
+        )
+        self._versions = versions
+        if changed:
+            # The in-process cache only hears about this process's writes.
+            cache.invalidate()
+        return changed
+
+    def _read_data_version(self) -> int:
+        connection = checkout_connection(self.db_path)
+        return connection.execute("PRAGMA data_version;").fetchone()[0]
+
+    def _read_versions(self) -> dict[str, int]:
+        connection = checkout_connection(self.db_path)
+        return {
+            row["table_name"]: row["version"]
+            for row in connection.execute("SELECT table_name, version FROM change_log;")
+        }
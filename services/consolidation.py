@@ -4,6 +4,8 @@ from collections import defaultdict
 from dataclasses import dataclass
 from typing import Iterable, Sequence
 
+from db.connection import connection_scope
+
 
 @dataclass(frozen=True)
 class ShoppingItem:
@@ -25,39 +27,237 @@ class ConsolidatedItem:
     note: str | None = None
 
 
-def consolidate_items(items: Iterable[ShoppingItem]) -> list[ConsolidatedItem]:
-    grouped: dict[tuple[str, str, str], ConsolidatedItem] = {}
+class _Accumulator:
+    __slots__ = (
+        "ingredient_name",
+        "aisle_name",
+        "aisle_order",
+        "unit",
+        "quantity",
+        "note",
+    )
+
+    def __init__(self, item: ShoppingItem | ConsolidatedItem) -> None:
+        self.ingredient_name = item.ingredient_name
+        self.aisle_name = item.aisle_name
+        self.aisle_order = item.aisle_order
+        self.unit = item.unit
+        self.quantity = item.quantity
+        self.note = item.note
+
+    def freeze(self) -> ConsolidatedItem:
+        return ConsolidatedItem(
+            ingredient_name=self.ingredient_name,
+            aisle_name=self.aisle_name,
+            aisle_order=self.aisle_order,
+            unit=self.unit,
+            quantity=self.quantity,
+            note=self.note,
+        )
+
+
+def consolidate_items(
+    items: Iterable[ShoppingItem | ConsolidatedItem],
+) -> list[ConsolidatedItem]:
+    # Merge into mutable accumulators and freeze each key once at the end,
+    # rather than building a new ConsolidatedItem on every merge.
+    grouped: dict[tuple[str, str, str], _Accumulator] = {}
+    get = grouped.get
     for item in items:
         key = (item.ingredient_name, item.unit, item.aisle_name)
-        if key in grouped:
-            existing = grouped[key]
-            if existing.note == item.note:
-                merged_note = existing.note
-            elif existing.note is None:
-                merged_note = item.note
-            elif item.note is None:
-                merged_note = existing.note
-            else:
-                merged_note = None
-            grouped[key] = ConsolidatedItem(
-                ingredient_name=existing.ingredient_name,
-                aisle_name=existing.aisle_name,
-                aisle_order=existing.aisle_order,
-                unit=existing.unit,
-                quantity=existing.quantity + item.quantity,
-                note=merged_note,
+        accumulator = get(key)
+        if accumulator is None:
+            grouped[key] = _Accumulator(item)
+            continue
+        accumulator.quantity += item.quantity
+        accumulator.note = _merge_note(accumulator.note, item.note)
+    return _sort_consolidated(
+        accumulator.freeze() for accumulator in grouped.values()
+    )
+
+
+def _merge_note(current: str | None, note: str | None) -> str | None:
+    if current == note or note is None:
+        return current
+    if current is None:
+        return note
+    return None
+
+
+class _Line:
+    __slots__ = (
+        "ingredient_name",
+        "aisle_name",
+        "aisle_order",
+        "unit",
+        "quantity",
+        "note",
+        "contributions",
+    )
+
+    def __init__(self, item: ShoppingItem) -> None:
+        self.ingredient_name = item.ingredient_name
+        self.aisle_name = item.aisle_name
+        self.aisle_order = item.aisle_order
+        self.unit = item.unit
+        self.quantity = 0.0
+        self.note = None
+        self.contributions: dict[tuple, tuple[float, str | None]] = {}
+
+    def recompute(self) -> None:
+        # Re-sum in insertion order so totals and notes match what
+        # consolidate_items returns for the same items, without the
+        # drift of repeated subtraction.
+        quantity = 0.0
+        note = None
+        for index, (amount, item_note) in enumerate(self.contributions.values()):
+            quantity += amount
+            note = item_note if index == 0 else _merge_note(note, item_note)
+        self.quantity = quantity
+        self.note = note
+
+    def freeze(self) -> ConsolidatedItem:
+        return ConsolidatedItem(
+            ingredient_name=self.ingredient_name,
+            aisle_name=self.aisle_name,
+            aisle_order=self.aisle_order,
+            unit=self.unit,
+            quantity=self.quantity,
+            note=self.note,
+        )
+
+
+# Consolidated shopping list updated by deltas: each mutator touches only
+# the lines of the items it adds or removes and returns the names of the
+# aisles whose rows changed.
+class ShoppingListModel:
+
+    def __init__(self) -> None:
+        self._lines: dict[tuple[str, str, str], _Line] = {}
+        self._aisles: dict[str, dict[tuple[str, str, str], None]] = {}
+        self._recipes: dict[int, tuple[list[ShoppingItem], float]] = {}
+        self._manual_items: dict[str, ShoppingItem] = {}
+
+    def add_recipe(
+        self, recipe_id: int, items: Iterable[ShoppingItem], multiplier: float = 1.0
+    ) -> set[str]:
+        changed = self.remove_recipe(recipe_id)
+        items = list(items)
+        self._recipes[recipe_id] = (items, multiplier)
+        for index, item in enumerate(items):
+            changed.add(
+                self._add(("recipe", recipe_id, index), item, item.quantity * multiplier)
             )
-        else:
-            grouped[key] = ConsolidatedItem(
-                ingredient_name=item.ingredient_name,
-                aisle_name=item.aisle_name,
-                aisle_order=item.aisle_order,
-                unit=item.unit,
-                quantity=item.quantity,
-                note=item.note,
+        return changed
+
+    def remove_recipe(self, recipe_id: int) -> set[str]:
+        entry = self._recipes.pop(recipe_id, None)
+        if entry is None:
+            return set()
+        items, _ = entry
+        return {
+            self._remove(("recipe", recipe_id, index), item)
+            for index, item in enumerate(items)
+        }
+
+    def rescale_recipe(self, recipe_id: int, multiplier: float) -> set[str]:
+        entry = self._recipes.get(recipe_id)
+        if entry is None:
+            raise KeyError(recipe_id)
+        items, _ = entry
+        self._recipes[recipe_id] = (items, multiplier)
+        changed = set()
+        for index, item in enumerate(items):
+            line = self._lines[_line_key(item)]
+            line.contributions[("recipe", recipe_id, index)] = (
+                item.quantity * multiplier,
+                item.note,
             )
+            line.recompute()
+            changed.add(item.aisle_name)
+        return changed
+
+    def add_manual_item(self, item_id: str, item: ShoppingItem) -> set[str]:
+        changed = self.remove_manual_item(item_id)
+        self._manual_items[item_id] = item
+        changed.add(self._add(("manual", item_id), item, item.quantity))
+        return changed
+
+    def remove_manual_item(self, item_id: str) -> set[str]:
+        item = self._manual_items.pop(item_id, None)
+        if item is None:
+            return set()
+        return {self._remove(("manual", item_id), item)}
+
+    def clear(self) -> set[str]:
+        changed = set(self._aisles)
+        self._lines.clear()
+        self._aisles.clear()
+        self._recipes.clear()
+        self._manual_items.clear()
+        return changed
+
+    def recipe_ids(self) -> list[int]:
+        return list(self._recipes)
+
+    def items(self) -> list[ConsolidatedItem]:
+        return _sort_consolidated(line.freeze() for line in self._lines.values())
+
+    def aisle_items(self, aisle_name: str) -> list[ConsolidatedItem]:
+        keys = self._aisles.get(aisle_name, {})
+        return _sort_consolidated(self._lines[key].freeze() for key in keys)
+
+    def aisle_names(self) -> list[str]:
+        orders = {
+            aisle_name: min(self._lines[key].aisle_order for key in keys)
+            for aisle_name, keys in self._aisles.items()
+        }
+        return sorted(orders, key=lambda name: (orders[name], name.lower()))
+
+    def grouped(self) -> list[tuple[str, list[ConsolidatedItem]]]:
+        return [
+            (aisle_name, self.aisle_items(aisle_name))
+            for aisle_name in self.aisle_names()
+        ]
+
+    def _add(self, source: tuple, item: ShoppingItem, quantity: float) -> str:
+        key = _line_key(item)
+        line = self._lines.get(key)
+        if line is None:
+            line = _Line(item)
+            self._lines[key] = line
+            self._aisles.setdefault(item.aisle_name, {})[key] = None
+        line.contributions[source] = (quantity, item.note)
+        if len(line.contributions) == 1:
+            line.quantity = quantity
+            line.note = item.note
+        else:
+            line.quantity += quantity
+            line.note = _merge_note(line.note, item.note)
+        return item.aisle_name
+
+    def _remove(self, source: tuple, item: ShoppingItem) -> str:
+        key = _line_key(item)
+        line = self._lines[key]
+        del line.contributions[source]
+        if line.contributions:
+            line.recompute()
+        else:
+            del self._lines[key]
+            aisle_keys = self._aisles[item.aisle_name]
+            del aisle_keys[key]
+            if not aisle_keys:
+                del self._aisles[item.aisle_name]
+        return item.aisle_name
+
+
+def _line_key(item: ShoppingItem) -> tuple[str, str, str]:
+    return (item.ingredient_name, item.unit, item.aisle_name)
+
+
+def _sort_consolidated(items: Iterable[ConsolidatedItem]) -> list[ConsolidatedItem]:
     return sorted(
-        grouped.values(),
+        items,
         key=lambda item: (
             item.aisle_order,
             item.aisle_name.lower(),
@@ -85,3 +285,68 @@ def group_by_aisle(items: Sequence[ConsolidatedItem]) -> list[tuple[str, list[Co
             key=lambda name: (aisle_orders.get(name, 0), name.lower()),
         )
     ]
+
+
+def consolidate_selection_in_db(
+    selections: Iterable[tuple[int, float]],
+    manual_items: Iterable[ShoppingItem] = (),
+    db_path: str | None = None,
+    connection=None,
+) -> list[ConsolidatedItem]:
+    with connection_scope(db_path, connection) as connection:
+        connection.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS shopping_selection (
+                recipe_id INTEGER PRIMARY KEY,
+                multiplier REAL NOT NULL
+            );
+            """
+        )
+        connection.execute("DELETE FROM temp.shopping_selection;")
+        connection.executemany(
+            """
+            INSERT INTO temp.shopping_selection (recipe_id, multiplier)
+            VALUES (?, ?)
+            ON CONFLICT (recipe_id)
+            DO UPDATE SET multiplier = multiplier + excluded.multiplier;
+            """,
+            selections,
+        )
+        # CROSS JOIN pins the selection as the outer loop so recipe lines are
+        # reached through their recipe_id index.
+        rows = connection.execute(
+            """
+            SELECT ingredient.name AS ingredient_name,
+                   aisle.name AS aisle_name,
+                   aisle.sort_order AS aisle_order,
+                   unit.name AS unit_name,
+                   SUM(recipe_ingredient.quantity * shopping_selection.multiplier)
+                       AS quantity
+            FROM temp.shopping_selection AS shopping_selection
+            CROSS JOIN recipe_ingredient
+                ON recipe_ingredient.recipe_id = shopping_selection.recipe_id
+            JOIN ingredient ON ingredient.id = recipe_ingredient.ingredient_id
+            JOIN unit ON unit.id = ingredient.unit_id
+            JOIN aisle ON aisle.id = ingredient.default_aisle_id
+            GROUP BY ingredient.name, unit.name, aisle.name
+            ORDER BY aisle.sort_order ASC,
+                     lower(aisle.name) ASC,
+                     lower(ingredient.name) ASC;
+            """
+        ).fetchall()
+        connection.execute("DELETE FROM temp.shopping_selection;")
+
+    consolidated = [
+        ConsolidatedItem(
+            ingredient_name=row["ingredient_name"],
+            aisle_name=row["aisle_name"],
+            aisle_order=row["aisle_order"],
+            unit=row["unit_name"],
+            quantity=row["quantity"],
+        )
+        for row in rows
+    ]
+    manual_items = list(manual_items)
+    if not manual_items:
+        return consolidated
+    return consolidate_items([*consolidated, *manual_items])
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import json
 from dataclasses import dataclass
 from datetime import date
+from itertools import groupby
 from pathlib import Path
-from typing import Iterable
+from typing import Any, Iterable, Iterator
+
+from db.connection import connection_scope
 
 
 @dataclass(frozen=True)
@@ -93,3 +97,119 @@ def export_shopping_list(
     file_path = output_dir / f"liste-de-courses-{list_date.isoformat()}.html"
     file_path.write_text(html, encoding="utf-8")
     return file_path
+
+
+def export_ingredients_ndjson(
+    output_path: str | Path, db_path: str | None = None, connection=None
+) -> int:
+    with connection_scope(db_path, connection) as connection:
+        rows = connection.execute(
+            """
+            SELECT
+                ingredient.id,
+                ingredient.name,
+                aisle.name AS aisle_name,
+                unit.name AS unit_name,
+                season.name AS season_name,
+                (
+                    SELECT json_group_array(ingredient_alias.name)
+                    FROM ingredient_alias
+                    WHERE ingredient_alias.ingredient_id = ingredient.id
+                ) AS aliases
+            FROM ingredient
+            JOIN aisle ON aisle.id = ingredient.default_aisle_id
+            JOIN unit ON unit.id = ingredient.unit_id
+            LEFT JOIN ingredient_season
+                ON ingredient_season.ingredient_id = ingredient.id
+            LEFT JOIN season ON season.id = ingredient_season.season_id
+            ORDER BY ingredient.id, season.id;
+            """
+        )
+        records = (
+            _ingredient_record(first, group) for first, group in _group_rows(rows)
+        )
+        return _write_ndjson(output_path, records)
+
+
+def _ingredient_record(first, rows: list) -> dict[str, Any]:
+    record: dict[str, Any] = {
+        "name": first["name"],
+        "aisle": first["aisle_name"],
+        "unit": first["unit_name"],
+        "seasons": [row["season_name"] for row in rows if row["season_name"]],
+    }
+    aliases = json.loads(first["aliases"])
+    if aliases:
+        record["aliases"] = aliases
+    return record
+
+
+def export_recipes_ndjson(
+    output_path: str | Path, db_path: str | None = None, connection=None
+) -> int:
+    with connection_scope(db_path, connection) as connection:
+        rows = connection.execute(
+            """
+            SELECT
+                recipe.id,
+                recipe.external_id,
+                recipe.name,
+                recipe.notes,
+                recipe.time_label,
+                recipe.difficulty,
+                recipe.servings,
+                ingredient.name AS ingredient_name,
+                recipe_ingredient.quantity
+            FROM recipe
+            LEFT JOIN recipe_ingredient ON recipe_ingredient.recipe_id = recipe.id
+            LEFT JOIN ingredient ON ingredient.id = recipe_ingredient.ingredient_id
+            ORDER BY recipe.id, recipe_ingredient.id;
+            """
+        )
+        records = (_recipe_record(first, group) for first, group in _group_rows(rows))
+        return _write_ndjson(output_path, records)
+
+
+def _recipe_record(first, rows: list) -> dict[str, Any]:
+    record: dict[str, Any] = {}
+    if first["external_id"] is not None:
+        record["id"] = first["external_id"]
+    record.update(
+        {
+            "name": first["name"],
+            "instructions": first["notes"] or "",
+            "time": first["time_label"],
+            "difficulty": first["difficulty"],
+            "servings": first["servings"],
+            "ingredients": [
+                {"name": row["ingredient_name"], "quantity": _number(row["quantity"])}
+                for row in rows
+                if row["ingredient_name"] is not None
+            ],
+        }
+    )
+    return record
+
+
+def _group_rows(rows: Iterable) -> Iterator[tuple[Any, list]]:
+    # Rows arrive ordered by id, so each entity is a consecutive run and
+    # only one of them is held in memory at a time.
+    for _, group in groupby(rows, key=lambda row: row["id"]):
+        group_rows = list(group)
+        yield group_rows[0], group_rows
+
+
+def _number(value: float) -> float | int:
+    return int(value) if float(value).is_integer() else value
+
+
+def _write_ndjson(output_path: str | Path, records: Iterable[dict[str, Any]]) -> int:
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    with output_path.open("w", encoding="utf-8") as handle:
+        for record in records:
+            handle.write(json.dumps(record, ensure_ascii=False))
+            handle.write("\n")
+            written += 1
+    return written
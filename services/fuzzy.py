@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterable
+
+from db.normalize import name_key
+
+
+@dataclass(frozen=True)
+class FuzzyMatch:
+    id: int
+    name: str
+    score: float
+
+
+class TrigramIndex:
+    # An inverted index from trigram to the names containing it. A search
+    # only visits the posting lists of the query's own trigrams, so names
+    # sharing nothing with it are never looked at. Scores are the Dice
+    # coefficient of the two trigram sets.
+    def __init__(self, entries: Iterable[tuple[int, str]]) -> None:
+        self._entries: list[tuple[int, str, int]] = []
+        self._postings: dict[str, list[int]] = {}
+        for entry_id, name in entries:
+            grams = trigrams(name)
+            position = len(self._entries)
+            self._entries.append((entry_id, name, len(grams)))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(position)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def search(
+        self, query: str, threshold: float = 0.5, limit: int = 5
+    ) -> list[FuzzyMatch]:
+        grams = trigrams(query)
+        shared: Counter[int] = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+        # Several names (an ingredient and its aliases) can share an id; the
+        # best scoring one stands for it.
+        best: dict[int, FuzzyMatch] = {}
+        for position, count in shared.items():
+            entry_id, name, size = self._entries[position]
+            score = 2 * count / (len(grams) + size)
+            if score >= threshold and (
+                entry_id not in best or score > best[entry_id].score
+            ):
+                best[entry_id] = FuzzyMatch(entry_id, name, score)
+        ranked = sorted(
+            best.values(), key=lambda match: (-match.score, name_key(match.name))
+        )
+        return ranked[:limit]
+
+
+def trigrams(value: str) -> set[str]:
+    key = name_key(value)
+    if not key:
+        return set()
+    # Padding gives word starts extra weight, as typos rarely touch them.
+    padded = f"  {key} "
+    return {padded[start:start + 3] for start in range(len(padded) - 2)}
+
+
+def unambiguous_match(
+    matches: list[FuzzyMatch], min_score: float, margin: float
+) -> FuzzyMatch | None:
+    if not matches or matches[0].score < min_score:
+        return None
+    if len(matches) > 1 and matches[0].score - matches[1].score < margin:
+        return None
+    return matches[0]
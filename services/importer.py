@@ -1,24 +1,125 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial
+from itertools import islice
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator, TextIO
 
-from db.connection import get_connection
+from db.connection import connection_scope
+from db.normalize import name_key
+from services import seasonality
+from services.fuzzy import TrigramIndex, unambiguous_match
 from services.recipes import (
     TIME_OPTIONS,
     normalize_difficulty,
     normalize_time_label,
     normalize_servings,
 )
+from services.json_stream import (
+    MISSING_ARRAY,
+    NOT_AN_OBJECT,
+    JSONStreamError,
+    iter_array_items,
+)
+
+IMPORT_BATCH_SIZE = 500
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+DEFAULT_MAX_ERRORS = 100
+INGREDIENTS = "ingredients"
+RECIPES = "recipes"
+# Fuzzy matching lists names scoring at least FUZZY_THRESHOLD and only
+# picks one by itself above FUZZY_AUTO_SCORE, ahead of the runner-up by
+# FUZZY_AUTO_MARGIN.
+FUZZY_THRESHOLD = 0.5
+FUZZY_AUTO_SCORE = 0.7
+FUZZY_AUTO_MARGIN = 0.1
+# SQLite builds older than 3.32 cap bound parameters at 999 per statement.
+_MAX_VARIABLES = 999
 
 
 class IngredientImportError(ValueError):
-    pass
+    def __init__(self, message: str, field: str | None = None) -> None:
+        super().__init__(message)
+        self.field = field
 
 
 class RecipeImportError(ValueError):
-    pass
+    def __init__(self, message: str, field: str | None = None) -> None:
+        super().__init__(message)
+        self.field = field
+
+
+@dataclass(frozen=True)
+class FileImportResult:
+    path: Path
+    kind: str
+    records: int
+    parse_seconds: float
+    write_seconds: float
+    skipped_records: int = 0
+    unchanged: bool = False
+
+
+@dataclass(frozen=True)
+class ImportResult:
+    records: int
+    skipped_records: int = 0
+    # Committed by an earlier run that this one resumed after.
+    resumed_records: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.records + self.skipped_records + self.resumed_records
+
+
+@dataclass(frozen=True)
+class DirectoryImportReport:
+    files: list[FileImportResult]
+    total_seconds: float
+
+    def count(self, kind: str) -> int:
+        return sum(result.records for result in self.files if result.kind == kind)
+
+    @property
+    def skipped_files(self) -> int:
+        return sum(1 for result in self.files if result.unchanged)
+
+    @property
+    def skipped_records(self) -> int:
+        return sum(result.skipped_records for result in self.files)
+
+
+@dataclass(frozen=True)
+class ImportIssue:
+    index: int | None
+    field: str | None
+    reason: str
+
+
+@dataclass(frozen=True)
+class ValidationReport:
+    records: int
+    issues: list[ImportIssue]
+    truncated: bool = False
+
+    @property
+    def valid(self) -> bool:
+        return not self.issues
+
+
+@dataclass(frozen=True)
+class _ParsedFile:
+    path: Path
+    kind: str | None
+    records: list[dict[str, Any]] | None
+    parse_seconds: float
+    content_hash: str
 
 
 def parse_ingredient_json(payload: str) -> list[dict[str, Any]]:
@@ -26,50 +127,68 @@ def parse_ingredient_json(payload: str) -> list[dict[str, Any]]:
         data = json.loads(payload)
     except json.JSONDecodeError as exc:
         raise IngredientImportError("Le fichier JSON est invalide.") from exc
+    return _parse_ingredient_document(data)
 
-    if not isinstance(data, dict):
-        raise IngredientImportError("Le JSON doit contenir un objet racine.")
 
-    ingredients = data.get("ingredients")
-    if not isinstance(ingredients, list):
+def _parse_ingredient_document(data: Any) -> list[dict[str, Any]]:
+    return [
+        _parse_ingredient(ingredient, index)
+        for index, ingredient in enumerate(
+            _document_items(data, INGREDIENTS, IngredientImportError), start=1
+        )
+    ]
+
+
+def _parse_ingredient(ingredient: Any, index: int) -> dict[str, Any]:
+    if not isinstance(ingredient, dict):
         raise IngredientImportError(
-            "Le JSON doit contenir une liste 'ingredients'."
+            f"L'ingrédient #{index} doit être un objet JSON."
         )
 
-    parsed: list[dict[str, Any]] = []
-    for index, ingredient in enumerate(ingredients, start=1):
-        if not isinstance(ingredient, dict):
+    name = _required_string(ingredient, "name", index)
+    aisle = _required_string(ingredient, "aisle", index)
+    unit = _required_string(ingredient, "unit", index)
+    seasons = ingredient.get("seasons", [])
+    if seasons is None:
+        seasons = []
+    if not isinstance(seasons, list):
+        raise IngredientImportError(
+            f"L'ingrédient #{index} doit contenir une liste 'seasons'.",
+            field="seasons",
+        )
+    parsed_seasons: list[str] = []
+    for season_index, season in enumerate(seasons, start=1):
+        if not isinstance(season, str) or not season.strip():
             raise IngredientImportError(
-                f"L'ingrédient #{index} doit être un objet JSON."
+                f"La saison #{season_index} de l'ingrédient #{index} est invalide.",
+                field=f"seasons[{season_index}]",
             )
+        parsed_seasons.append(season.strip())
 
-        name = _required_string(ingredient, "name", index)
-        aisle = _required_string(ingredient, "aisle", index)
-        unit = _required_string(ingredient, "unit", index)
-        seasons = ingredient.get("seasons", [])
-        if seasons is None:
-            seasons = []
-        if not isinstance(seasons, list):
+    parsed = {
+        "name": name,
+        "aisle": aisle,
+        "unit": unit,
+        "seasons": parsed_seasons,
+    }
+    # Aliases are only replaced when the record lists them, so files written
+    # before aliases existed keep their hashes and the aliases added since.
+    aliases = ingredient.get("aliases")
+    if aliases is not None:
+        if not isinstance(aliases, list):
             raise IngredientImportError(
-                f"L'ingrédient #{index} doit contenir une liste 'seasons'."
+                f"L'ingrédient #{index} doit contenir une liste 'aliases'.",
+                field="aliases",
             )
-        parsed_seasons: list[str] = []
-        for season_index, season in enumerate(seasons, start=1):
-            if not isinstance(season, str) or not season.strip():
+        parsed_aliases: list[str] = []
+        for alias_index, alias in enumerate(aliases, start=1):
+            if not isinstance(alias, str) or not alias.strip():
                 raise IngredientImportError(
-                    f"La saison #{season_index} de l'ingrédient #{index} est invalide."
+                    f"L'alias #{alias_index} de l'ingrédient #{index} est invalide.",
+                    field=f"aliases[{alias_index}]",
                 )
-            parsed_seasons.append(season.strip())
-
-        parsed.append(
-            {
-                "name": name,
-                "aisle": aisle,
-                "unit": unit,
-                "seasons": parsed_seasons,
-            }
-        )
-
+            parsed_aliases.append(alias.strip())
+        parsed["aliases"] = parsed_aliases
     return parsed
 
 
@@ -78,266 +197,1251 @@ def parse_recipe_json(payload: str) -> list[dict[str, Any]]:
         data = json.loads(payload)
     except json.JSONDecodeError as exc:
         raise RecipeImportError("Le fichier JSON est invalide.") from exc
+    return _parse_recipe_document(data)
+
 
+def _parse_recipe_document(data: Any) -> list[dict[str, Any]]:
+    return [
+        _parse_recipe(recipe, index)
+        for index, recipe in enumerate(
+            _document_items(data, RECIPES, RecipeImportError), start=1
+        )
+    ]
+
+
+def _document_items(data: Any, key: str, error: type[ValueError]) -> list[Any]:
     if not isinstance(data, dict):
-        raise RecipeImportError("Le JSON doit contenir un objet racine.")
+        raise error("Le JSON doit contenir un objet racine.")
+    items = data.get(key)
+    if not isinstance(items, list):
+        raise error(f"Le JSON doit contenir une liste '{key}'.")
+    return items
+
 
-    recipes = data.get("recipes")
-    if not isinstance(recipes, list):
-        raise RecipeImportError("Le JSON doit contenir une liste 'recipes'.")
+def _parse_recipe(recipe: Any, index: int) -> dict[str, Any]:
+    if not isinstance(recipe, dict):
+        raise RecipeImportError(
+            f"La recette #{index} doit être un objet JSON."
+        )
+    name = _required_string(recipe, "name", index)
+    instructions = recipe.get("instructions", "")
+    if instructions is None:
+        instructions = ""
+    if not isinstance(instructions, str):
+        raise RecipeImportError(
+            f"La recette #{index} doit contenir un texte 'instructions'.",
+            field="instructions",
+        )
+
+    time_label = recipe.get("time")
+    if time_label is None:
+        time_label = ""
+    if not isinstance(time_label, str):
+        raise RecipeImportError(
+            f"La recette #{index} doit contenir un texte 'time'.",
+            field="time",
+        )
+    cleaned_time_label = time_label.strip()
+    if cleaned_time_label and cleaned_time_label not in TIME_OPTIONS:
+        raise RecipeImportError(
+            f"La recette #{index} contient un temps invalide.",
+            field="time",
+        )
 
-    parsed: list[dict[str, Any]] = []
-    for index, recipe in enumerate(recipes, start=1):
-        if not isinstance(recipe, dict):
+    difficulty = recipe.get("difficulty")
+    if difficulty is None:
+        difficulty = ""
+    if not isinstance(difficulty, str):
+        raise RecipeImportError(
+            f"La recette #{index} doit contenir un texte 'difficulty'.",
+            field="difficulty",
+        )
+    cleaned_difficulty = difficulty.strip()
+    normalized_difficulty: str | None = None
+    if cleaned_difficulty:
+        try:
+            normalized_difficulty = normalize_difficulty(cleaned_difficulty)
+        except ValueError as exc:
             raise RecipeImportError(
-                f"La recette #{index} doit être un objet JSON."
-            )
-        name = _required_string(recipe, "name", index)
-        instructions = recipe.get("instructions", "")
-        if instructions is None:
-            instructions = ""
-        if not isinstance(instructions, str):
+                f"La recette #{index} contient une difficulté invalide.",
+                field="difficulty",
+            ) from exc
+
+    servings = recipe.get("servings", 1)
+    if servings is None:
+        servings = 1
+    try:
+        normalized_servings = normalize_servings(servings)
+    except ValueError as exc:
+        raise RecipeImportError(
+            f"La recette #{index} contient un nombre de personnes invalide.",
+            field="servings",
+        ) from exc
+
+    ingredients = recipe.get("ingredients", [])
+    if ingredients is None:
+        ingredients = []
+    if not isinstance(ingredients, list):
+        raise RecipeImportError(
+            f"La recette #{index} doit contenir une liste 'ingredients'.",
+            field="ingredients",
+        )
+    parsed_ingredients: list[dict[str, Any]] = []
+    for ingredient_index, ingredient in enumerate(ingredients, start=1):
+        if not isinstance(ingredient, dict):
             raise RecipeImportError(
-                f"La recette #{index} doit contenir un texte 'instructions'."
+                f"L'ingrédient #{ingredient_index} de la recette #{index} est invalide.",
+                field=f"ingredients[{ingredient_index}]",
             )
-
-        time_label = recipe.get("time")
-        if time_label is None:
-            time_label = ""
-        if not isinstance(time_label, str):
+        ingredient_name = _required_string(
+            ingredient,
+            "name",
+            ingredient_index,
+            field=f"ingredients[{ingredient_index}].name",
+        )
+        quantity = ingredient.get("quantity")
+        if not isinstance(quantity, (int, float)):
             raise RecipeImportError(
-                f"La recette #{index} doit contenir un texte 'time'."
+                f"La quantité de l'ingrédient #{ingredient_index} de la recette #{index} est invalide.",
+                field=f"ingredients[{ingredient_index}].quantity",
             )
-        cleaned_time_label = time_label.strip()
-        if cleaned_time_label and cleaned_time_label not in TIME_OPTIONS:
+        if quantity <= 0:
             raise RecipeImportError(
-                f"La recette #{index} contient un temps invalide."
+                f"La quantité de l'ingrédient #{ingredient_index} de la recette #{index} doit être positive.",
+                field=f"ingredients[{ingredient_index}].quantity",
             )
+        parsed_ingredients.append(
+            {"name": ingredient_name, "quantity": float(quantity)}
+        )
 
-        difficulty = recipe.get("difficulty")
-        if difficulty is None:
-            difficulty = ""
-        if not isinstance(difficulty, str):
+    external_id = recipe.get("id")
+    if external_id is not None:
+        if (
+            isinstance(external_id, bool)
+            or not isinstance(external_id, (str, int))
+            or not str(external_id).strip()
+        ):
             raise RecipeImportError(
-                f"La recette #{index} doit contenir un texte 'difficulty'."
+                f"La recette #{index} contient un identifiant 'id' invalide.",
+                field="id",
+            )
+        external_id = str(external_id).strip()
+
+    return {
+        "external_id": external_id,
+        "name": name,
+        "instructions": instructions.strip(),
+        "time_label": cleaned_time_label or None,
+        "difficulty": normalized_difficulty,
+        "servings": normalized_servings,
+        "ingredients": parsed_ingredients,
+    }
+
+
+def iter_ingredient_json(handle: TextIO) -> Iterator[dict[str, Any]]:
+    items = _stream_items(handle, INGREDIENTS, IngredientImportError)
+    for index, ingredient in enumerate(items, start=1):
+        yield _parse_ingredient(ingredient, index)
+
+
+def iter_recipe_json(handle: TextIO) -> Iterator[dict[str, Any]]:
+    items = _stream_items(handle, RECIPES, RecipeImportError)
+    for index, recipe in enumerate(items, start=1):
+        yield _parse_recipe(recipe, index)
+
+
+def is_ndjson(file_path: str | Path) -> bool:
+    return Path(file_path).suffix.lower() in NDJSON_SUFFIXES
+
+
+def _ndjson_lines(lines: Iterable[str]) -> Iterator[tuple[int, str]]:
+    # One record per line; blank lines are ignored, so shards can be
+    # concatenated or appended to freely. Records are numbered by line.
+    for line_number, line in enumerate(lines, start=1):
+        if line.strip():
+            yield line_number, line
+
+
+def _load_ndjson_line(line: str, line_number: int, error: type[ValueError]) -> Any:
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as exc:
+        raise error(f"La ligne {line_number} n'est pas un JSON valide.") from exc
+
+
+def _as_is(item: Any, index: int) -> Any:
+    return item
+
+
+def _stream_items(
+    handle: TextIO, key: str, error: type[ValueError]
+) -> Iterator[Any]:
+    try:
+        yield from iter_array_items(handle, key)
+    except JSONStreamError as exc:
+        raise error(_stream_error_message(exc, key)) from exc
+
+
+_RECORD_PARSERS: dict[
+    str, tuple[type[ValueError], Callable[[Any, int], dict[str, Any]]]
+] = {
+    INGREDIENTS: (IngredientImportError, _parse_ingredient),
+    RECIPES: (RecipeImportError, _parse_recipe),
+}
+
+
+def import_ingredients_from_json(
+    file_path: str | Path,
+    db_path: str | None = None,
+    connection=None,
+    profile: str | None = None,
+    stream: bool = False,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    force: bool = False,
+    checkpoint_every: int | None = None,
+) -> ImportResult:
+    _check_checkpoints(connection, checkpoint_every)
+    with _open_records(
+        file_path, stream, INGREDIENTS
+    ) as ingredients, connection_scope(db_path, connection, profile) as connection:
+        return _import_records(
+            connection,
+            file_path,
+            ingredients,
+            _write_ingredient_records,
+            batch_size,
+            force,
+            checkpoint_every,
+        )
+
+
+def import_recipes_from_json(
+    file_path: str | Path,
+    db_path: str | None = None,
+    connection=None,
+    profile: str | None = None,
+    stream: bool = False,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    force: bool = False,
+    checkpoint_every: int | None = None,
+    fuzzy: bool = False,
+    auto_resolve: bool = False,
+) -> ImportResult:
+    _check_checkpoints(connection, checkpoint_every)
+    with _open_records(
+        file_path, stream, RECIPES
+    ) as recipes, connection_scope(db_path, connection, profile) as connection:
+        return _import_records(
+            connection,
+            file_path,
+            recipes,
+            partial(_write_recipe_records, fuzzy=fuzzy, auto_resolve=auto_resolve),
+            batch_size,
+            force,
+            checkpoint_every,
+        )
+
+
+def _check_checkpoints(connection, checkpoint_every: int | None) -> None:
+    # Checkpoints commit as they go, which a caller-owned transaction rules
+    # out.
+    if checkpoint_every is not None and connection is not None:
+        raise ValueError(
+            "checkpoint_every valide des transactions et ne peut pas "
+            "s'utiliser avec une connexion fournie."
+        )
+
+
+def _import_records(
+    connection,
+    file_path: str | Path,
+    records: Iterable[dict[str, Any]],
+    write: Callable[..., tuple[int, int]],
+    batch_size: int,
+    force: bool,
+    checkpoint_every: int | None,
+) -> ImportResult:
+    # Without checkpoints the file is imported in the connection's
+    # transaction, committed or rolled back by whoever owns it. With them,
+    # every checkpoint_every records are committed together with the
+    # offset reached, keyed by the file's content hash, so a failed run
+    # resumes after the last checkpoint instead of starting over.
+    content_hash = None
+    resumed = 0
+    on_batch = None
+    if checkpoint_every is not None:
+        if checkpoint_every < 1:
+            raise ValueError("checkpoint_every doit être positif.")
+        content_hash = _file_hash(Path(file_path))
+        resumed = _load_checkpoint(connection, content_hash)
+        records = islice(records, resumed, None)
+        batch_size = min(batch_size, checkpoint_every)
+        committed = resumed
+
+        def on_batch(processed: int) -> None:
+            nonlocal committed
+            if resumed + processed - committed >= checkpoint_every:
+                committed = resumed + processed
+                _save_checkpoint(connection, content_hash, file_path, committed)
+                connection.commit()
+
+    written, skipped = write(connection, records, batch_size, force, on_batch)
+    if content_hash is not None:
+        _clear_checkpoints(connection, content_hash, file_path)
+    return ImportResult(
+        records=written, skipped_records=skipped, resumed_records=resumed
+    )
+
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while chunk := handle.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_checkpoint(connection, content_hash: str) -> int:
+    row = connection.execute(
+        "SELECT records_committed FROM import_checkpoint WHERE content_hash = ?;",
+        (content_hash,),
+    ).fetchone()
+    return row["records_committed"] if row else 0
+
+
+def _save_checkpoint(
+    connection, content_hash: str, file_path: str | Path, records_committed: int
+) -> None:
+    connection.execute(
+        """
+        INSERT INTO import_checkpoint (content_hash, path, records_committed)
+        VALUES (?, ?, ?)
+        ON CONFLICT(content_hash) DO UPDATE SET
+            path = excluded.path,
+            records_committed = excluded.records_committed,
+            updated_at = CURRENT_TIMESTAMP;
+        """,
+        (content_hash, _manifest_key(Path(file_path)), records_committed),
+    )
+
+
+def _clear_checkpoints(
+    connection, content_hash: str, file_path: str | Path
+) -> None:
+    # Checkpoints left by earlier versions of the same file can never be
+    # resumed once it has been imported in full.
+    connection.execute(
+        "DELETE FROM import_checkpoint WHERE content_hash = ? OR path = ?;",
+        (content_hash, _manifest_key(Path(file_path))),
+    )
+
+
+def validate_ingredient_json(
+    file_path: str | Path,
+    db_path: str | None = None,
+    connection=None,
+    stream: bool = False,
+    max_errors: int = DEFAULT_MAX_ERRORS,
+) -> ValidationReport:
+    def check(ingredient: dict[str, Any], index: int) -> list[ImportIssue]:
+        issues = [
+            ImportIssue(index, field, _unknown_message(ingredient[field], label))
+            for field, label, lookup in (
+                ("aisle", "rayon", aisle_lookup),
+                ("unit", "unité", unit_lookup),
+            )
+            if lookup.get(ingredient[field]) is None
+        ]
+        issues.extend(
+            ImportIssue(
+                index,
+                f"seasons[{season_index}]",
+                _unknown_message(season, "saison"),
+            )
+            for season_index, season in enumerate(ingredient["seasons"], start=1)
+            if season_lookup.get(season) is None
+        )
+        return issues
+
+    try:
+        with _open_items(
+            file_path, stream, INGREDIENTS, IngredientImportError
+        ) as (items, decode), connection_scope(db_path, connection) as connection:
+            aisle_lookup = _Lookup(connection, "aisle", "rayon")
+            unit_lookup = _Lookup(connection, "unit", "unité")
+            season_lookup = _Lookup(connection, "season", "saison")
+            return _collect_issues(
+                items, decode, _parse_ingredient, check, max_errors
             )
-        cleaned_difficulty = difficulty.strip()
-        normalized_difficulty: str | None = None
-        if cleaned_difficulty:
+    except IngredientImportError as exc:
+        return ValidationReport(0, [ImportIssue(None, None, str(exc))])
+
+
+def validate_recipe_json(
+    file_path: str | Path,
+    db_path: str | None = None,
+    connection=None,
+    stream: bool = False,
+    max_errors: int = DEFAULT_MAX_ERRORS,
+    fuzzy: bool = False,
+    auto_resolve: bool = False,
+) -> ValidationReport:
+    def check(recipe: dict[str, Any], index: int) -> list[ImportIssue]:
+        issues = []
+        for line_index, ingredient in enumerate(recipe["ingredients"], start=1):
             try:
-                normalized_difficulty = normalize_difficulty(cleaned_difficulty)
-            except ValueError as exc:
-                raise RecipeImportError(
-                    f"La recette #{index} contient une difficulté invalide."
-                ) from exc
-
-        servings = recipe.get("servings", 1)
-        if servings is None:
-            servings = 1
-        try:
-            normalized_servings = normalize_servings(servings)
-        except ValueError as exc:
-            raise RecipeImportError(
-                f"La recette #{index} contient un nombre de personnes invalide."
-            ) from exc
+                ingredient_lookup.resolve(ingredient["name"])
+            except IngredientImportError as exc:
+                issues.append(
+                    ImportIssue(index, f"ingredients[{line_index}].name", str(exc))
+                )
+        return issues
 
-        ingredients = recipe.get("ingredients", [])
-        if ingredients is None:
-            ingredients = []
-        if not isinstance(ingredients, list):
-            raise RecipeImportError(
-                f"La recette #{index} doit contenir une liste 'ingredients'."
+    try:
+        with _open_items(
+            file_path, stream, RECIPES, RecipeImportError
+        ) as (items, decode), connection_scope(db_path, connection) as connection:
+            ingredient_lookup = _Lookup(
+                connection,
+                "ingredient",
+                "ingrédient",
+                aliases=True,
+                fuzzy=fuzzy,
+                auto_resolve=auto_resolve,
             )
-        parsed_ingredients: list[dict[str, Any]] = []
-        for ingredient_index, ingredient in enumerate(ingredients, start=1):
-            if not isinstance(ingredient, dict):
-                raise RecipeImportError(
-                    f"L'ingrédient #{ingredient_index} de la recette #{index} est invalide."
+            return _collect_issues(items, decode, _parse_recipe, check, max_errors)
+    except RecipeImportError as exc:
+        return ValidationReport(0, [ImportIssue(None, None, str(exc))])
+
+
+def _collect_issues(
+    items: Iterable[tuple[int, Any]],
+    decode: Callable[[Any, int], Any],
+    parse: Callable[[Any, int], dict[str, Any]],
+    check: Callable[[dict[str, Any], int], list[ImportIssue]],
+    max_errors: int,
+) -> ValidationReport:
+    # Each record reports its first structural error, or else every unknown
+    # reference. Nothing is written. Scanning stops once the cap is passed.
+    # A malformed NDJSON line is one bad record: the lines after it are
+    # still checked.
+    if max_errors < 1:
+        raise ValueError("max_errors doit être positif.")
+    issues: list[ImportIssue] = []
+    records = 0
+    iterator = iter(items)
+    while True:
+        try:
+            index, item = next(iterator)
+        except StopIteration:
+            break
+        except (IngredientImportError, RecipeImportError) as exc:
+            # A streamed document that breaks mid-file cannot be read further.
+            issues.append(ImportIssue(None, None, str(exc)))
+            break
+        records += 1
+        try:
+            record = parse(decode(item, index), index)
+        except (IngredientImportError, RecipeImportError) as exc:
+            issues.append(ImportIssue(index, exc.field, str(exc)))
+        else:
+            issues.extend(check(record, index))
+        if len(issues) > max_errors:
+            return ValidationReport(records, issues[:max_errors], truncated=True)
+    return ValidationReport(records, issues)
+
+
+@contextmanager
+def _open_items(
+    file_path: str | Path, stream: bool, key: str, error: type[ValueError]
+) -> Iterator[tuple[Iterable[tuple[int, Any]], Callable[[Any, int], Any]]]:
+    # Yields (index, item) pairs and the function turning an item into the
+    # value the record parsers take. NDJSON lines are only decoded then, so
+    # a malformed line fails on its own.
+    if is_ndjson(file_path):
+        with open(file_path, encoding="utf-8") as handle:
+            yield _ndjson_lines(handle), partial(_load_ndjson_line, error=error)
+        return
+    if not stream:
+        payload = Path(file_path).read_text(encoding="utf-8")
+        try:
+            data = json.loads(payload)
+        except json.JSONDecodeError as exc:
+            raise error("Le fichier JSON est invalide.") from exc
+        yield enumerate(_document_items(data, key, error), start=1), _as_is
+        return
+    with open(file_path, encoding="utf-8") as handle:
+        yield enumerate(_stream_items(handle, key, error), start=1), _as_is
+
+
+def import_directory(
+    directory: str | Path,
+    db_path: str | None = None,
+    connection=None,
+    profile: str | None = None,
+    workers: int | None = None,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    force: bool = False,
+) -> DirectoryImportReport:
+    started = time.perf_counter()
+    paths = sorted(
+        path
+        for path in Path(directory).rglob("*")
+        if path.is_file() and (path.suffix.lower() == ".json" or is_ndjson(path))
+    )
+
+    results: list[FileImportResult] = []
+    with connection_scope(db_path, connection, profile) as connection:
+        manifest = {} if force else _load_manifest(connection)
+        stats = {path: path.stat() for path in paths}
+        to_parse: list[tuple[Path, str | None]] = []
+        for path in paths:
+            entry = manifest.get(_manifest_key(path))
+            if (
+                entry is not None
+                and entry["size"] == stats[path].st_size
+                and entry["mtime_ns"] == stats[path].st_mtime_ns
+            ):
+                results.append(_unchanged_file(path, entry["kind"], 0.0))
+            else:
+                to_parse.append(
+                    (path, entry["content_hash"] if entry is not None else None)
+                )
+
+        parsed = _parse_files(to_parse, workers)
+        # Recipes reference ingredients by name, so every ingredient file is
+        # written before the first recipe file.
+        parsed.sort(key=lambda item: item.kind != INGREDIENTS)
+        manifest_rows = []
+        for item in parsed:
+            kind = item.kind or manifest[_manifest_key(item.path)]["kind"]
+            manifest_rows.append(
+                (
+                    _manifest_key(item.path),
+                    kind,
+                    stats[item.path].st_size,
+                    stats[item.path].st_mtime_ns,
+                    item.content_hash,
                 )
-            ingredient_name = _required_string(
-                ingredient, "name", ingredient_index
             )
-            quantity = ingredient.get("quantity")
-            if not isinstance(quantity, (int, float)):
-                raise RecipeImportError(
-                    f"La quantité de l'ingrédient #{ingredient_index} de la recette #{index} est invalide."
+            if item.records is None:
+                results.append(
+                    _unchanged_file(item.path, kind, item.parse_seconds)
                 )
-            if quantity <= 0:
-                raise RecipeImportError(
-                    f"La quantité de l'ingrédient #{ingredient_index} de la recette #{index} doit être positive."
+                continue
+            write_started = time.perf_counter()
+            with _file_context(item.path):
+                if kind == INGREDIENTS:
+                    written, skipped = _write_ingredient_records(
+                        connection, item.records, batch_size, force
+                    )
+                else:
+                    written, skipped = _write_recipe_records(
+                        connection, item.records, batch_size, force
+                    )
+            results.append(
+                FileImportResult(
+                    path=item.path,
+                    kind=kind,
+                    records=written,
+                    parse_seconds=item.parse_seconds,
+                    write_seconds=time.perf_counter() - write_started,
+                    skipped_records=skipped,
                 )
-            parsed_ingredients.append(
-                {"name": ingredient_name, "quantity": float(quantity)}
             )
+        _save_manifest(connection, manifest_rows)
 
-        parsed.append(
-            {
-                "name": name,
-                "instructions": instructions.strip(),
-                "time_label": cleaned_time_label or None,
-                "difficulty": normalized_difficulty,
-                "servings": normalized_servings,
-                "ingredients": parsed_ingredients,
-            }
+    results.sort(key=lambda result: (result.kind != INGREDIENTS, result.path))
+    return DirectoryImportReport(
+        files=results, total_seconds=time.perf_counter() - started
+    )
+
+
+def _unchanged_file(path: Path, kind: str, parse_seconds: float) -> FileImportResult:
+    return FileImportResult(
+        path=path,
+        kind=kind,
+        records=0,
+        parse_seconds=parse_seconds,
+        write_seconds=0.0,
+        unchanged=True,
+    )
+
+
+def _parse_files(
+    paths: list[tuple[Path, str | None]], workers: int | None
+) -> list[_ParsedFile]:
+    if workers == 1 or len(paths) < 2:
+        return [_parse_file(path, known_hash) for path, known_hash in paths]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(
+            executor.map(
+                _parse_file,
+                [path for path, _ in paths],
+                [known_hash for _, known_hash in paths],
+            )
         )
 
-    return parsed
+
+def _parse_file(path: Path, known_hash: str | None = None) -> _ParsedFile:
+    # Runs in a worker process: only picklable values cross the boundary.
+    started = time.perf_counter()
+    with _file_context(path):
+        content = path.read_bytes()
+        content_hash = hashlib.sha256(content).hexdigest()
+        if content_hash == known_hash:
+            return _ParsedFile(
+                path, None, None, time.perf_counter() - started, content_hash
+            )
+        if is_ndjson(path):
+            kind, records = _parse_ndjson(content.decode("utf-8"))
+            return _ParsedFile(
+                path, kind, records, time.perf_counter() - started, content_hash
+            )
+        try:
+            data = json.loads(content.decode("utf-8"))
+        except json.JSONDecodeError as exc:
+            raise IngredientImportError("Le fichier JSON est invalide.") from exc
+        if isinstance(data, dict) and RECIPES in data:
+            kind, records = RECIPES, _parse_recipe_document(data)
+        else:
+            kind, records = INGREDIENTS, _parse_ingredient_document(data)
+    return _ParsedFile(
+        path, kind, records, time.perf_counter() - started, content_hash
+    )
 
 
-def import_ingredients_from_json(
-    file_path: str | Path, db_path: str | None = None
-) -> int:
-    payload = Path(file_path).read_text(encoding="utf-8")
-    ingredients = parse_ingredient_json(payload)
-
-    with get_connection(db_path) as connection:
-        aisle_lookup = _load_lookup(connection, "aisle")
-        unit_lookup = _load_lookup(connection, "unit")
-        season_lookup = _load_lookup(connection, "season")
-        imported = 0
-
-        for ingredient in ingredients:
-            name = ingredient["name"]
-            aisle_id = _resolve_lookup(aisle_lookup, ingredient["aisle"], "rayon")
-            unit_id = _resolve_lookup(unit_lookup, ingredient["unit"], "unité")
-            season_ids = [
-                _resolve_lookup(season_lookup, season_name, "saison")
-                for season_name in ingredient["seasons"]
-            ]
-
-            ingredient_id = _upsert_ingredient(
-                connection, name, aisle_id, unit_id
+def _parse_ndjson(payload: str) -> tuple[str, list[dict[str, Any]]]:
+    # NDJSON has no root key, so the kind comes from the first record:
+    # ingredient records carry an aisle and a unit, recipes do not.
+    items = [
+        (line_number, _load_ndjson_line(line, line_number, IngredientImportError))
+        for line_number, line in _ndjson_lines(payload.splitlines())
+    ]
+    first = items[0][1] if items else None
+    if isinstance(first, dict) and ("aisle" in first or "unit" in first):
+        kind = INGREDIENTS
+    elif items:
+        kind = RECIPES
+    else:
+        kind = INGREDIENTS
+    _, parse = _RECORD_PARSERS[kind]
+    return kind, [parse(item, line_number) for line_number, item in items]
+
+
+@contextmanager
+def _file_context(path: Path) -> Iterator[None]:
+    try:
+        yield
+    except (IngredientImportError, RecipeImportError) as exc:
+        raise type(exc)(f"{path.name}: {exc}", field=exc.field) from exc
+
+
+def _manifest_key(path: Path) -> str:
+    return str(path.resolve())
+
+
+def _load_manifest(connection) -> dict[str, Any]:
+    rows = connection.execute(
+        "SELECT path, kind, size, mtime_ns, content_hash FROM import_manifest;"
+    ).fetchall()
+    return {row["path"]: row for row in rows}
+
+
+def _save_manifest(connection, rows: list[tuple[str, str, int, int, str]]) -> None:
+    connection.executemany(
+        """
+        INSERT INTO import_manifest (path, kind, size, mtime_ns, content_hash)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(path) DO UPDATE SET
+            kind = excluded.kind,
+            size = excluded.size,
+            mtime_ns = excluded.mtime_ns,
+            content_hash = excluded.content_hash,
+            imported_at = CURRENT_TIMESTAMP;
+        """,
+        rows,
+    )
+
+
+def _write_ingredient_records(
+    connection,
+    ingredients: Iterable[dict[str, Any]],
+    batch_size: int,
+    force: bool = False,
+    on_batch: Callable[[int], None] | None = None,
+) -> tuple[int, int]:
+    aisle_lookup = _Lookup(connection, "aisle", "rayon")
+    unit_lookup = _Lookup(connection, "unit", "unité")
+    season_lookup = _Lookup(connection, "season", "saison")
+    written = skipped = 0
+    for batch in _batched(ingredients, batch_size):
+        # Later records win when a name repeats, as with one statement per
+        # record. "Bœuf" and "boeuf" are the same name.
+        latest = {name_key(ingredient["name"]): ingredient for ingredient in batch}
+        changed = _changed_records(connection, "ingredient", latest.values(), force)
+        aisle_lookup.prefetch(ingredient["aisle"] for ingredient, _ in changed)
+        unit_lookup.prefetch(ingredient["unit"] for ingredient, _ in changed)
+        season_lookup.prefetch(
+            season for ingredient, _ in changed for season in ingredient["seasons"]
+        )
+        rows = [
+            (
+                ingredient["name"],
+                aisle_lookup.resolve(ingredient["aisle"]),
+                unit_lookup.resolve(ingredient["unit"]),
+                [
+                    season_lookup.resolve(season_name)
+                    for season_name in ingredient["seasons"]
+                ],
+                record_hash,
             )
-            _replace_seasons(connection, ingredient_id, season_ids)
-            imported += 1
+            for ingredient, record_hash in changed
+        ]
+        ingredient_ids = _write_ingredients(connection, rows)
+        _replace_aliases(
+            connection,
+            {
+                ingredient_ids[name_key(ingredient["name"])]: ingredient["aliases"]
+                for ingredient, _ in changed
+                if "aliases" in ingredient
+            },
+        )
+        written += len(rows)
+        skipped += len(batch) - len(rows)
+        if on_batch is not None:
+            on_batch(written + skipped)
+    return written, skipped
 
-        connection.commit()
 
-    return imported
+def _write_recipe_records(
+    connection,
+    recipes: Iterable[dict[str, Any]],
+    batch_size: int,
+    force: bool = False,
+    on_batch: Callable[[int], None] | None = None,
+    fuzzy: bool = False,
+    auto_resolve: bool = False,
+) -> tuple[int, int]:
+    ingredient_lookup = _Lookup(
+        connection,
+        "ingredient",
+        "ingrédient",
+        aliases=True,
+        fuzzy=fuzzy,
+        auto_resolve=auto_resolve,
+    )
+    written = skipped = 0
+    for batch in _batched(recipes, batch_size):
+        changed = _changed_records(connection, "recipe", batch, force)
+        ingredient_lookup.prefetch(
+            line["name"] for recipe, _ in changed for line in recipe["ingredients"]
+        )
+        _write_recipes(connection, changed, ingredient_lookup)
+        written += len(changed)
+        skipped += len(batch) - len(changed)
+        if on_batch is not None:
+            on_batch(written + skipped)
+    return written, skipped
 
 
-def import_recipes_from_json(
-    file_path: str | Path, db_path: str | None = None
-) -> int:
-    payload = Path(file_path).read_text(encoding="utf-8")
-    recipes = parse_recipe_json(payload)
-
-    with get_connection(db_path) as connection:
-        ingredient_lookup = _load_lookup(connection, "ingredient")
-        imported = 0
-
-        for recipe in recipes:
-            normalized_time_label, total_minutes = normalize_time_label(
-                recipe.get("time_label")
+def _changed_records(
+    connection, table: str, records: Iterable[dict[str, Any]], force: bool
+) -> list[tuple[dict[str, Any], str]]:
+    # A record is unchanged when a row with the same name key still carries
+    # the hash it was imported with. Edits made through the services clear it.
+    hashed = [(record, _record_hash(record)) for record in records]
+    if force:
+        return hashed
+    stored: set[tuple[str, str]] = set()
+    keys = list({name_key(record["name"]) for record, _ in hashed})
+    for chunk in _chunks(keys, _MAX_VARIABLES):
+        placeholders = ", ".join("?" for _ in chunk)
+        stored.update(
+            (row["name_key"], row["import_hash"])
+            for row in connection.execute(
+                f"""
+                SELECT name_key, import_hash
+                FROM {table}
+                WHERE name_key IN ({placeholders}) AND import_hash IS NOT NULL;
+                """,
+                chunk,
             )
-            normalized_difficulty = normalize_difficulty(
-                recipe.get("difficulty")
+        )
+    return [
+        (record, record_hash)
+        for record, record_hash in hashed
+        if (name_key(record["name"]), record_hash) not in stored
+    ]
+
+
+def _record_hash(record: dict[str, Any]) -> str:
+    payload = json.dumps(
+        record, ensure_ascii=False, sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _write_recipes(
+    connection,
+    recipes: list[tuple[dict[str, Any], str]],
+    ingredient_lookup: _Lookup,
+) -> None:
+    # Recipes are matched on their JSON id, or else on their name key, and
+    # updated in place. Later records win when two target the same recipe.
+    matches = _match_recipes(connection, [recipe for recipe, _ in recipes])
+    updates: dict[int, tuple[dict[str, Any], str]] = {}
+    inserts: dict[tuple[str, str], tuple[dict[str, Any], str]] = {}
+    for recipe, record_hash in recipes:
+        recipe_id = matches.get(_recipe_match_key(recipe))
+        if recipe_id is not None:
+            updates[recipe_id] = (recipe, record_hash)
+        else:
+            inserts[_recipe_match_key(recipe)] = (recipe, record_hash)
+
+    lines: dict[int, dict[int, float]] = {}
+    if updates:
+        connection.executemany(
+            """
+            UPDATE recipe
+            SET name = ?,
+                total_minutes = ?,
+                time_label = ?,
+                difficulty = ?,
+                servings = ?,
+                notes = ?,
+                name_key = ?,
+                external_id = COALESCE(?, external_id),
+                import_hash = ?
+            WHERE id = ?;
+            """,
+            [
+                (*_recipe_values(recipe, record_hash), recipe_id)
+                for recipe_id, (recipe, record_hash) in updates.items()
+            ],
+        )
+        for recipe_id, (recipe, _) in updates.items():
+            lines[recipe_id] = _recipe_lines(recipe, ingredient_lookup)
+    for recipe, record_hash in inserts.values():
+        cursor = connection.execute(
+            """
+            INSERT INTO recipe (
+                name,
+                total_minutes,
+                time_label,
+                difficulty,
+                servings,
+                notes,
+                name_key,
+                external_id,
+                import_hash
             )
-            cursor = connection.execute(
-                """
-                INSERT INTO recipe (
-                    name,
-                    total_minutes,
-                    time_label,
-                    difficulty,
-                    servings,
-                    notes
-                )
-                VALUES (?, ?, ?, ?, ?, ?);
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
+            """,
+            _recipe_values(recipe, record_hash),
+        )
+        lines[cursor.lastrowid] = _recipe_lines(recipe, ingredient_lookup)
+    _sync_recipe_lines(connection, lines, set(updates))
+    seasonality.refresh_recipes(connection, lines)
+
+
+def _match_recipes(
+    connection, recipes: list[dict[str, Any]]
+) -> dict[tuple[str, str], int]:
+    external_ids = list(
+        {recipe["external_id"] for recipe in recipes if recipe["external_id"]}
+    )
+    keys = list({name_key(recipe["name"]) for recipe in recipes})
+    by_external: dict[str, int] = {}
+    for chunk in _chunks(external_ids, _MAX_VARIABLES):
+        placeholders = ", ".join("?" for _ in chunk)
+        by_external.update(
+            (row["external_id"], row["id"])
+            for row in connection.execute(
+                f"""
+                SELECT id, external_id
+                FROM recipe
+                WHERE external_id IN ({placeholders});
                 """,
-                (
-                    recipe["name"],
-                    total_minutes,
-                    normalized_time_label,
-                    normalized_difficulty,
-                    recipe.get("servings", 1),
-                    recipe["instructions"] or None,
-                ),
+                chunk,
             )
-            recipe_id = cursor.lastrowid
-            ingredients_to_insert = []
-            for ingredient in recipe["ingredients"]:
-                ingredient_id = _resolve_lookup(
-                    ingredient_lookup, ingredient["name"], "ingrédient"
-                )
-                ingredients_to_insert.append(
-                    (recipe_id, ingredient_id, ingredient["quantity"])
-                )
-            if ingredients_to_insert:
-                connection.executemany(
-                    """
-                    INSERT INTO recipe_ingredient (recipe_id, ingredient_id, quantity)
-                    VALUES (?, ?, ?);
-                    """,
-                    ingredients_to_insert,
-                )
-            imported += 1
+        )
+    by_key: dict[str, int] = {}
+    unlinked_by_key: dict[str, int] = {}
+    for chunk in _chunks(keys, _MAX_VARIABLES):
+        placeholders = ", ".join("?" for _ in chunk)
+        for row in connection.execute(
+            f"""
+            SELECT id, name_key, external_id
+            FROM recipe
+            WHERE name_key IN ({placeholders})
+            ORDER BY id;
+            """,
+            chunk,
+        ):
+            by_key.setdefault(row["name_key"], row["id"])
+            if row["external_id"] is None:
+                unlinked_by_key.setdefault(row["name_key"], row["id"])
+
+    matches: dict[tuple[str, str], int] = {}
+    for recipe in recipes:
+        key = _recipe_match_key(recipe)
+        if key in matches:
+            continue
+        if recipe["external_id"]:
+            # A recipe imported without an id is adopted by the first record
+            # that gives it one; other ids sharing its name become new
+            # recipes.
+            recipe_id = by_external.get(recipe["external_id"])
+            if recipe_id is None:
+                recipe_id = unlinked_by_key.pop(name_key(recipe["name"]), None)
+        else:
+            recipe_id = by_key.get(key[1])
+        if recipe_id is not None:
+            matches[key] = recipe_id
+    return matches
+
+
+def _recipe_match_key(recipe: dict[str, Any]) -> tuple[str, str]:
+    if recipe["external_id"]:
+        return "id", recipe["external_id"]
+    return "name", name_key(recipe["name"])
+
+
+def _recipe_values(recipe: dict[str, Any], record_hash: str) -> tuple:
+    normalized_time_label, total_minutes = normalize_time_label(
+        recipe.get("time_label")
+    )
+    return (
+        recipe["name"],
+        total_minutes,
+        normalized_time_label,
+        normalize_difficulty(recipe.get("difficulty")),
+        recipe.get("servings", 1),
+        recipe["instructions"] or None,
+        name_key(recipe["name"]),
+        recipe["external_id"],
+        record_hash,
+    )
+
+
+def _recipe_lines(
+    recipe: dict[str, Any], ingredient_lookup: _Lookup
+) -> dict[int, float]:
+    # An ingredient listed twice keeps its total, as the shopping list would.
+    lines: dict[int, float] = {}
+    for ingredient in recipe["ingredients"]:
+        ingredient_id = ingredient_lookup.resolve(ingredient["name"])
+        lines[ingredient_id] = lines.get(ingredient_id, 0) + ingredient["quantity"]
+    return lines
+
 
-        connection.commit()
+def _sync_recipe_lines(
+    connection, lines: dict[int, dict[int, float]], existing_ids: set[int]
+) -> None:
+    to_delete: list[tuple[int]] = []
+    to_update: list[tuple[float, int]] = []
+    to_insert: list[tuple[int, int, float]] = []
+    kept: set[tuple[int, int]] = set()
+    for chunk in _chunks(sorted(existing_ids), _MAX_VARIABLES):
+        placeholders = ", ".join("?" for _ in chunk)
+        for row in connection.execute(
+            f"""
+            SELECT id, recipe_id, ingredient_id, quantity
+            FROM recipe_ingredient
+            WHERE recipe_id IN ({placeholders})
+            ORDER BY recipe_id, id;
+            """,
+            chunk,
+        ):
+            wanted = lines[row["recipe_id"]].get(row["ingredient_id"])
+            line_key = (row["recipe_id"], row["ingredient_id"])
+            if wanted is None or line_key in kept:
+                to_delete.append((row["id"],))
+                continue
+            kept.add(line_key)
+            if row["quantity"] != wanted:
+                to_update.append((wanted, row["id"]))
+    for recipe_id, recipe_lines in lines.items():
+        to_insert.extend(
+            (recipe_id, ingredient_id, quantity)
+            for ingredient_id, quantity in recipe_lines.items()
+            if (recipe_id, ingredient_id) not in kept
+        )
+
+    if to_delete:
+        connection.executemany(
+            "DELETE FROM recipe_ingredient WHERE id = ?;", to_delete
+        )
+    if to_update:
+        connection.executemany(
+            "UPDATE recipe_ingredient SET quantity = ? WHERE id = ?;", to_update
+        )
+    if to_insert:
+        connection.executemany(
+            """
+            INSERT INTO recipe_ingredient (recipe_id, ingredient_id, quantity)
+            VALUES (?, ?, ?);
+            """,
+            to_insert,
+        )
 
-    return imported
 
+@contextmanager
+def _open_records(
+    file_path: str | Path, stream: bool, kind: str
+) -> Iterator[Iterable[dict[str, Any]]]:
+    # The default mode validates the whole file before touching the database.
+    # Streaming mode keeps memory flat: records are parsed and written batch
+    # by batch, and a late error rolls the import back.
+    error, parse = _RECORD_PARSERS[kind]
+    with _open_items(file_path, stream, kind, error) as (items, decode):
+        records = (parse(decode(item, index), index) for index, item in items)
+        yield records if stream else list(records)
 
-def _required_string(ingredient: dict[str, Any], key: str, index: int) -> str:
+
+def _batched(
+    records: Iterable[dict[str, Any]], size: int
+) -> Iterator[list[dict[str, Any]]]:
+    if size < 1:
+        raise ValueError("batch_size doit être positif.")
+    iterator = iter(records)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _stream_error_message(error: JSONStreamError, key: str) -> str:
+    if error.reason == NOT_AN_OBJECT:
+        return "Le JSON doit contenir un objet racine."
+    if error.reason == MISSING_ARRAY:
+        return f"Le JSON doit contenir une liste '{key}'."
+    return "Le fichier JSON est invalide."
+
+
+def _required_string(
+    ingredient: dict[str, Any], key: str, index: int, field: str | None = None
+) -> str:
     value = ingredient.get(key)
     if not isinstance(value, str) or not value.strip():
         raise IngredientImportError(
-            f"L'ingrédient #{index} doit définir '{key}'."
+            f"L'ingrédient #{index} doit définir '{key}'.", field=field or key
         )
     return value.strip()
 
 
-def _load_lookup(connection, table: str) -> dict[str, int]:
-    rows = connection.execute(f"SELECT id, name FROM {table};").fetchall()
-    return {_normalize(row["name"]): row["id"] for row in rows}
+class _Lookup:
+    # Resolves names through the table's unique name_key index, fetching only
+    # the keys a batch needs and remembering them, misses included, for the
+    # rest of the import. With aliases, ingredient_alias is searched in the
+    # same statement and an ingredient name wins over an identical alias.
+    # With fuzzy, an unknown name is matched against a trigram index of every
+    # name, built once on the first miss.
+    def __init__(
+        self,
+        connection,
+        table: str,
+        label: str,
+        aliases: bool = False,
+        fuzzy: bool = False,
+        auto_resolve: bool = False,
+    ) -> None:
+        self.connection = connection
+        self.table = table
+        self.label = label
+        self.aliases = aliases
+        self.fuzzy = fuzzy
+        self.auto_resolve = auto_resolve
+        self.ids: dict[str, int | None] = {}
+        self.index: TrigramIndex | None = None
 
+    def prefetch(self, values: Iterable[str]) -> None:
+        missing = list({name_key(value) for value in values} - self.ids.keys())
+        size = _MAX_VARIABLES // 2 if self.aliases else _MAX_VARIABLES
+        for chunk in _chunks(missing, size):
+            self.ids.update(dict.fromkeys(chunk))
+            for row in self._rows(chunk):
+                if row["via_alias"] and self.ids[row["name_key"]] is not None:
+                    continue
+                self.ids[row["name_key"]] = row["id"]
 
-def _resolve_lookup(lookup: dict[str, int], value: str, label: str) -> int:
-    key = _normalize(value)
-    if key not in lookup:
+    def _rows(self, keys: list[str]):
+        placeholders = ", ".join("?" for _ in keys)
+        query = f"""
+            SELECT id, name_key, 0 AS via_alias
+            FROM {self.table}
+            WHERE name_key IN ({placeholders})
+        """
+        if not self.aliases:
+            return self.connection.execute(query, keys)
+        return self.connection.execute(
+            f"""
+            {query}
+            UNION ALL
+            SELECT ingredient_id, name_key, 1
+            FROM ingredient_alias
+            WHERE name_key IN ({placeholders});
+            """,
+            keys + keys,
+        )
+
+    def get(self, value: str) -> int | None:
+        key = name_key(value)
+        if key not in self.ids:
+            self.prefetch([value])
+        return self.ids[key]
+
+    def resolve(self, value: str) -> int:
+        row_id = self.get(value)
+        if row_id is not None:
+            return row_id
+        if not self.fuzzy:
+            raise IngredientImportError(_unknown_message(value, self.label))
+        matches = self._fuzzy_index().search(value, FUZZY_THRESHOLD)
+        if self.auto_resolve:
+            match = unambiguous_match(matches, FUZZY_AUTO_SCORE, FUZZY_AUTO_MARGIN)
+            if match is not None:
+                self.ids[name_key(value)] = match.id
+                return match.id
         raise IngredientImportError(
-            f"{label.capitalize()} inconnue: '{value}'."
+            _unknown_message(value, self.label, [match.name for match in matches])
         )
-    return lookup[key]
 
+    def _fuzzy_index(self) -> TrigramIndex:
+        if self.index is None:
+            query = f"SELECT id, name FROM {self.table}"
+            if self.aliases:
+                query += " UNION ALL SELECT ingredient_id, name FROM ingredient_alias"
+            self.index = TrigramIndex(
+                (row["id"], row["name"]) for row in self.connection.execute(query)
+            )
+        return self.index
 
-def _normalize(value: str) -> str:
-    return value.strip().lower()
 
+def _unknown_message(
+    value: str, label: str, suggestions: Iterable[str] = ()
+) -> str:
+    message = f"{label.capitalize()} inconnue: '{value}'."
+    suggestions = list(suggestions)
+    if suggestions:
+        message += f" Suggestions: {', '.join(suggestions)}."
+    return message
 
-def _upsert_ingredient(connection, name: str, aisle_id: int, unit_id: int) -> int:
-    existing = connection.execute(
-        "SELECT id FROM ingredient WHERE name = ?;",
-        (name,),
-    ).fetchone()
-    if existing:
-        ingredient_id = existing["id"]
-        connection.execute(
-            """
-            UPDATE ingredient
-            SET default_aisle_id = ?, unit_id = ?
-            WHERE id = ?;
+
+def _write_ingredients(
+    connection, rows: list[tuple[str, int, int, list[int], str | None]]
+) -> dict[str, int]:
+    stored = _upsert_ingredients(
+        connection,
+        [
+            (name, name_key(name), aisle_id, unit_id, record_hash)
+            for name, aisle_id, unit_id, _, record_hash in rows
+        ],
+    )
+    ingredient_ids = {key: ingredient_id for key, (ingredient_id, _) in stored.items()}
+    season_ids = {
+        ingredient_ids[name_key(name)]: list(dict.fromkeys(seasons))
+        for name, _, _, seasons, _ in rows
+    }
+    # Links, masks and recipe seasons are only rewritten for ingredients
+    # whose seasons moved; an aisle or unit change leaves them alone.
+    masks = dict(stored.values())
+    changed = {
+        ingredient_id: seasons
+        for ingredient_id, seasons in season_ids.items()
+        if seasonality.season_mask(seasons) != masks[ingredient_id]
+    }
+    _replace_seasons(connection, changed)
+    seasonality.refresh_ingredients(connection, changed)
+    return ingredient_ids
+
+
+def _upsert_ingredients(
+    connection, rows: list[tuple[str, str, int, int, str | None]]
+) -> dict[str, tuple[int, int]]:
+    # A row matching an existing name key keeps its name as first spelled.
+    # Returns the id and season mask stored before this import, 0 for a new
+    # ingredient, by name key.
+    ingredients: dict[str, tuple[int, int]] = {}
+    for chunk in _chunks(rows, _MAX_VARIABLES // 5):
+        placeholders = ", ".join("(?, ?, ?, ?, ?)" for _ in chunk)
+        cursor = connection.execute(
+            f"""
+            INSERT INTO ingredient
+                (name, name_key, default_aisle_id, unit_id, import_hash)
+            VALUES {placeholders}
+            ON CONFLICT(name_key) DO UPDATE SET
+                default_aisle_id = excluded.default_aisle_id,
+                unit_id = excluded.unit_id,
+                import_hash = excluded.import_hash
+            RETURNING id, name_key, season_mask;
             """,
-            (aisle_id, unit_id, ingredient_id),
+            [value for row in chunk for value in row],
+        )
+        ingredients.update(
+            (row["name_key"], (row["id"], row["season_mask"])) for row in cursor
         )
-        return ingredient_id
+    return ingredients
 
-    cursor = connection.execute(
-        """
-        INSERT INTO ingredient (name, default_aisle_id, unit_id)
-        VALUES (?, ?, ?);
-        """,
-        (name, aisle_id, unit_id),
+
+def _replace_seasons(connection, season_ids: dict[int, list[int]]) -> None:
+    for chunk in _chunks(list(season_ids), _MAX_VARIABLES):
+        placeholders = ", ".join("?" for _ in chunk)
+        connection.execute(
+            f"DELETE FROM ingredient_season WHERE ingredient_id IN ({placeholders});",
+            chunk,
+        )
+    links = [
+        (ingredient_id, season_id)
+        for ingredient_id, seasons in season_ids.items()
+        for season_id in seasons
+    ]
+    for chunk in _chunks(links, _MAX_VARIABLES // 2):
+        placeholders = ", ".join("(?, ?)" for _ in chunk)
+        connection.execute(
+            f"""
+            INSERT INTO ingredient_season (ingredient_id, season_id)
+            VALUES {placeholders};
+            """,
+            [value for link in chunk for value in link],
+        )
+    connection.executemany(
+        "UPDATE ingredient SET season_mask = ? WHERE id = ?;",
+        [
+            (seasonality.season_mask(seasons), ingredient_id)
+            for ingredient_id, seasons in season_ids.items()
+        ],
     )
-    return cursor.lastrowid
 
 
-def _replace_seasons(connection, ingredient_id: int, season_ids: list[int]) -> None:
-    connection.execute(
-        "DELETE FROM ingredient_season WHERE ingredient_id = ?;",
-        (ingredient_id,),
-    )
-    connection.executemany(
-        "INSERT INTO ingredient_season (ingredient_id, season_id) VALUES (?, ?);",
-        [(ingredient_id, season_id) for season_id in season_ids],
+def _replace_aliases(connection, aliases: dict[int, list[str]]) -> None:
+    for chunk in _chunks(list(aliases), _MAX_VARIABLES):
+        placeholders = ", ".join("?" for _ in chunk)
+        connection.execute(
+            f"DELETE FROM ingredient_alias WHERE ingredient_id IN ({placeholders});",
+            chunk,
+        )
+    # An alias claimed by another ingredient moves to the one imported last.
+    rows = list(
+        {
+            name_key(alias): (alias, name_key(alias), ingredient_id)
+            for ingredient_id, names in aliases.items()
+            for alias in names
+        }.values()
     )
+    for chunk in _chunks(rows, _MAX_VARIABLES // 3):
+        placeholders = ", ".join("(?, ?, ?)" for _ in chunk)
+        connection.execute(
+            f"""
+            INSERT INTO ingredient_alias (name, name_key, ingredient_id)
+            VALUES {placeholders}
+            ON CONFLICT(name_key) DO UPDATE SET
+                name = excluded.name,
+                ingredient_id = excluded.ingredient_id;
+            """,
+            [value for row in chunk for value in row],
+        )
+
+
+def _chunks(values: list, size: int) -> Iterator[list]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
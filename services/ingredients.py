@@ -1,64 +1,109 @@
 from __future__ import annotations
 
-from typing import Iterable
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, Mapping, Sequence
 
-from db.connection import get_connection
+from db.connection import connection_scope
+from db.normalize import fts_query, name_key
+from services import cache, seasonality
 
 
-def list_aisles():
-    with get_connection() as connection:
+@cache.cached()
+def list_aisles(
+    db_path: str | None = None, connection=None
+) -> Sequence[Mapping[str, Any]]:
+    with connection_scope(db_path, connection) as connection:
         return connection.execute(
             "SELECT id, name, sort_order FROM aisle ORDER BY sort_order ASC;"
         ).fetchall()
 
 
-def list_units():
-    with get_connection() as connection:
+@cache.cached()
+def list_units(
+    db_path: str | None = None, connection=None
+) -> Sequence[Mapping[str, Any]]:
+    with connection_scope(db_path, connection) as connection:
         return connection.execute("SELECT id, name FROM unit ORDER BY name ASC;").fetchall()
 
 
-def list_seasons():
-    with get_connection() as connection:
+@cache.cached()
+def list_seasons(
+    db_path: str | None = None, connection=None
+) -> Sequence[Mapping[str, Any]]:
+    with connection_scope(db_path, connection) as connection:
         return connection.execute("SELECT id, name FROM season ORDER BY name ASC;").fetchall()
 
 
-def list_ingredients(season_id: int | None = None):
-    with get_connection() as connection:
+_INGREDIENT_LIST_SQL = """
+SELECT ingredient.id,
+       ingredient.name,
+       aisle.name AS aisle_name,
+       unit.name AS unit_name,
+       (
+           SELECT GROUP_CONCAT(season.name, ', ')
+           FROM season
+           WHERE ingredient.season_mask & (1 << (season.id - 1))
+       ) AS seasons
+FROM ingredient
+JOIN aisle ON aisle.id = ingredient.default_aisle_id
+JOIN unit ON unit.id = ingredient.unit_id
+WHERE (
+    ? IS NULL
+    OR ingredient.season_mask = 0
+    OR ingredient.season_mask & (1 << (? - 1))
+)
+{name_filter}
+ORDER BY ingredient.name ASC;
+"""
+
+
+@cache.cached()
+def list_ingredients(
+    season_id: int | None = None, db_path: str | None = None, connection=None
+) -> Sequence[Mapping[str, Any]]:
+    with connection_scope(db_path, connection) as connection:
         return connection.execute(
-            """
-            SELECT ingredient.id,
-                   ingredient.name,
-                   aisle.name AS aisle_name,
-                   unit.name AS unit_name,
-                   GROUP_CONCAT(season.name, ', ') AS seasons
-            FROM ingredient
-            JOIN aisle ON aisle.id = ingredient.default_aisle_id
-            JOIN unit ON unit.id = ingredient.unit_id
-            LEFT JOIN ingredient_season ON ingredient_season.ingredient_id = ingredient.id
-            LEFT JOIN season ON season.id = ingredient_season.season_id
-            WHERE (
-                ? IS NULL
-                OR NOT EXISTS (
-                    SELECT 1
-                    FROM ingredient_season AS ingredient_season_filter
-                    WHERE ingredient_season_filter.ingredient_id = ingredient.id
-                )
-                OR EXISTS (
-                    SELECT 1
-                    FROM ingredient_season AS ingredient_season_filter
-                    WHERE ingredient_season_filter.ingredient_id = ingredient.id
-                      AND ingredient_season_filter.season_id = ?
+            _INGREDIENT_LIST_SQL.format(name_filter=""), (season_id, season_id)
+        ).fetchall()
+
+
+def search_ingredients(
+    query: str,
+    season_id: int | None = None,
+    db_path: str | None = None,
+    connection=None,
+) -> Sequence[Mapping[str, Any]]:
+    # Every word of the query must start a word of the name or of one
+    # alias, ignoring case and accents, as recipe names are searched.
+    match = fts_query(query)
+    if match is None:
+        return list_ingredients(season_id, db_path, connection)
+    with connection_scope(db_path, connection) as connection:
+        return connection.execute(
+            _INGREDIENT_LIST_SQL.format(
+                name_filter="""
+                AND ingredient.id IN (
+                    SELECT rowid FROM ingredient_fts WHERE ingredient_fts MATCH ?
+                    UNION
+                    SELECT ingredient_id
+                    FROM ingredient_alias
+                    WHERE id IN (
+                        SELECT rowid
+                        FROM ingredient_alias_fts
+                        WHERE ingredient_alias_fts MATCH ?
+                    )
                 )
-            )
-            GROUP BY ingredient.id
-            ORDER BY ingredient.name ASC;
-            """,
-            (season_id, season_id),
+                """
+            ),
+            (season_id, season_id, match, match),
         ).fetchall()
 
 
-def get_ingredient(ingredient_id: int):
-    with get_connection() as connection:
+def get_ingredient(
+    ingredient_id: int, db_path: str | None = None, connection=None
+):
+    with connection_scope(db_path, connection) as connection:
         ingredient = connection.execute(
             """
             SELECT id, name, default_aisle_id, unit_id
@@ -81,18 +126,18 @@ def create_ingredient(
     unit_id: int,
     season_ids: Iterable[int],
     db_path: str | None = None,
+    connection=None,
 ) -> int:
-    with get_connection(db_path) as connection:
+    with connection_scope(db_path, connection) as connection, _unique_name(name):
         cursor = connection.execute(
             """
-            INSERT INTO ingredient (name, default_aisle_id, unit_id)
-            VALUES (?, ?, ?);
+            INSERT INTO ingredient (name, name_key, default_aisle_id, unit_id)
+            VALUES (?, ?, ?, ?);
             """,
-            (name.strip(), aisle_id, unit_id),
+            (name.strip(), name_key(name), aisle_id, unit_id),
         )
         ingredient_id = cursor.lastrowid
         _replace_seasons(connection, ingredient_id, season_ids)
-        connection.commit()
         return ingredient_id
 
 
@@ -102,27 +147,55 @@ def update_ingredient(
     aisle_id: int,
     unit_id: int,
     season_ids: Iterable[int],
+    db_path: str | None = None,
+    connection=None,
 ):
-    with get_connection() as connection:
+    with connection_scope(db_path, connection) as connection, _unique_name(name):
+        key = name_key(name)
+        stored = connection.execute(
+            "SELECT name_key FROM ingredient WHERE id = ?;", (ingredient_id,)
+        ).fetchone()
+        # Rows whose names collided when keys were introduced hold key#id;
+        # they keep it as long as their folded name stays the same.
+        if stored is not None and stored["name_key"] == f"{key}#{ingredient_id}":
+            key = stored["name_key"]
         connection.execute(
             """
             UPDATE ingredient
-            SET name = ?, default_aisle_id = ?, unit_id = ?
+            SET name = ?,
+                name_key = ?,
+                default_aisle_id = ?,
+                unit_id = ?,
+                import_hash = NULL
             WHERE id = ?;
             """,
-            (name.strip(), aisle_id, unit_id, ingredient_id),
+            (name.strip(), key, aisle_id, unit_id, ingredient_id),
         )
         _replace_seasons(connection, ingredient_id, season_ids)
-        connection.commit()
+        seasonality.refresh_ingredients(connection, [ingredient_id])
 
 
-def delete_ingredient(ingredient_id: int):
-    with get_connection() as connection:
+def delete_ingredient(
+    ingredient_id: int, db_path: str | None = None, connection=None
+):
+    with connection_scope(db_path, connection) as connection:
         connection.execute("DELETE FROM ingredient WHERE id = ?;", (ingredient_id,))
-        connection.commit()
+
+
+@contextmanager
+def _unique_name(name: str) -> Iterator[None]:
+    try:
+        yield
+    except sqlite3.IntegrityError as exc:
+        if "UNIQUE" not in str(exc):
+            raise
+        raise ValueError(
+            f"Un ingrédient nommé « {name.strip()} » existe déjà."
+        ) from exc
 
 
 def _replace_seasons(connection, ingredient_id: int, season_ids: Iterable[int]):
+    season_ids = list(season_ids)
     connection.execute(
         "DELETE FROM ingredient_season WHERE ingredient_id = ?;", (ingredient_id,)
     )
@@ -130,3 +203,7 @@ def _replace_seasons(connection, ingredient_id: int, season_ids: Iterable[int]):
         "INSERT INTO ingredient_season (ingredient_id, season_id) VALUES (?, ?);",
         [(ingredient_id, season_id) for season_id in season_ids],
     )
+    connection.execute(
+        "UPDATE ingredient SET season_mask = ? WHERE id = ?;",
+        (seasonality.season_mask(season_ids), ingredient_id),
+    )
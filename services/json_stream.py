@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Iterator, TextIO
+
+INVALID_JSON = "invalid"
+NOT_AN_OBJECT = "not-an-object"
+MISSING_ARRAY = "missing-array"
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+
+class JSONStreamError(ValueError):
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+def iter_array_items(
+    handle: TextIO, key: str, chunk_size: int = 64 * 1024
+) -> Iterator[Any]:
+    # Yields the elements of the ``key`` array of the root object one at a
+    # time, holding roughly one element in memory. The rest of the document
+    # is still checked, so errors are reported as json.loads would: invalid
+    # JSON first, then a non-object root, then a missing or non-list array.
+    reader = _Reader(handle, chunk_size)
+    if reader.peek() != "{":
+        reader.decode_value()
+        raise JSONStreamError(NOT_AN_OBJECT)
+    reader.advance()
+
+    found = False
+    if reader.peek() == "}":
+        reader.advance()
+    else:
+        while True:
+            name = reader.decode_value()
+            if not isinstance(name, str):
+                raise JSONStreamError(INVALID_JSON)
+            reader.expect(":")
+            if name == key and reader.peek() == "[":
+                found = True
+                yield from _iter_array(reader)
+            else:
+                if name == key:
+                    found = False
+                reader.decode_value()
+            separator = reader.peek()
+            reader.advance()
+            if separator == "}":
+                break
+            if separator != ",":
+                raise JSONStreamError(INVALID_JSON)
+
+    if reader.peek() != "":
+        raise JSONStreamError(INVALID_JSON)
+    if not found:
+        raise JSONStreamError(MISSING_ARRAY)
+
+
+def _iter_array(reader: _Reader) -> Iterator[Any]:
+    reader.advance()
+    if reader.peek() == "]":
+        reader.advance()
+        return
+    while True:
+        yield reader.decode_value()
+        separator = reader.peek()
+        reader.advance()
+        if separator == "]":
+            return
+        if separator != ",":
+            raise JSONStreamError(INVALID_JSON)
+
+
+class _Reader:
+    def __init__(self, handle: TextIO, chunk_size: int) -> None:
+        self.handle = handle
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def fill(self) -> None:
+        # Read at least as much as is still buffered, so a value larger
+        # than one chunk is retried a logarithmic number of times.
+        pending = self.buffer[self.position:]
+        chunk = self.handle.read(max(self.chunk_size, len(pending)))
+        if not chunk:
+            self.eof = True
+        self.buffer = pending + chunk
+        self.position = 0
+
+    def peek(self) -> str:
+        while True:
+            self.position = _WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if self.eof:
+                return ""
+            self.fill()
+
+    def advance(self) -> None:
+        self.position += 1
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise JSONStreamError(INVALID_JSON)
+        self.advance()
+
+    def decode_value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise JSONStreamError(INVALID_JSON) from None
+                self.fill()
+                continue
+            # A number ending exactly at the buffer edge may continue in the
+            # next chunk.
+            if end == len(self.buffer) and not self.eof:
+                self.fill()
+                continue
+            self.position = end
+            return value
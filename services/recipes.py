@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from db.connection import get_connection
+from typing import Any, Iterable, Mapping, Sequence
+
+from db.connection import connection_scope
+from db.normalize import fts_query, name_key
+from services import cache, seasonality
 
 TIME_OPTIONS = [
     "15min",
@@ -30,6 +34,12 @@ _TIME_TO_MINUTES = {
     "4h+": 240,
 }
 
+_BATCH_SIZE = 500
+
+# Name matches rank above matches in the instructions.
+_NAME_WEIGHT = 10.0
+_NOTES_WEIGHT = 1.0
+
 _DIFFICULTY_LOOKUP = {option.lower(): option for option in DIFFICULTY_OPTIONS}
 _DIFFICULTY_LOOKUP.update(
     {"easy": "Facile", "medium": "Moyen", "hard": "Difficile"}
@@ -73,6 +83,7 @@ def create_recipe(
     difficulty: str | None = None,
     servings: int | None = None,
     db_path: str | None = None,
+    connection=None,
 ) -> int:
     cleaned_name = name.strip()
     if not cleaned_name:
@@ -83,7 +94,7 @@ def create_recipe(
     normalized_difficulty = normalize_difficulty(difficulty)
     normalized_servings = normalize_servings(servings)
 
-    with get_connection(db_path) as connection:
+    with connection_scope(db_path, connection) as connection:
         cursor = connection.execute(
             """
             INSERT INTO recipe (
@@ -92,9 +103,10 @@ def create_recipe(
                 time_label,
                 difficulty,
                 servings,
-                notes
+                notes,
+                name_key
             )
-            VALUES (?, ?, ?, ?, ?, ?);
+            VALUES (?, ?, ?, ?, ?, ?, ?);
             """,
             (
                 cleaned_name,
@@ -103,65 +115,140 @@ def create_recipe(
                 normalized_difficulty,
                 normalized_servings,
                 cleaned_instructions,
+                name_key(cleaned_name),
             ),
         )
-        connection.commit()
+        seasonality.refresh_recipes(connection, [cursor.lastrowid])
         return cursor.lastrowid
 
 
+@cache.cached()
 def list_recipes(
-    db_path: str | None = None, season_id: int | None = None
+    db_path: str | None = None,
+    season_id: int | None = None,
+    connection=None,
+    name: str | None = None,
+    max_minutes: int | None = None,
+    difficulties: Iterable[str] | None = None,
+    limit: int | None = None,
+    after: tuple[str, int] | None = None,
+) -> Sequence[Mapping[str, Any]]:
+    # Recipes come in (name, id) order. Passing the (name, id) of the last
+    # row of a page as ``after`` returns the next one.
+    clauses, params = _recipe_filters(season_id, max_minutes, difficulties)
+    match = fts_query(name, column="name") if name else None
+    if match is not None:
+        clauses.append(
+            "recipe.id IN (SELECT rowid FROM recipe_fts WHERE recipe_fts MATCH ?)"
+        )
+        params.append(match)
+    if after is not None:
+        clauses.append("(recipe.name, recipe.id) > (?, ?)")
+        params.extend(after)
+    params.append(-1 if limit is None else limit)
+    with connection_scope(db_path, connection) as connection:
+        recipes = connection.execute(
+            f"""
+            SELECT recipe.id,
+                   recipe.name,
+                   recipe.time_label,
+                   recipe.difficulty,
+                   recipe.servings,
+                   recipe.notes AS instructions
+            FROM recipe
+            {_where(clauses)}
+            ORDER BY recipe.name ASC, recipe.id ASC
+            LIMIT ?;
+            """,
+            params,
+        ).fetchall()
+    return [dict(recipe) for recipe in recipes]
+
+
+def search_recipes(
+    query: str,
+    limit: int | None = 50,
+    offset: int = 0,
+    db_path: str | None = None,
+    connection=None,
+    season_id: int | None = None,
+    max_minutes: int | None = None,
+    difficulties: Iterable[str] | None = None,
 ) -> list[dict]:
-    with get_connection(db_path) as connection:
-        if season_id is None:
-            recipes = connection.execute(
-                """
-                SELECT id,
-                       name,
-                       time_label,
-                       difficulty,
-                       servings,
-                       notes AS instructions
-                FROM recipe
-                ORDER BY name ASC;
-                """
-            ).fetchall()
-        else:
-            recipes = connection.execute(
-                """
-                SELECT recipe.id,
-                       recipe.name,
-                       recipe.time_label,
-                       recipe.difficulty,
-                       recipe.servings,
-                       recipe.notes AS instructions
-                FROM recipe
-                WHERE NOT EXISTS (
-                    SELECT 1
-                    FROM recipe_ingredient
-                    JOIN ingredient ON ingredient.id = recipe_ingredient.ingredient_id
-                    WHERE recipe_ingredient.recipe_id = recipe.id
-                      AND EXISTS (
-                          SELECT 1
-                          FROM ingredient_season
-                          WHERE ingredient_season.ingredient_id = ingredient.id
-                      )
-                      AND NOT EXISTS (
-                          SELECT 1
-                          FROM ingredient_season
-                          WHERE ingredient_season.ingredient_id = ingredient.id
-                            AND ingredient_season.season_id = ?
-                      )
-                )
-                ORDER BY recipe.name ASC;
-                """,
-                (season_id,),
-            ).fetchall()
+    match = fts_query(query)
+    if match is None:
+        return []
+    clauses, params = _recipe_filters(season_id, max_minutes, difficulties)
+    clauses.insert(0, "recipe_fts MATCH ?")
+    params.insert(0, match)
+    with connection_scope(db_path, connection) as connection:
+        recipes = connection.execute(
+            f"""
+            SELECT recipe.id,
+                   recipe.name,
+                   recipe.time_label,
+                   recipe.difficulty,
+                   recipe.servings,
+                   recipe.notes AS instructions
+            FROM recipe_fts
+            JOIN recipe ON recipe.id = recipe_fts.rowid
+            {_where(clauses)}
+            ORDER BY bm25(recipe_fts, ?, ?), recipe.name ASC
+            LIMIT ? OFFSET ?;
+            """,
+            (
+                *params,
+                _NAME_WEIGHT,
+                _NOTES_WEIGHT,
+                -1 if limit is None else limit,
+                offset,
+            ),
+        ).fetchall()
     return [dict(recipe) for recipe in recipes]
 
 
-def get_recipe(recipe_id: int, db_path: str | None = None) -> dict | None:
-    with get_connection(db_path) as connection:
+def _recipe_filters(
+    season_id: int | None,
+    max_minutes: int | None,
+    difficulties: Iterable[str] | None,
+) -> tuple[list[str], list]:
+    clauses: list[str] = []
+    params: list = []
+    if season_id is not None:
+        # recipe_season is kept up to date by the services; see
+        # services.seasonality.
+        clauses.append(
+            """
+            recipe.id IN (
+                SELECT recipe_id FROM recipe_season WHERE season_id = ?
+            )
+            """
+        )
+        params.append(season_id)
+    if max_minutes is not None:
+        # Recipes without a time are left out, as their duration is unknown.
+        clauses.append(
+            "recipe.time_label IS NOT NULL AND recipe.total_minutes <= ?"
+        )
+        params.append(max_minutes)
+    difficulties = list(difficulties or ())
+    if difficulties:
+        placeholders = ", ".join("?" for _ in difficulties)
+        clauses.append(f"recipe.difficulty IN ({placeholders})")
+        params.extend(difficulties)
+    return clauses, params
+
+
+def _where(clauses: list[str]) -> str:
+    if not clauses:
+        return ""
+    return "WHERE " + " AND ".join(f"({clause})" for clause in clauses)
+
+
+def get_recipe(
+    recipe_id: int, db_path: str | None = None, connection=None
+) -> dict | None:
+    with connection_scope(db_path, connection) as connection:
         recipe = connection.execute(
             """
             SELECT id,
@@ -186,6 +273,7 @@ def update_recipe(
     difficulty: str | None = None,
     servings: int | None = None,
     db_path: str | None = None,
+    connection=None,
 ) -> None:
     cleaned_name = name.strip()
     if not cleaned_name:
@@ -196,7 +284,7 @@ def update_recipe(
     normalized_difficulty = normalize_difficulty(difficulty)
     normalized_servings = normalize_servings(servings)
 
-    with get_connection(db_path) as connection:
+    with connection_scope(db_path, connection) as connection:
         connection.execute(
             """
             UPDATE recipe
@@ -205,7 +293,9 @@ def update_recipe(
                 time_label = ?,
                 difficulty = ?,
                 servings = ?,
-                notes = ?
+                notes = ?,
+                name_key = ?,
+                import_hash = NULL
             WHERE id = ?;
             """,
             (
@@ -215,22 +305,23 @@ def update_recipe(
                 normalized_difficulty,
                 normalized_servings,
                 cleaned_instructions,
+                name_key(cleaned_name),
                 recipe_id,
             ),
         )
-        connection.commit()
 
 
-def delete_recipe(recipe_id: int, db_path: str | None = None) -> None:
-    with get_connection(db_path) as connection:
+def delete_recipe(
+    recipe_id: int, db_path: str | None = None, connection=None
+) -> None:
+    with connection_scope(db_path, connection) as connection:
         connection.execute("DELETE FROM recipe WHERE id = ?;", (recipe_id,))
-        connection.commit()
 
 
 def list_recipe_ingredients(
-    recipe_id: int, db_path: str | None = None
+    recipe_id: int, db_path: str | None = None, connection=None
 ) -> list[dict]:
-    with get_connection(db_path) as connection:
+    with connection_scope(db_path, connection) as connection:
         items = connection.execute(
             """
             SELECT recipe_ingredient.id,
@@ -249,9 +340,9 @@ def list_recipe_ingredients(
 
 
 def list_recipe_ingredients_with_metadata(
-    recipe_id: int, db_path: str | None = None
+    recipe_id: int, db_path: str | None = None, connection=None
 ) -> list[dict]:
-    with get_connection(db_path) as connection:
+    with connection_scope(db_path, connection) as connection:
         items = connection.execute(
             """
             SELECT recipe_ingredient.id,
@@ -272,10 +363,44 @@ def list_recipe_ingredients_with_metadata(
     return [dict(item) for item in items]
 
 
+def list_ingredients_for_recipes(
+    recipe_ids: Iterable[int], db_path: str | None = None, connection=None
+) -> dict[int, list[dict]]:
+    unique_ids = list(dict.fromkeys(recipe_ids))
+    grouped: dict[int, list[dict]] = {recipe_id: [] for recipe_id in unique_ids}
+    if not unique_ids:
+        return grouped
+    with connection_scope(db_path, connection) as connection:
+        for start in range(0, len(unique_ids), _BATCH_SIZE):
+            batch = unique_ids[start:start + _BATCH_SIZE]
+            placeholders = ", ".join("?" for _ in batch)
+            items = connection.execute(
+                f"""
+                SELECT recipe_ingredient.recipe_id,
+                       recipe_ingredient.id,
+                       recipe_ingredient.quantity,
+                       ingredient.name AS ingredient_name,
+                       unit.name AS unit_name,
+                       aisle.name AS aisle_name,
+                       aisle.sort_order AS aisle_order
+                FROM recipe_ingredient
+                JOIN ingredient ON ingredient.id = recipe_ingredient.ingredient_id
+                JOIN unit ON unit.id = ingredient.unit_id
+                JOIN aisle ON aisle.id = ingredient.default_aisle_id
+                WHERE recipe_ingredient.recipe_id IN ({placeholders})
+                ORDER BY recipe_ingredient.recipe_id ASC, ingredient.name ASC;
+                """,
+                batch,
+            ).fetchall()
+            for item in items:
+                grouped[item["recipe_id"]].append(dict(item))
+    return grouped
+
+
 def get_recipe_ingredient(
-    recipe_ingredient_id: int, db_path: str | None = None
+    recipe_ingredient_id: int, db_path: str | None = None, connection=None
 ) -> dict | None:
-    with get_connection(db_path) as connection:
+    with connection_scope(db_path, connection) as connection:
         item = connection.execute(
             """
             SELECT recipe_ingredient.id,
@@ -291,9 +416,13 @@ def get_recipe_ingredient(
 
 
 def add_recipe_ingredient(
-    recipe_id: int, ingredient_id: int, quantity: float, db_path: str | None = None
+    recipe_id: int,
+    ingredient_id: int,
+    quantity: float,
+    db_path: str | None = None,
+    connection=None,
 ) -> int:
-    with get_connection(db_path) as connection:
+    with connection_scope(db_path, connection) as connection:
         existing = connection.execute(
             """
             SELECT id FROM recipe_ingredient
@@ -302,32 +431,35 @@ def add_recipe_ingredient(
             (recipe_id, ingredient_id),
         ).fetchone()
         if existing:
+            recipe_ingredient_id = existing["id"]
             connection.execute(
                 """
                 UPDATE recipe_ingredient
                 SET quantity = ?
                 WHERE id = ?;
                 """,
-                (quantity, existing["id"]),
+                (quantity, recipe_ingredient_id),
             )
-            connection.commit()
-            return existing["id"]
-
-        cursor = connection.execute(
-            """
-            INSERT INTO recipe_ingredient (recipe_id, ingredient_id, quantity)
-            VALUES (?, ?, ?);
-            """,
-            (recipe_id, ingredient_id, quantity),
-        )
-        connection.commit()
-        return cursor.lastrowid
+        else:
+            recipe_ingredient_id = connection.execute(
+                """
+                INSERT INTO recipe_ingredient (recipe_id, ingredient_id, quantity)
+                VALUES (?, ?, ?);
+                """,
+                (recipe_id, ingredient_id, quantity),
+            ).lastrowid
+            seasonality.refresh_recipes(connection, [recipe_id])
+        _clear_import_hash(connection, recipe_id)
+        return recipe_ingredient_id
 
 
 def update_recipe_ingredient(
-    recipe_ingredient_id: int, quantity: float, db_path: str | None = None
+    recipe_ingredient_id: int,
+    quantity: float,
+    db_path: str | None = None,
+    connection=None,
 ) -> None:
-    with get_connection(db_path) as connection:
+    with connection_scope(db_path, connection) as connection:
         connection.execute(
             """
             UPDATE recipe_ingredient
@@ -336,15 +468,37 @@ def update_recipe_ingredient(
             """,
             (quantity, recipe_ingredient_id),
         )
-        connection.commit()
+        _clear_line_import_hash(connection, recipe_ingredient_id)
 
 
 def delete_recipe_ingredient(
-    recipe_ingredient_id: int, db_path: str | None = None
+    recipe_ingredient_id: int, db_path: str | None = None, connection=None
 ) -> None:
-    with get_connection(db_path) as connection:
-        connection.execute(
-            "DELETE FROM recipe_ingredient WHERE id = ?;",
-            (recipe_ingredient_id,),
-        )
-        connection.commit()
+    with connection_scope(db_path, connection) as connection:
+        _clear_line_import_hash(connection, recipe_ingredient_id)
+        recipe_ids = [
+            row["recipe_id"]
+            for row in connection.execute(
+                "DELETE FROM recipe_ingredient WHERE id = ? RETURNING recipe_id;",
+                (recipe_ingredient_id,),
+            )
+        ]
+        seasonality.refresh_recipes(connection, recipe_ids)
+
+
+def _clear_import_hash(connection, recipe_id: int) -> None:
+    # A recipe edited by hand no longer matches its source record, so the
+    # next import must rewrite it instead of skipping it.
+    connection.execute(
+        "UPDATE recipe SET import_hash = NULL WHERE id = ?;", (recipe_id,)
+    )
+
+
+def _clear_line_import_hash(connection, recipe_ingredient_id: int) -> None:
+    connection.execute(
+        """
+        UPDATE recipe SET import_hash = NULL
+        WHERE id = (SELECT recipe_id FROM recipe_ingredient WHERE id = ?);
+        """,
+        (recipe_ingredient_id,),
+    )
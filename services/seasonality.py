@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable
+
+from db.connection import connection_scope
+from db.schema import RECIPE_SEASON_SELECT
+
+# SQLite builds older than 3.32 cap bound parameters at 999 per statement.
+_MAX_VARIABLES = 999
+
+
+@dataclass(frozen=True)
+class RecipeSeasonCheck:
+    missing: list[tuple[int, int]]
+    extra: list[tuple[int, int]]
+
+    @property
+    def consistent(self) -> bool:
+        return not self.missing and not self.extra
+
+
+def season_mask(season_ids: Iterable[int]) -> int:
+    # The bit of ingredient.season_mask owned by each season. Seasons are a
+    # small seeded set, far below the 63 bits of a SQLite integer.
+    mask = 0
+    for season_id in season_ids:
+        mask |= 1 << (season_id - 1)
+    return mask
+
+
+def refresh_recipes(connection, recipe_ids: Iterable[int]) -> None:
+    # Recomputes the seasons of the given recipes, a chunk at a time, in the
+    # caller's transaction.
+    recipe_ids = list(dict.fromkeys(recipe_ids))
+    for start in range(0, len(recipe_ids), _MAX_VARIABLES):
+        chunk = recipe_ids[start:start + _MAX_VARIABLES]
+        placeholders = ", ".join("?" for _ in chunk)
+        connection.execute(
+            f"DELETE FROM recipe_season WHERE recipe_id IN ({placeholders});",
+            chunk,
+        )
+        connection.execute(
+            f"""
+            INSERT INTO recipe_season (recipe_id, season_id)
+            {RECIPE_SEASON_SELECT}
+              AND recipe.id IN ({placeholders});
+            """,
+            chunk,
+        )
+
+
+def refresh_ingredients(connection, ingredient_ids: Iterable[int]) -> None:
+    # The seasons of an ingredient changed: refresh the recipes using it.
+    ingredient_ids = list(dict.fromkeys(ingredient_ids))
+    recipe_ids: list[int] = []
+    for start in range(0, len(ingredient_ids), _MAX_VARIABLES):
+        chunk = ingredient_ids[start:start + _MAX_VARIABLES]
+        placeholders = ", ".join("?" for _ in chunk)
+        recipe_ids.extend(
+            row["recipe_id"]
+            for row in connection.execute(
+                f"""
+                SELECT DISTINCT recipe_id
+                FROM recipe_ingredient
+                WHERE ingredient_id IN ({placeholders});
+                """,
+                chunk,
+            )
+        )
+    refresh_recipes(connection, recipe_ids)
+
+
+def check_recipe_seasons(
+    db_path: str | None = None, connection=None
+) -> RecipeSeasonCheck:
+    with connection_scope(db_path, connection) as connection:
+        missing = connection.execute(
+            f"""
+            SELECT recipe_id, season_id FROM ({RECIPE_SEASON_SELECT})
+            EXCEPT
+            SELECT recipe_id, season_id FROM recipe_season
+            ORDER BY recipe_id, season_id;
+            """
+        ).fetchall()
+        extra = connection.execute(
+            f"""
+            SELECT recipe_id, season_id FROM recipe_season
+            EXCEPT
+            SELECT recipe_id, season_id FROM ({RECIPE_SEASON_SELECT})
+            ORDER BY recipe_id, season_id;
+            """
+        ).fetchall()
+    return RecipeSeasonCheck(
+        missing=[tuple(row) for row in missing],
+        extra=[tuple(row) for row in extra],
+    )
+
+
+def rebuild_recipe_seasons(db_path: str | None = None, connection=None) -> int:
+    with connection_scope(db_path, connection) as connection:
+        connection.execute("DELETE FROM recipe_season;")
+        cursor = connection.execute(
+            f"""
+            INSERT INTO recipe_season (recipe_id, season_id)
+            {RECIPE_SEASON_SELECT};
+            """
+        )
+        return cursor.rowcount
@@ -0,0 +1,125 @@
+import tempfile
+import unittest
+from contextlib import closing
+from pathlib import Path
+
+from db.connection import close_all_connections, get_connection
+from db.init_db import initialize_database
+from services import cache
+from services import ingredients as ingredient_service
+from services import recipes as recipes_service
+
+
+class CacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.tmpdir.name) / "test.db")
+        initialize_database(self.db_path)
+        cache.clear()
+
+    def tearDown(self):
+        close_all_connections()
+        self.tmpdir.cleanup()
+
+    def test_reads_are_served_from_the_cache_until_a_write(self):
+        first = ingredient_service.list_aisles(db_path=self.db_path)
+        self.assertIs(ingredient_service.list_aisles(db_path=self.db_path), first)
+        stats = ingredient_service.list_aisles.cache_info()
+        self.assertEqual((stats.hits, stats.misses), (1, 1))
+
+        version = cache.data_version()
+        ingredient_service.create_ingredient(
+            "Tomate", first[0]["id"], 1, [], db_path=self.db_path
+        )
+        self.assertGreater(cache.data_version(), version)
+        names = [
+            row["name"]
+            for row in ingredient_service.list_ingredients(db_path=self.db_path)
+        ]
+        self.assertEqual(names, ["Tomate"])
+        self.assertIsNot(ingredient_service.list_aisles(db_path=self.db_path), first)
+
+    def test_parameters_are_cached_separately_in_a_bounded_lru(self):
+        recipes_service.create_recipe("Salade", None, "15min", db_path=self.db_path)
+        recipes_service.create_recipe("Soupe", None, "1h", db_path=self.db_path)
+
+        quick = recipes_service.list_recipes(db_path=self.db_path, max_minutes=15)
+        everything = recipes_service.list_recipes(db_path=self.db_path)
+        self.assertEqual([recipe["name"] for recipe in quick], ["Salade"])
+        self.assertEqual(len(everything), 2)
+        for limit in range(cache.DEFAULT_MAXSIZE):
+            recipes_service.list_recipes(db_path=self.db_path, limit=limit + 1)
+
+        stats = recipes_service.list_recipes.cache_info()
+        self.assertEqual(stats.size, cache.DEFAULT_MAXSIZE)
+        self.assertEqual(stats.misses, cache.DEFAULT_MAXSIZE + 2)
+        # The two oldest entries were evicted.
+        recipes_service.list_recipes(db_path=self.db_path, max_minutes=15)
+        self.assertEqual(recipes_service.list_recipes.cache_info().hits, 0)
+
+    def test_cached_results_are_read_only(self):
+        recipes_service.create_recipe("Salade", None, db_path=self.db_path)
+        recipes = recipes_service.list_recipes(db_path=self.db_path)
+
+        with self.assertRaises(AttributeError):
+            recipes.append({})
+        with self.assertRaises(TypeError):
+            recipes[0]["name"] = "Soupe"
+        self.assertEqual(
+            recipes_service.list_recipes(db_path=self.db_path)[0]["name"], "Salade"
+        )
+
+    def test_caller_connections_bypass_the_cache(self):
+        with get_connection(self.db_path) as connection:
+            connection.execute(
+                "INSERT INTO unit (name, abbreviation) VALUES ('pincée', 'pincée');"
+            )
+            names = {
+                row["name"]
+                for row in ingredient_service.list_units(connection=connection)
+            }
+            connection.rollback()
+        self.assertIn("pincée", names)
+        stats = ingredient_service.list_units.cache_info()
+        self.assertEqual((stats.hits, stats.misses, stats.size), (0, 0, 0))
+
+    def test_a_caller_commit_invalidates_reads_made_before_it(self):
+        with closing(get_connection(self.db_path)) as connection:
+            ingredient_service.create_ingredient(
+                "Tomate", 1, 1, [], connection=connection
+            )
+            self.assertEqual(
+                ingredient_service.list_ingredients(db_path=self.db_path), ()
+            )
+            connection.commit()
+        names = [
+            row["name"]
+            for row in ingredient_service.list_ingredients(db_path=self.db_path)
+        ]
+        self.assertEqual(names, ["Tomate"])
+
+    def test_reads_do_not_invalidate_the_cache(self):
+        version = cache.data_version()
+        ingredient_service.list_units(db_path=self.db_path)
+        with closing(get_connection(self.db_path)) as connection:
+            ingredient_service.list_units(connection=connection)
+            connection.commit()
+        self.assertEqual(cache.data_version(), version)
+
+    def test_cached_and_connection_calls_return_the_same_types(self):
+        recipes_service.create_recipe("Salade", None, db_path=self.db_path)
+        cached = recipes_service.list_recipes(db_path=self.db_path)
+        with closing(get_connection(self.db_path)) as connection:
+            direct = recipes_service.list_recipes(connection=connection)
+            units = ingredient_service.list_units(connection=connection)
+
+        self.assertIs(type(direct), type(cached))
+        self.assertIs(type(direct[0]), type(cached[0]))
+        self.assertEqual(direct, cached)
+        self.assertIs(
+            type(units), type(ingredient_service.list_units(db_path=self.db_path))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import json
+import sqlite3
+import tempfile
+import unittest
+from contextlib import closing
+from pathlib import Path
+from unittest import mock
+
+from db.connection import close_all_connections, get_connection
+from db.init_db import initialize_database
+from services import cache
+from services import ingredients as ingredient_service
+from services.changes import ChangeWatcher
+from services.importer import import_ingredients_from_json
+
+
+class ChangeWatcherTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.tmpdir.name) / "test.db")
+        initialize_database(self.db_path)
+        self.watcher = ChangeWatcher(self.db_path)
+
+    def tearDown(self):
+        close_all_connections()
+        self.tmpdir.cleanup()
+
+    def test_reports_tables_changed_by_another_connection(self):
+        self.assertEqual(self.watcher.poll(), frozenset())
+        ingredient_service.list_units(db_path=self.db_path)
+
+        with closing(get_connection(self.db_path)) as other:
+            other.execute(
+                "INSERT INTO unit (name, abbreviation) VALUES ('pincée', 'pincée');"
+            )
+            other.commit()
+
+        version = cache.data_version()
+        self.assertEqual(self.watcher.poll(), frozenset({"unit"}))
+        self.assertGreater(cache.data_version(), version)
+        units = ingredient_service.list_units(db_path=self.db_path)
+        self.assertIn("pincée", [unit["name"] for unit in units])
+        self.assertEqual(self.watcher.poll(), frozenset())
+
+    def test_imports_on_their_own_connection_are_reported(self):
+        path = Path(self.tmpdir.name) / "ingredients.json"
+        path.write_text(
+            json.dumps(
+                {
+                    "ingredients": [
+                        {
+                            "name": "Tomate",
+                            "aisle": "Épicerie",
+                            "unit": "pièce",
+                            "seasons": ["été"],
+                        }
+                    ]
+                }
+            ),
+            encoding="utf-8",
+        )
+        import_ingredients_from_json(path, self.db_path, profile="bulk-import")
+
+        self.assertEqual(
+            self.watcher.poll(), frozenset({"ingredient", "ingredient_season"})
+        )
+
+    def test_a_poll_failing_on_a_busy_database_is_retried(self):
+        with closing(get_connection(self.db_path)) as other:
+            other.execute(
+                "INSERT INTO unit (name, abbreviation) VALUES ('pincée', 'pincée');"
+            )
+            other.commit()
+
+        with mock.patch.object(
+            self.watcher,
+            "_read_versions",
+            side_effect=sqlite3.OperationalError("database is locked"),
+        ):
+            with self.assertRaises(sqlite3.OperationalError):
+                self.watcher.poll()
+        self.assertEqual(self.watcher.poll(), frozenset({"unit"}))
+
+    def test_writes_on_the_shared_connection_are_not_reported(self):
+        ingredient_service.create_ingredient("Sel", 1, 1, [], db_path=self.db_path)
+
+        self.assertEqual(self.watcher.poll(), frozenset())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import contextlib
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from app.cli import main
+from db.connection import get_connection
+
+IMPORT_DIR = Path(__file__).resolve().parents[1] / "import_JSON"
+
+class CliTests(unittest.TestCase):
+    def test_import_dir_reports_each_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "test.db")
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                status = main(["--db", db_path, "import-dir", str(IMPORT_DIR)])
+
+            self.assertEqual(status, 0)
+            self.assertIn("recette.json", output.getvalue())
+            with get_connection(db_path) as connection:
+                recipes = connection.execute(
+                    "SELECT COUNT(*) FROM recipe;"
+                ).fetchone()[0]
+            self.assertGreater(recipes, 0)
+
+    def test_import_reports_skipped_records(self):
+        path = str(IMPORT_DIR / "Ingrédients" / "boulangerie.json")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "test.db")
+            with contextlib.redirect_stdout(io.StringIO()):
+                main(["--db", db_path, "import", "ingredients", path])
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                status = main(["--db", db_path, "import", "ingredients", path])
+
+        self.assertEqual(status, 0)
+        self.assertRegex(
+            output.getvalue(), r"^0 enregistrement\(s\) importé\(s\), [1-9]\d* inchangé"
+        )
+
+    def test_rejects_a_checkpoint_interval_below_one(self):
+        path = str(IMPORT_DIR / "Ingrédients" / "boulangerie.json")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "test.db")
+            errors = io.StringIO()
+            with contextlib.redirect_stderr(errors), self.assertRaises(
+                SystemExit
+            ) as raised:
+                main(
+                    [
+                        "--db",
+                        db_path,
+                        "import",
+                        "ingredients",
+                        path,
+                        "--checkpoint-every",
+                        "0",
+                    ]
+                )
+
+        self.assertEqual(raised.exception.code, 2)
+        self.assertIn("--checkpoint-every", errors.getvalue())
+
+    def test_rejects_an_error_cap_below_one(self):
+        path = str(IMPORT_DIR / "Ingrédients" / "boulangerie.json")
+        errors = io.StringIO()
+        with contextlib.redirect_stderr(errors), self.assertRaises(
+            SystemExit
+        ) as raised:
+            main(["validate", "ingredients", path, "--max-errors", "0"])
+
+        self.assertEqual(raised.exception.code, 2)
+        self.assertIn("--max-errors", errors.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import sqlite3
+import tempfile
+import threading
+import unittest
+from contextlib import closing
+from pathlib import Path
+
+from db.connection import (
+    DEFAULT_PROFILE,
+    checkout_connection,
+    close_all_connections,
+    connection_scope,
+    describe_connection,
+    get_active_profile,
+    get_connection,
+    release_connection,
+    set_active_profile,
+)
+from db.init_db import initialize_database
+from services.importer import import_ingredients_from_json
+from services.ingredients import create_ingredient, list_aisles, list_ingredients
+
+
+class ConnectionPoolTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.tmpdir.name) / "test.db")
+        initialize_database(self.db_path)
+
+    def tearDown(self):
+        close_all_connections()
+        self.tmpdir.cleanup()
+
+    def test_checkout_reuses_connection_on_same_thread(self):
+        first = checkout_connection(self.db_path)
+        release_connection(first)
+        second = checkout_connection(self.db_path)
+        self.assertIs(first, second)
+
+    def test_threads_get_their_own_connection(self):
+        main_connection = checkout_connection(self.db_path)
+        other = []
+        thread = threading.Thread(
+            target=lambda: other.append(checkout_connection(self.db_path))
+        )
+        thread.start()
+        thread.join()
+        self.assertIsNot(main_connection, other[0])
+
+    def test_release_rolls_back_pending_work(self):
+        connection = checkout_connection(self.db_path)
+        connection.execute("DELETE FROM aisle;")
+        release_connection(connection)
+        self.assertFalse(connection.in_transaction)
+        self.assertTrue(list_aisles(db_path=self.db_path))
+
+    def test_close_all_connections_closes_pool(self):
+        connection = checkout_connection(self.db_path)
+        close_all_connections()
+        with self.assertRaises(sqlite3.ProgrammingError):
+            connection.execute("SELECT 1;")
+        self.assertIsNot(checkout_connection(self.db_path), connection)
+
+    def test_services_accept_existing_connection(self):
+        with connection_scope(self.db_path) as connection:
+            aisle_id = list_aisles(connection=connection)[0]["id"]
+            create_ingredient(
+                "Tomate", aisle_id, 1, [], connection=connection
+            )
+            names = [
+                row["name"] for row in list_ingredients(connection=connection)
+            ]
+        self.assertEqual(names, ["Tomate"])
+
+    def test_services_leave_the_caller_transaction_open(self):
+        with closing(get_connection(self.db_path)) as connection:
+            create_ingredient("Tomate", 1, 1, [], connection=connection)
+            self.assertTrue(connection.in_transaction)
+            connection.rollback()
+        self.assertEqual(list_ingredients(db_path=self.db_path), ())
+
+    def test_checkpoints_need_an_owned_connection(self):
+        path = Path(self.tmpdir.name) / "ingredients.json"
+        path.write_text('{"ingredients": []}', encoding="utf-8")
+        with closing(get_connection(self.db_path)) as connection:
+            with self.assertRaises(ValueError):
+                import_ingredients_from_json(
+                    path, connection=connection, checkpoint_every=10
+                )
+
+
+class PerformanceProfileTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.tmpdir.name) / "test.db")
+
+    def tearDown(self):
+        set_active_profile(DEFAULT_PROFILE)
+        close_all_connections()
+        self.tmpdir.cleanup()
+
+    def test_profile_pragmas_are_applied(self):
+        connection = get_connection(self.db_path, profile="bulk-import")
+        try:
+            report = describe_connection(connection)
+        finally:
+            connection.close()
+        self.assertEqual(report["profile"], "bulk-import")
+        self.assertEqual(report["synchronous"], 0)
+        self.assertEqual(report["temp_store"], 2)
+        self.assertEqual(report["busy_timeout"], 30000)
+
+    def test_journal_mode_is_set_once_for_every_profile(self):
+        initialize_database(self.db_path)
+        for profile in ("durable", "balanced", "bulk-import"):
+            with self.subTest(profile=profile):
+                connection = get_connection(self.db_path, profile=profile)
+                try:
+                    report = describe_connection(connection)
+                finally:
+                    connection.close()
+                self.assertEqual(report["journal_mode"], "wal")
+
+    def test_active_profile_is_used_by_default(self):
+        set_active_profile("balanced")
+        self.assertEqual(get_active_profile().name, "balanced")
+        with connection_scope(self.db_path) as connection:
+            report = describe_connection(connection)
+        self.assertEqual(report["profile"], "balanced")
+        self.assertEqual(report["synchronous"], 1)
+
+    def test_pool_keeps_one_connection_per_profile(self):
+        durable = checkout_connection(self.db_path, "durable")
+        bulk = checkout_connection(self.db_path, "bulk-import")
+        self.assertIsNot(durable, bulk)
+        self.assertIs(checkout_connection(self.db_path, "bulk-import"), bulk)
+
+    def test_unknown_profile_is_rejected(self):
+        with self.assertRaises(ValueError):
+            set_active_profile("turbo")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,22 @@
+import tempfile
 import unittest
+from pathlib import Path
 
-from services.consolidation import ShoppingItem, consolidate_items, group_by_aisle
+from db.connection import close_all_connections
+from db.init_db import initialize_database
+from services.consolidation import (
+    ShoppingItem,
+    ShoppingListModel,
+    consolidate_items,
+    consolidate_selection_in_db,
+    group_by_aisle,
+)
+from services.ingredients import create_ingredient, list_aisles, list_units
+from services.recipes import (
+    add_recipe_ingredient,
+    create_recipe,
+    list_ingredients_for_recipes,
+)
 
 
 class ConsolidationTests(unittest.TestCase):
@@ -50,6 +66,30 @@ class ConsolidationTests(unittest.TestCase):
         self.assertEqual(len(consolidated), 1)
         self.assertEqual(consolidated[0].quantity, 2)
 
+    def test_merges_notes_in_order(self):
+        def item(note):
+            return ShoppingItem(
+                ingredient_name="Oignon",
+                aisle_name="Fruits et légumes",
+                aisle_order=1,
+                unit="pc",
+                quantity=1,
+                note=note,
+            )
+
+        cases = [
+            ([None, "haché"], "haché"),
+            (["haché", None], "haché"),
+            (["haché", "haché"], "haché"),
+            (["haché", "émincé"], None),
+            (["haché", "émincé", "râpé"], "râpé"),
+        ]
+        for notes, expected in cases:
+            with self.subTest(notes=notes):
+                consolidated = consolidate_items([item(note) for note in notes])
+                self.assertEqual(consolidated[0].note, expected)
+                self.assertEqual(consolidated[0].quantity, len(notes))
+
     def test_groups_by_aisle(self):
         items = [
             ShoppingItem(
@@ -73,5 +113,144 @@ class ConsolidationTests(unittest.TestCase):
         self.assertEqual(grouped[1][0], "Produits laitiers et œufs")
 
 
+def _item(name, quantity, aisle="Fruits et légumes", order=1, unit="pc", note=None):
+    return ShoppingItem(
+        ingredient_name=name,
+        aisle_name=aisle,
+        aisle_order=order,
+        unit=unit,
+        quantity=quantity,
+        note=note,
+    )
+
+
+class ShoppingListModelTests(unittest.TestCase):
+    def setUp(self):
+        self.salad = [_item("Tomate", 2), _item("Oignon", 1)]
+        self.sandwich = [_item("Tomate", 1), _item("Pain", 1, "Boulangerie", 4)]
+
+    def test_matches_full_consolidation(self):
+        model = ShoppingListModel()
+        model.add_recipe(1, self.salad, 1.5)
+        model.add_recipe(2, self.sandwich)
+        model.add_manual_item("manual-0", _item("Oignon", 2, note="rouge"))
+
+        expected = consolidate_items(
+            [
+                *(_item(i.ingredient_name, i.quantity * 1.5, i.aisle_name, i.aisle_order)
+                  for i in self.salad),
+                *self.sandwich,
+                _item("Oignon", 2, note="rouge"),
+            ]
+        )
+        self.assertEqual(model.items(), expected)
+        self.assertEqual(model.grouped(), group_by_aisle(expected))
+
+    def test_reports_changed_aisles(self):
+        model = ShoppingListModel()
+        self.assertEqual(model.add_recipe(1, self.salad), {"Fruits et légumes"})
+        self.assertEqual(
+            model.add_recipe(2, self.sandwich), {"Fruits et légumes", "Boulangerie"}
+        )
+        self.assertEqual(model.rescale_recipe(1, 2.0), {"Fruits et légumes"})
+        self.assertEqual(
+            model.add_manual_item("manual-0", _item("Lait", 1, "Produits laitiers et œufs", 3)),
+            {"Produits laitiers et œufs"},
+        )
+        self.assertEqual(model.remove_manual_item("manual-0"), {"Produits laitiers et œufs"})
+        self.assertEqual(model.remove_manual_item("missing"), set())
+
+    def test_remove_and_rescale_update_totals(self):
+        model = ShoppingListModel()
+        model.add_recipe(1, [_item("Farine", 0.1)])
+        model.add_recipe(2, [_item("Farine", 0.2)])
+        model.rescale_recipe(2, 3.0)
+        self.assertAlmostEqual(model.items()[0].quantity, 0.7)
+
+        model.remove_recipe(2)
+        self.assertEqual(model.items()[0].quantity, 0.1)
+
+        model.remove_recipe(1)
+        self.assertEqual(model.items(), [])
+        self.assertEqual(model.aisle_names(), [])
+
+    def test_notes_follow_consolidate_items(self):
+        model = ShoppingListModel()
+        model.add_manual_item("a", _item("Oignon", 1, note="haché"))
+        model.add_manual_item("b", _item("Oignon", 1, note="émincé"))
+        self.assertIsNone(model.items()[0].note)
+
+        model.remove_manual_item("b")
+        self.assertEqual(model.items()[0].note, "haché")
+
+
+class DatabaseConsolidationTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.tmpdir.name) / "test.db")
+        initialize_database(self.db_path)
+        aisles = list_aisles(db_path=self.db_path)
+        unit_id = list_units(db_path=self.db_path)[0]["id"]
+        tomato = create_ingredient(
+            "Tomate", aisles[0]["id"], unit_id, [], db_path=self.db_path
+        )
+        bread = create_ingredient(
+            "Pain", aisles[3]["id"], unit_id, [], db_path=self.db_path
+        )
+        self.salad_id = create_recipe(
+            "Salade", None, servings=2, db_path=self.db_path
+        )
+        self.sandwich_id = create_recipe("Sandwich", None, db_path=self.db_path)
+        add_recipe_ingredient(self.salad_id, tomato, 4, db_path=self.db_path)
+        add_recipe_ingredient(self.sandwich_id, tomato, 1, db_path=self.db_path)
+        add_recipe_ingredient(self.sandwich_id, bread, 1, db_path=self.db_path)
+
+    def tearDown(self):
+        close_all_connections()
+        self.tmpdir.cleanup()
+
+    def test_matches_python_consolidation(self):
+        selections = [(self.salad_id, 1.5), (self.sandwich_id, 2.0)]
+        rows = list_ingredients_for_recipes(
+            [recipe_id for recipe_id, _ in selections], db_path=self.db_path
+        )
+        items = [
+            ShoppingItem(
+                ingredient_name=row["ingredient_name"],
+                aisle_name=row["aisle_name"],
+                aisle_order=row["aisle_order"],
+                unit=row["unit_name"],
+                quantity=row["quantity"] * multiplier,
+            )
+            for recipe_id, multiplier in selections
+            for row in rows[recipe_id]
+        ]
+
+        consolidated = consolidate_selection_in_db(selections, db_path=self.db_path)
+
+        self.assertEqual(consolidated, consolidate_items(items))
+        self.assertEqual(
+            [(item.ingredient_name, item.quantity) for item in consolidated],
+            [("Tomate", 8.0), ("Pain", 2.0)],
+        )
+
+    def test_merges_manual_items(self):
+        manual = ShoppingItem(
+            ingredient_name="Tomate",
+            aisle_name="Fruits et légumes",
+            aisle_order=1,
+            unit="cuillère à café",
+            quantity=3,
+        )
+        consolidated = consolidate_selection_in_db(
+            [(self.sandwich_id, 1.0)], [manual], db_path=self.db_path
+        )
+        tomato = next(item for item in consolidated if item.ingredient_name == "Tomate")
+        self.assertEqual(tomato.quantity, 4)
+
+    def test_empty_selection(self):
+        self.assertEqual(consolidate_selection_in_db([], db_path=self.db_path), [])
+
+
 if __name__ == "__main__":
     unittest.main()
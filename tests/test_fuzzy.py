@@ -0,0 +1,46 @@
+import unittest
+
+from services.fuzzy import FuzzyMatch, TrigramIndex, trigrams, unambiguous_match
+
+
+class TrigramIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.index = TrigramIndex(
+            [
+                (1, "Tomate"),
+                (2, "Tomme de Savoie"),
+                (3, "Pomme de terre"),
+                (3, "Patate"),
+                (4, "Bœuf haché"),
+            ]
+        )
+
+    def test_trigrams_ignore_case_and_accents(self):
+        self.assertEqual(trigrams("BŒUF"), trigrams("boeuf"))
+        self.assertEqual(trigrams("   "), set())
+
+    def test_search_ranks_close_names_first(self):
+        matches = self.index.search("tomatte", threshold=0.3)
+        self.assertEqual([match.id for match in matches], [1])
+        self.assertGreater(matches[0].score, 0.7)
+
+    def test_names_sharing_an_id_count_once(self):
+        matches = self.index.search("patates", threshold=0.3)
+        self.assertEqual([match.name for match in matches], ["Patate"])
+
+    def test_unrelated_query_has_no_match(self):
+        self.assertEqual(self.index.search("xyz"), [])
+        self.assertEqual(self.index.search("boeuf hache")[0].id, 4)
+
+    def test_unambiguous_match_needs_score_and_margin(self):
+        first = FuzzyMatch(1, "Tomate", 0.8)
+        self.assertEqual(unambiguous_match([first], 0.7, 0.1), first)
+        self.assertIsNone(unambiguous_match([first], 0.9, 0.1))
+        self.assertIsNone(
+            unambiguous_match([first, FuzzyMatch(2, "Tomates", 0.75)], 0.7, 0.1)
+        )
+        self.assertIsNone(unambiguous_match([], 0.7, 0.1))
+
+
+if __name__ == "__main__":
+    unittest.main()
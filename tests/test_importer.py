@@ -1,18 +1,38 @@
+import io
 import json
+import os
 import tempfile
 import unittest
 from pathlib import Path
 
 from db.init_db import initialize_database
-from db.connection import get_connection
+from db.connection import close_all_connections, get_connection
 from services.importer import (
     IngredientImportError,
+    INGREDIENTS,
+    RECIPES,
+    RecipeImportError,
+    import_directory,
     import_ingredients_from_json,
+    import_recipes_from_json,
+    iter_ingredient_json,
+    iter_recipe_json,
+    ImportIssue,
     parse_ingredient_json,
+    parse_recipe_json,
+    validate_ingredient_json,
+    validate_recipe_json,
 )
+from services import ingredients as ingredient_service
+from services.export import export_ingredients_ndjson, export_recipes_ndjson
+from services import recipes as recipes_service
+from services.json_stream import iter_array_items
 
 
 class ImporterTests(unittest.TestCase):
+    def tearDown(self):
+        close_all_connections()
+
     def test_parse_ingredient_json_valid(self):
         payload = json.dumps(
             {
@@ -58,7 +78,7 @@ class ImporterTests(unittest.TestCase):
             )
 
             imported = import_ingredients_from_json(json_path, str(db_path))
-            self.assertEqual(imported, 1)
+            self.assertEqual(imported.records, 1)
 
             with get_connection(str(db_path)) as connection:
                 ingredient = connection.execute(
@@ -79,5 +99,1216 @@ class ImporterTests(unittest.TestCase):
             self.assertEqual([row["name"] for row in seasons], ["été"])
 
 
+class StreamingImportTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.tmpdir.name) / "test.db")
+        initialize_database(self.db_path)
+
+    def tearDown(self):
+        close_all_connections()
+        self.tmpdir.cleanup()
+
+    def _write(self, name, payload):
+        path = Path(self.tmpdir.name) / name
+        path.write_text(payload, encoding="utf-8")
+        return path
+
+    def test_array_items_survive_chunk_boundaries(self):
+        document = json.dumps(
+            {
+                "meta": {"nested": [1, 2, {"x": "]}"}]},
+                "recipes": [{"name": f"Recette {index}", "n": 1.25e3} for index in range(50)],
+                "after": None,
+            }
+        )
+        items = list(iter_array_items(io.StringIO(document), "recipes", chunk_size=7))
+        self.assertEqual(items, json.loads(document)["recipes"])
+
+    def test_streaming_parse_matches_full_parse(self):
+        payload = json.dumps(
+            {
+                "recipes": [
+                    {
+                        "name": "Ratatouille",
+                        "instructions": " Mijoter. ",
+                        "time": "45",
+                        "difficulty": "facile",
+                        "servings": 4,
+                        "ingredients": [{"name": "Courgette", "quantity": 2}],
+                    },
+                    {"name": "Salade"},
+                ]
+            }
+        )
+        self.assertEqual(
+            list(iter_recipe_json(io.StringIO(payload))), parse_recipe_json(payload)
+        )
+
+    def test_streaming_errors_match_full_parse(self):
+        payloads = [
+            '{"ingredients": [',
+            '["ingredients"]',
+            '{"ingredients": {}}',
+            '{"other": []}',
+            '{"ingredients": []} trailing',
+            '{"ingredients": [{"name": "Lait"}]}',
+            '{"ingredients": [{"name": "Lait", "aisle": "A", "unit": "u", "seasons": [1]}]}',
+        ]
+        for payload in payloads:
+            with self.subTest(payload=payload):
+                with self.assertRaises(IngredientImportError) as expected:
+                    parse_ingredient_json(payload)
+                with self.assertRaises(IngredientImportError) as streamed:
+                    list(iter_ingredient_json(io.StringIO(payload)))
+                self.assertEqual(str(streamed.exception), str(expected.exception))
+
+        with self.assertRaises(RecipeImportError) as streamed:
+            list(iter_recipe_json(io.StringIO('{"ingredients": []}')))
+        self.assertEqual(
+            str(streamed.exception), "Le JSON doit contenir une liste 'recipes'."
+        )
+
+    def test_streaming_import_writes_in_batches(self):
+        ingredients_path = self._write(
+            "ingredients.json",
+            json.dumps(
+                {
+                    "ingredients": [
+                        {
+                            "name": f"Ingrédient {index}",
+                            "aisle": "Fruits et légumes",
+                            "unit": "pièce",
+                            "seasons": ["été"],
+                        }
+                        for index in range(7)
+                    ]
+                }
+            ),
+        )
+        recipes_path = self._write(
+            "recipes.json",
+            json.dumps(
+                {
+                    "recipes": [
+                        {
+                            "name": f"Recette {index}",
+                            "ingredients": [
+                                {"name": f"Ingrédient {index}", "quantity": 1}
+                            ],
+                        }
+                        for index in range(7)
+                    ]
+                }
+            ),
+        )
+
+        self.assertEqual(
+            import_ingredients_from_json(
+                ingredients_path, self.db_path, stream=True, batch_size=3
+            ).records,
+            7,
+        )
+        self.assertEqual(
+            import_recipes_from_json(
+                recipes_path, self.db_path, stream=True, batch_size=3
+            ).records,
+            7,
+        )
+        with get_connection(self.db_path) as connection:
+            lines = connection.execute(
+                "SELECT COUNT(*) FROM recipe_ingredient;"
+            ).fetchone()[0]
+        self.assertEqual(lines, 7)
+
+    def test_streaming_import_rolls_back_on_late_error(self):
+        recipes_path = self._write(
+            "recipes.json",
+            json.dumps({"recipes": [{"name": f"Recette {index}"} for index in range(5)]})
+            .replace("]}", ", 42]}"),
+        )
+        with self.assertRaises(RecipeImportError):
+            import_recipes_from_json(
+                recipes_path, self.db_path, stream=True, batch_size=2
+            )
+        with get_connection(self.db_path) as connection:
+            count = connection.execute("SELECT COUNT(*) FROM recipe;").fetchone()[0]
+        self.assertEqual(count, 0)
+
+
+def _ingredient(name, aisle, seasons):
+    return {"name": name, "aisle": aisle, "unit": "pièce", "seasons": seasons}
+
+
+class BulkUpsertTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.tmpdir.name) / "test.db")
+        initialize_database(self.db_path)
+
+    def tearDown(self):
+        close_all_connections()
+        self.tmpdir.cleanup()
+
+    def _import(self, ingredients, **kwargs):
+        path = Path(self.tmpdir.name) / "ingredients.json"
+        path.write_text(json.dumps({"ingredients": ingredients}), encoding="utf-8")
+        return import_ingredients_from_json(path, self.db_path, **kwargs)
+
+    def _rows(self):
+        with get_connection(self.db_path) as connection:
+            return {
+                row["name"]: (row["aisle"], row["seasons"])
+                for row in connection.execute(
+                    """
+                    SELECT
+                        ingredient.name,
+                        aisle.name AS aisle,
+                        (
+                            SELECT group_concat(season.name, ',')
+                            FROM ingredient_season
+                            JOIN season ON season.id = ingredient_season.season_id
+                            WHERE ingredient_season.ingredient_id = ingredient.id
+                        ) AS seasons
+                    FROM ingredient
+                    JOIN aisle ON aisle.id = ingredient.default_aisle_id;
+                    """
+                )
+            }
+
+    def test_existing_ingredients_are_updated_in_place(self):
+        self._import(
+            [
+                _ingredient("Tomate", "Fruits et légumes", ["été"]),
+                _ingredient("Pain", "Boulangerie", ["hiver"]),
+            ]
+        )
+        with get_connection(self.db_path) as connection:
+            tomato_id = connection.execute(
+                "SELECT id FROM ingredient WHERE name = 'Tomate';"
+            ).fetchone()["id"]
+
+        self._import([_ingredient("Tomate", "Épicerie", ["automne"])])
+
+        rows = self._rows()
+        self.assertEqual(rows["Tomate"], ("Épicerie", "automne"))
+        self.assertEqual(rows["Pain"], ("Boulangerie", "hiver"))
+        with get_connection(self.db_path) as connection:
+            self.assertEqual(
+                connection.execute(
+                    "SELECT id FROM ingredient WHERE name = 'Tomate';"
+                ).fetchone()["id"],
+                tomato_id,
+            )
+
+    def test_seasons_are_rewritten_only_when_they_change(self):
+        def season_writes():
+            with get_connection(self.db_path) as connection:
+                return connection.execute(
+                    """
+                    SELECT version FROM change_log
+                    WHERE table_name = 'ingredient_season';
+                    """
+                ).fetchone()[0]
+
+        self._import([_ingredient("Tomate", "Fruits et légumes", ["été"])])
+        writes = season_writes()
+
+        self._import([_ingredient("Tomate", "Épicerie", ["été"])])
+        self.assertEqual(self._rows(), {"Tomate": ("Épicerie", "été")})
+        self.assertEqual(season_writes(), writes)
+
+        self._import([_ingredient("Tomate", "Épicerie", ["hiver"])])
+        self.assertEqual(self._rows(), {"Tomate": ("Épicerie", "hiver")})
+        self.assertGreater(season_writes(), writes)
+        with get_connection(self.db_path) as connection:
+            mask = connection.execute(
+                "SELECT season_mask FROM ingredient WHERE name = 'Tomate';"
+            ).fetchone()[0]
+            hiver = connection.execute(
+                "SELECT id FROM season WHERE name = 'hiver';"
+            ).fetchone()[0]
+        self.assertEqual(mask, 1 << (hiver - 1))
+
+    def test_repeated_names_in_a_batch_keep_the_last_record(self):
+        imported = self._import(
+            [
+                _ingredient("Lait", "Épicerie", ["été"]),
+                _ingredient("Lait", "Boulangerie", ["hiver", "hiver"]),
+            ]
+        )
+        self.assertEqual(imported.total, 2)
+        self.assertEqual(self._rows(), {"Lait": ("Boulangerie", "hiver")})
+
+    def test_names_match_ignoring_case_accents_and_ligatures(self):
+        self._import(
+            [_ingredient("Bœuf", "VIANDES ET FRUITS DE MER", ["Ete"])]
+        )
+        self._import([_ingredient("boeuf", "epicerie", ["HIVER"])])
+        self.assertEqual(self._rows(), {"Bœuf": ("Épicerie", "hiver")})
+
+        recipes = Path(self.tmpdir.name) / "recipes.json"
+        recipes.write_text(
+            json.dumps(
+                {
+                    "recipes": [
+                        {
+                            "name": "Pot-au-feu",
+                            "ingredients": [{"name": "BOEUF", "quantity": 1}],
+                        }
+                    ]
+                }
+            ),
+            encoding="utf-8",
+        )
+        self.assertEqual(import_recipes_from_json(recipes, self.db_path).records, 1)
+        names = [
+            row["name"]
+            for row in ingredient_service.search_ingredients(
+                "uf", db_path=self.db_path
+            )
+        ]
+        self.assertEqual(names, [])
+        names = [
+            row["name"]
+            for row in ingredient_service.search_ingredients(
+                "BŒ", db_path=self.db_path
+            )
+        ]
+        self.assertEqual(names, ["Bœuf"])
+
+    def test_batches_larger_than_the_parameter_limit(self):
+        ingredients = [
+            {
+                "name": f"Ingrédient {index}",
+                "aisle": "Épicerie",
+                "unit": "pièce",
+                "seasons": ["été", "hiver", "automne"],
+            }
+            for index in range(1200)
+        ]
+        self.assertEqual(self._import(ingredients, batch_size=1200).records, 1200)
+        with get_connection(self.db_path) as connection:
+            links = connection.execute(
+                "SELECT COUNT(*) FROM ingredient_season;"
+            ).fetchone()[0]
+        self.assertEqual(links, 3600)
+
+
+class DirectoryImportTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmpdir.name)
+        self.db_path = str(self.root / "test.db")
+        initialize_database(self.db_path)
+        self.catalog = self.root / "catalog"
+        (self.catalog / "Recettes").mkdir(parents=True)
+        (self.catalog / "Ingrédients").mkdir()
+        # The recipe file sorts first, so ordering must come from its kind.
+        self._write(
+            "Recettes/a_recettes.json",
+            {
+                "recipes": [
+                    {
+                        "name": "Salade",
+                        "ingredients": [
+                            {"name": "Tomate", "quantity": 2},
+                            {"name": "Pain", "quantity": 1},
+                        ],
+                    }
+                ]
+            },
+        )
+        self._write(
+            "Ingrédients/legumes.json",
+            {"ingredients": [_ingredient("Tomate", "Fruits et légumes", ["été"])]},
+        )
+        self._write(
+            "Ingrédients/pain.json",
+            {"ingredients": [_ingredient("Pain", "Boulangerie", [])]},
+        )
+
+    def tearDown(self):
+        close_all_connections()
+        self.tmpdir.cleanup()
+
+    def _write(self, name, document):
+        (self.catalog / name).write_text(json.dumps(document), encoding="utf-8")
+
+    def _count(self, table):
+        with get_connection(self.db_path) as connection:
+            return connection.execute(
+                f"SELECT COUNT(*) FROM {table};"
+            ).fetchone()[0]
+
+    def test_imports_ingredients_before_recipes(self):
+        report = import_directory(self.catalog, self.db_path, workers=2)
+
+        self.assertEqual(
+            [(result.path.name, result.kind) for result in report.files],
+            [
+                ("legumes.json", INGREDIENTS),
+                ("pain.json", INGREDIENTS),
+                ("a_recettes.json", RECIPES),
+            ],
+        )
+        self.assertEqual(report.count(INGREDIENTS), 2)
+        self.assertEqual(report.count(RECIPES), 1)
+        self.assertEqual(self._count("recipe_ingredient"), 2)
+
+    def test_any_invalid_file_rolls_back_the_whole_directory(self):
+        self._write(
+            "Ingrédients/zz_invalide.json", {"ingredients": [{"name": "Lait"}]}
+        )
+
+        with self.assertRaises(IngredientImportError) as raised:
+            import_directory(self.catalog, self.db_path, workers=2)
+
+        self.assertTrue(str(raised.exception).startswith("zz_invalide.json: "))
+        self.assertEqual(self._count("ingredient"), 0)
+
+    def test_unknown_reference_rolls_back_earlier_files(self):
+        self._write(
+            "Recettes/b_recettes.json",
+            {
+                "recipes": [
+                    {
+                        "name": "Soupe",
+                        "ingredients": [{"name": "Navet", "quantity": 1}],
+                    }
+                ]
+            },
+        )
+
+        with self.assertRaises(IngredientImportError) as raised:
+            import_directory(self.catalog, self.db_path, workers=1)
+
+        self.assertIn("b_recettes.json", str(raised.exception))
+        self.assertEqual(self._count("ingredient"), 0)
+        self.assertEqual(self._count("recipe"), 0)
+
+
+class ImportManifestTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmpdir.name)
+        self.db_path = str(self.root / "test.db")
+        initialize_database(self.db_path)
+        self.catalog = self.root / "catalog"
+        self.catalog.mkdir()
+        self._write_ingredients(
+            [
+                _ingredient("Tomate", "Fruits et légumes", ["été"]),
+                _ingredient("Pain", "Boulangerie", []),
+            ]
+        )
+        self._write(
+            "recettes.json",
+            {
+                "recipes": [
+                    {
+                        "name": "Salade",
+                        "ingredients": [{"name": "Tomate", "quantity": 2}],
+                    }
+                ]
+            },
+        )
+
+    def tearDown(self):
+        close_all_connections()
+        self.tmpdir.cleanup()
+
+    def _write(self, name, document):
+        (self.catalog / name).write_text(json.dumps(document), encoding="utf-8")
+
+    def _write_ingredients(self, ingredients):
+        self._write("ingredients.json", {"ingredients": ingredients})
+
+    def _import(self, **kwargs):
+        return import_directory(self.catalog, self.db_path, workers=1, **kwargs)
+
+    def _aisle_of(self, name):
+        with get_connection(self.db_path) as connection:
+            return connection.execute(
+                """
+                SELECT aisle.name
+                FROM ingredient
+                JOIN aisle ON aisle.id = ingredient.default_aisle_id
+                WHERE ingredient.name = ?;
+                """,
+                (name,),
+            ).fetchone()[0]
+
+    def test_unchanged_files_are_skipped(self):
+        self._import()
+        report = self._import()
+
+        self.assertEqual(report.skipped_files, 2)
+        self.assertEqual(report.count(INGREDIENTS) + report.count(RECIPES), 0)
+        with get_connection(self.db_path) as connection:
+            recipes = connection.execute(
+                "SELECT COUNT(*) FROM recipe;"
+            ).fetchone()[0]
+        self.assertEqual(recipes, 1)
+
+    def test_only_changed_records_are_written(self):
+        self._import()
+        self._write_ingredients(
+            [
+                _ingredient("Tomate", "Épicerie", ["été"]),
+                _ingredient("Pain", "Boulangerie", []),
+            ]
+        )
+
+        report = self._import()
+
+        ingredients = next(
+            result for result in report.files if result.kind == INGREDIENTS
+        )
+        self.assertEqual(
+            (ingredients.records, ingredients.skipped_records), (1, 1)
+        )
+        self.assertEqual(report.skipped_files, 1)
+        self.assertEqual(self._aisle_of("Tomate"), "Épicerie")
+
+    def test_touched_file_with_same_content_is_skipped(self):
+        self._import()
+        self._write_ingredients(
+            [
+                _ingredient("Tomate", "Fruits et légumes", ["été"]),
+                _ingredient("Pain", "Boulangerie", []),
+            ]
+        )
+        path = self.catalog / "ingredients.json"
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        self.assertEqual(self._import().skipped_files, 2)
+
+    def test_edited_records_are_rewritten(self):
+        self._import()
+        tomato_id = next(
+            row["id"]
+            for row in ingredient_service.list_ingredients(db_path=self.db_path)
+            if row["name"] == "Tomate"
+        )
+        aisle_id = ingredient_service.list_aisles(db_path=self.db_path)[-1]["id"]
+        ingredient_service.update_ingredient(
+            tomato_id, "Tomate", aisle_id, 1, [], db_path=self.db_path
+        )
+
+        # The hand edit drops the ingredient files from the manifest, so the
+        # directory import agrees with a direct import of the file.
+        report = self._import()
+        ingredients = next(
+            result for result in report.files if result.kind == INGREDIENTS
+        )
+        self.assertFalse(ingredients.unchanged)
+        self.assertEqual(
+            (ingredients.records, ingredients.skipped_records), (1, 1)
+        )
+        self.assertEqual(report.skipped_files, 1)
+        self.assertEqual(self._aisle_of("Tomate"), "Fruits et légumes")
+        self.assertEqual(self._import().skipped_files, 2)
+
+    def test_deleted_recipes_are_restored(self):
+        self._import()
+        recipe_id = recipes_service.list_recipes(db_path=self.db_path)[0]["id"]
+        recipes_service.delete_recipe(recipe_id, db_path=self.db_path)
+
+        self._import()
+        names = [
+            recipe["name"]
+            for recipe in recipes_service.list_recipes(db_path=self.db_path)
+        ]
+        self.assertEqual(names, ["Salade"])
+
+    def test_force_rewrites_everything(self):
+        self._import()
+        report = self._import(force=True)
+
+        self.assertEqual(report.skipped_files, 0)
+        self.assertEqual(report.skipped_records, 0)
+        self.assertEqual(report.count(INGREDIENTS), 2)
+
+
+class RecipeUpsertTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmpdir.name)
+        self.db_path = str(self.root / "test.db")
+        initialize_database(self.db_path)
+        path = self.root / "ingredients.json"
+        path.write_text(
+            json.dumps(
+                {
+                    "ingredients": [
+                        _ingredient(name, "Épicerie", [])
+                        for name in ("Tomate", "Huile", "Sel")
+                    ]
+                }
+            ),
+            encoding="utf-8",
+        )
+        import_ingredients_from_json(path, self.db_path)
+
+    def tearDown(self):
+        close_all_connections()
+        self.tmpdir.cleanup()
+
+    def _import(self, recipes):
+        path = self.root / "recipes.json"
+        path.write_text(json.dumps({"recipes": recipes}), encoding="utf-8")
+        return import_recipes_from_json(path, self.db_path)
+
+    def _recipes(self):
+        with get_connection(self.db_path) as connection:
+            return [
+                dict(row)
+                for row in connection.execute(
+                    "SELECT id, name, external_id FROM recipe ORDER BY id;"
+                )
+            ]
+
+    def _lines(self):
+        with get_connection(self.db_path) as connection:
+            return {
+                row["name"]: (row["id"], row["quantity"])
+                for row in connection.execute(
+                    """
+                    SELECT recipe_ingredient.id, ingredient.name, quantity
+                    FROM recipe_ingredient
+                    JOIN ingredient ON ingredient.id = recipe_ingredient.ingredient_id;
+                    """
+                )
+            }
+
+    def test_reimport_updates_instead_of_duplicating(self):
+        salad = {
+            "name": "Salade tomate",
+            "ingredients": [
+                {"name": "Tomate", "quantity": 2},
+                {"name": "Huile", "quantity": 1},
+            ],
+        }
+        self._import([salad])
+        before = self._lines()
+
+        salad["name"] = "  salade   TOMATE "
+        salad["ingredients"] = [
+            {"name": "Tomate", "quantity": 3},
+            {"name": "Sel", "quantity": 1},
+        ]
+        self._import([salad])
+
+        recipes = self._recipes()
+        self.assertEqual(len(recipes), 1)
+        self.assertEqual(recipes[0]["name"], "salade   TOMATE")
+        after = self._lines()
+        self.assertEqual(set(after), {"Tomate", "Sel"})
+        self.assertEqual(after["Tomate"], (before["Tomate"][0], 3.0))
+
+    def test_recipes_are_matched_by_json_id(self):
+        self._import([{"name": "Salade", "ingredients": []}])
+        self._import([{"id": 42, "name": "Salade", "ingredients": []}])
+        self._import([{"id": "42", "name": "Salade composée", "ingredients": []}])
+        self._import([{"id": "43", "name": "Salade composée", "ingredients": []}])
+
+        self.assertEqual(
+            [(row["name"], row["external_id"]) for row in self._recipes()],
+            [("Salade composée", "42"), ("Salade composée", "43")],
+        )
+
+    def test_unlinked_recipe_is_adopted_by_one_id_only(self):
+        self._import([{"name": "Salade", "ingredients": []}])
+        imported = self._import(
+            [
+                {"id": "a", "name": "Salade", "ingredients": []},
+                {"id": "b", "name": "Salade", "ingredients": []},
+            ]
+        )
+
+        self.assertEqual(imported.records, 2)
+        self.assertEqual(
+            [(row["name"], row["external_id"]) for row in self._recipes()],
+            [("Salade", "a"), ("Salade", "b")],
+        )
+
+    def test_invalid_json_id_is_rejected(self):
+        with self.assertRaises(RecipeImportError):
+            parse_recipe_json(
+                json.dumps({"recipes": [{"name": "Salade", "id": True}]})
+            )
+
+    def test_service_keeps_name_key(self):
+        recipe_id = recipes_service.create_recipe(
+            "Œufs  brouillés", None, db_path=self.db_path
+        )
+        self._import([{"name": "oeufs brouilles", "ingredients": []}])
+
+        self.assertEqual([row["id"] for row in self._recipes()], [recipe_id])
+
+
+class IngredientAliasTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmpdir.name)
+        self.db_path = str(self.root / "test.db")
+        initialize_database(self.db_path)
+        self._import_ingredients(
+            [
+                {
+                    "name": "Tomate",
+                    "aisle": "Fruits et légumes",
+                    "unit": "pièce",
+                    "aliases": ["tomates", "Tomato"],
+                },
+                {
+                    "name": "Pomme de terre",
+                    "aisle": "Fruits et légumes",
+                    "unit": "pièce",
+                    "aliases": ["Patate"],
+                },
+            ]
+        )
+
+    def tearDown(self):
+        close_all_connections()
+        self.tmpdir.cleanup()
+
+    def _import_ingredients(self, ingredients):
+        path = self.root / "ingredients.json"
+        path.write_text(json.dumps({"ingredients": ingredients}), encoding="utf-8")
+        return import_ingredients_from_json(path, self.db_path)
+
+    def _aliases(self):
+        with get_connection(self.db_path) as connection:
+            return {
+                row["name"]: row["ingredient"]
+                for row in connection.execute(
+                    """
+                    SELECT ingredient_alias.name, ingredient.name AS ingredient
+                    FROM ingredient_alias
+                    JOIN ingredient
+                        ON ingredient.id = ingredient_alias.ingredient_id;
+                    """
+                )
+            }
+
+    def test_recipes_resolve_aliases(self):
+        path = self.root / "recipes.json"
+        path.write_text(
+            json.dumps(
+                {
+                    "recipes": [
+                        {
+                            "name": "Gratin",
+                            "ingredients": [
+                                {"name": "TOMATES", "quantity": 2},
+                                {"name": "patate", "quantity": 4},
+                                {"name": "Tomate", "quantity": 1},
+                            ],
+                        }
+                    ]
+                }
+            ),
+            encoding="utf-8",
+        )
+        self.assertTrue(validate_recipe_json(path, self.db_path).valid)
+        self.assertEqual(import_recipes_from_json(path, self.db_path).records, 1)
+        recipe_id = recipes_service.list_recipes(db_path=self.db_path)[0]["id"]
+        lines = {
+            row["ingredient_name"]: row["quantity"]
+            for row in recipes_service.list_recipe_ingredients(
+                recipe_id, db_path=self.db_path
+            )
+        }
+        self.assertEqual(lines, {"Tomate": 3, "Pomme de terre": 4})
+
+    def test_search_matches_aliases(self):
+        names = [
+            row["name"]
+            for row in ingredient_service.search_ingredients(
+                "pat", db_path=self.db_path
+            )
+        ]
+        self.assertEqual(names, ["Pomme de terre"])
+
+    def test_search_matches_the_start_of_any_word(self):
+        def search(query):
+            return [
+                row["name"]
+                for row in ingredient_service.search_ingredients(
+                    query, db_path=self.db_path
+                )
+            ]
+
+        self.assertEqual(search("terre"), ["Pomme de terre"])
+        self.assertEqual(search("TER pom"), ["Pomme de terre"])
+        self.assertEqual(search("erre"), [])
+        self.assertEqual(search("tomate"), ["Tomate"])
+
+        ingredient_id = next(
+            row["id"]
+            for row in ingredient_service.list_ingredients(db_path=self.db_path)
+            if row["name"] == "Tomate"
+        )
+        ingredient_service.update_ingredient(
+            ingredient_id, "Tomate cerise", 1, 1, [], db_path=self.db_path
+        )
+        self.assertEqual(search("cerise"), ["Tomate cerise"])
+        ingredient_service.delete_ingredient(ingredient_id, db_path=self.db_path)
+        self.assertEqual(search("cerise"), [])
+        self.assertEqual(search("tomato"), [])
+
+    def test_aliases_are_kept_unless_the_record_lists_them(self):
+        self._import_ingredients(
+            [{"name": "Tomate", "aisle": "Épicerie", "unit": "pièce"}]
+        )
+        self.assertEqual(
+            self._aliases(),
+            {"tomates": "Tomate", "Tomato": "Tomate", "Patate": "Pomme de terre"},
+        )
+        self._import_ingredients(
+            [
+                {
+                    "name": "Patate douce",
+                    "aisle": "Fruits et légumes",
+                    "unit": "pièce",
+                    "aliases": ["patate"],
+                },
+                {
+                    "name": "Tomate",
+                    "aisle": "Épicerie",
+                    "unit": "pièce",
+                    "aliases": [],
+                },
+            ]
+        )
+        self.assertEqual(self._aliases(), {"patate": "Patate douce"})
+
+    def test_invalid_alias_is_rejected(self):
+        with self.assertRaises(IngredientImportError) as context:
+            parse_ingredient_json(
+                json.dumps(
+                    {
+                        "ingredients": [
+                            {
+                                "name": "Tomate",
+                                "aisle": "Épicerie",
+                                "unit": "pièce",
+                                "aliases": ["tomates", ""],
+                            }
+                        ]
+                    }
+                )
+            )
+        self.assertEqual(context.exception.field, "aliases[2]")
+
+
+class FuzzyImportTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmpdir.name)
+        self.db_path = str(self.root / "test.db")
+        initialize_database(self.db_path)
+        for name in ("Tomate", "Carotte", "Carottes râpées"):
+            ingredient_service.create_ingredient(name, 1, 1, [], db_path=self.db_path)
+        self.path = self.root / "recipes.json"
+
+    def tearDown(self):
+        close_all_connections()
+        self.tmpdir.cleanup()
+
+    def _write(self, *names):
+        self.path.write_text(
+            json.dumps(
+                {
+                    "recipes": [
+                        {
+                            "name": "Soupe",
+                            "ingredients": [
+                                {"name": name, "quantity": 1} for name in names
+                            ],
+                        }
+                    ]
+                }
+            ),
+            encoding="utf-8",
+        )
+
+    def test_unknown_names_fail_without_fuzzy(self):
+        self._write("Tomatte")
+        with self.assertRaises(IngredientImportError) as context:
+            import_recipes_from_json(self.path, self.db_path)
+        self.assertNotIn("Suggestions", str(context.exception))
+
+    def test_fuzzy_lists_ranked_suggestions(self):
+        self._write("Carote")
+        with self.assertRaises(IngredientImportError) as context:
+            import_recipes_from_json(self.path, self.db_path, fuzzy=True)
+        self.assertIn("Suggestions: Carotte", str(context.exception))
+
+        report = validate_recipe_json(self.path, self.db_path, fuzzy=True)
+        self.assertIn("Suggestions: Carotte", report.issues[0].reason)
+
+    def test_auto_resolve_takes_only_unambiguous_matches(self):
+        self._write("Tomatte", "tomatte")
+        self.assertTrue(
+            validate_recipe_json(
+                self.path, self.db_path, fuzzy=True, auto_resolve=True
+            ).valid
+        )
+        self.assertEqual(
+            import_recipes_from_json(
+                self.path, self.db_path, fuzzy=True, auto_resolve=True
+            ).records,
+            1,
+        )
+        recipe_id = recipes_service.list_recipes(db_path=self.db_path)[0]["id"]
+        lines = recipes_service.list_recipe_ingredients(recipe_id, db_path=self.db_path)
+        self.assertEqual(
+            [(row["ingredient_name"], row["quantity"]) for row in lines],
+            [("Tomate", 2)],
+        )
+
+        self._write("Carottes")
+        with self.assertRaises(IngredientImportError):
+            import_recipes_from_json(
+                self.path, self.db_path, fuzzy=True, auto_resolve=True
+            )
+
+
+class CheckpointImportTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmpdir.name)
+        self.db_path = str(self.root / "test.db")
+        initialize_database(self.db_path)
+        path = self.root / "ingredients.json"
+        path.write_text(
+            json.dumps({"ingredients": [_ingredient("Tomate", "Épicerie", [])]}),
+            encoding="utf-8",
+        )
+        import_ingredients_from_json(path, self.db_path)
+        self.recipes_path = self.root / "recipes.json"
+        recipes = [
+            {
+                "name": f"Recette {index}",
+                "ingredients": [
+                    {"name": "Navet" if index == 7 else "Tomate", "quantity": 1}
+                ],
+            }
+            for index in range(1, 9)
+        ]
+        self.recipes_path.write_text(
+            json.dumps({"recipes": recipes}), encoding="utf-8"
+        )
+
+    def tearDown(self):
+        close_all_connections()
+        self.tmpdir.cleanup()
+
+    def _query(self, sql):
+        with get_connection(self.db_path) as connection:
+            return [tuple(row) for row in connection.execute(sql)]
+
+    def test_failed_import_resumes_after_last_checkpoint(self):
+        for stream in (False, True):
+            with self.subTest(stream=stream):
+                with self.assertRaises(IngredientImportError):
+                    import_recipes_from_json(
+                        self.recipes_path,
+                        self.db_path,
+                        stream=stream,
+                        checkpoint_every=2,
+                    )
+                self.assertEqual(
+                    self._query("SELECT COUNT(*) FROM recipe;"), [(6,)]
+                )
+                self.assertEqual(
+                    self._query(
+                        "SELECT records_committed FROM import_checkpoint;"
+                    ),
+                    [(6,)],
+                )
+
+        # Resuming must not revisit committed records: a recipe removed in
+        # the meantime stays removed.
+        recipes_service.delete_recipe(
+            self._query("SELECT id FROM recipe WHERE name = 'Recette 1';")[0][0],
+            db_path=self.db_path,
+        )
+        ingredient_service.create_ingredient(
+            "Navet", 1, 1, [], db_path=self.db_path
+        )
+
+        imported = import_recipes_from_json(
+            self.recipes_path, self.db_path, stream=True, checkpoint_every=2
+        )
+
+        self.assertEqual((imported.resumed_records, imported.total), (6, 8))
+        self.assertEqual(self._query("SELECT COUNT(*) FROM recipe;"), [(7,)])
+        self.assertEqual(
+            self._query("SELECT COUNT(*) FROM import_checkpoint;"), [(0,)]
+        )
+
+
+class ValidationTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmpdir.name)
+        self.db_path = str(self.root / "test.db")
+        initialize_database(self.db_path)
+        ingredient_service.create_ingredient(
+            "Tomate", 1, 1, [], db_path=self.db_path
+        )
+
+    def tearDown(self):
+        close_all_connections()
+        self.tmpdir.cleanup()
+
+    def _write(self, payload):
+        path = self.root / "payload.json"
+        path.write_text(
+            payload if isinstance(payload, str) else json.dumps(payload),
+            encoding="utf-8",
+        )
+        return path
+
+    def test_reports_every_invalid_ingredient(self):
+        path = self._write(
+            {
+                "ingredients": [
+                    _ingredient("Pomme", "Fruits et légumes", ["été"]),
+                    {"name": "Lait", "unit": "pièce"},
+                    _ingredient("Poire", "Rayon inconnu", ["été", "mousson"]),
+                    "pas un objet",
+                ]
+            }
+        )
+        for stream in (False, True):
+            with self.subTest(stream=stream):
+                report = validate_ingredient_json(path, self.db_path, stream=stream)
+                self.assertEqual(report.records, 4)
+                self.assertFalse(report.valid)
+                self.assertEqual(
+                    [(issue.index, issue.field) for issue in report.issues],
+                    [(2, "aisle"), (3, "aisle"), (3, "seasons[2]"), (4, None)],
+                )
+                self.assertEqual(
+                    report.issues[1].reason, "Rayon inconnue: 'Rayon inconnu'."
+                )
+        self.assertEqual(self._count("ingredient"), 1)
+
+    def test_reports_unknown_recipe_ingredients(self):
+        path = self._write(
+            {
+                "recipes": [
+                    {
+                        "name": "Salade",
+                        "ingredients": [
+                            {"name": "tomate", "quantity": 1},
+                            {"name": "Navet", "quantity": 1},
+                        ],
+                    },
+                    {"name": "Soupe", "ingredients": [{"name": "Poireau"}]},
+                    {"name": "Tarte", "difficulty": "extrême"},
+                ]
+            }
+        )
+        report = validate_recipe_json(path, self.db_path)
+        self.assertEqual(
+            [(issue.index, issue.field) for issue in report.issues],
+            [
+                (1, "ingredients[2].name"),
+                (2, "ingredients[1].quantity"),
+                (3, "difficulty"),
+            ],
+        )
+        self.assertEqual(self._count("recipe"), 0)
+
+    def test_error_count_is_capped(self):
+        path = self._write({"ingredients": [{"name": "Lait"}] * 10})
+        report = validate_ingredient_json(path, self.db_path, max_errors=3)
+        self.assertTrue(report.truncated)
+        self.assertEqual(len(report.issues), 3)
+        self.assertEqual(report.records, 4)
+
+    def test_document_errors_are_reported(self):
+        path = self._write('{"ingredients": [{"name": "Lait"}')
+        for stream in (False, True):
+            with self.subTest(stream=stream):
+                report = validate_ingredient_json(path, self.db_path, stream=stream)
+                self.assertEqual(
+                    report.issues[-1],
+                    ImportIssue(None, None, "Le fichier JSON est invalide."),
+                )
+
+    def _count(self, table):
+        with get_connection(self.db_path) as connection:
+            return connection.execute(
+                f"SELECT COUNT(*) FROM {table};"
+            ).fetchone()[0]
+
+
+class NdjsonTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmpdir.name)
+        self.db_path = str(self.root / "test.db")
+        initialize_database(self.db_path)
+
+    def tearDown(self):
+        close_all_connections()
+        self.tmpdir.cleanup()
+
+    def _write(self, name, lines):
+        path = self.root / name
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return path
+
+    def test_imports_one_record_per_line(self):
+        path = self._write(
+            "ingredients.ndjson",
+            [
+                json.dumps(_ingredient("Tomate", "Fruits et légumes", ["été"])),
+                "",
+                json.dumps(_ingredient("Pain", "Boulangerie", [])),
+            ],
+        )
+        for stream in (False, True):
+            with self.subTest(stream=stream):
+                self.assertEqual(
+                    import_ingredients_from_json(
+                        path, self.db_path, stream=stream
+                    ).total,
+                    2,
+                )
+
+    def test_reports_the_invalid_line(self):
+        path = self._write(
+            "recipes.jsonl", ['{"name": "Salade"}', "", '{"name": "Soupe"']
+        )
+        with self.assertRaises(RecipeImportError) as raised:
+            import_recipes_from_json(path, self.db_path)
+        self.assertEqual(
+            str(raised.exception), "La ligne 3 n'est pas un JSON valide."
+        )
+
+        path = self._write("recipes.jsonl", ['{"name": "Salade"}', "{}"])
+        report = validate_recipe_json(path, self.db_path)
+        self.assertEqual(
+            [(issue.index, issue.field) for issue in report.issues], [(2, "name")]
+        )
+
+    def test_validation_reports_every_bad_line_by_line_number(self):
+        path = self._write(
+            "recipes.jsonl",
+            ['{"name": "Salade"}', "", '{"name": "Soupe"', "{}", '{"name": "Eau"}'],
+        )
+        report = validate_recipe_json(path, self.db_path)
+        self.assertEqual(report.records, 4)
+        self.assertEqual(
+            [(issue.index, issue.field) for issue in report.issues],
+            [(3, None), (4, "name")],
+        )
+        self.assertEqual(
+            report.issues[0].reason, "La ligne 3 n'est pas un JSON valide."
+        )
+
+    def test_directory_import_reads_shards(self):
+        shards = self.root / "shards"
+        shards.mkdir()
+        for index in range(3):
+            (shards / f"ingredients-{index}.ndjson").write_text(
+                json.dumps(_ingredient(f"Ingrédient {index}", "Épicerie", []))
+                + "\n",
+                encoding="utf-8",
+            )
+        (shards / "recipes.ndjson").write_text(
+            json.dumps(
+                {
+                    "name": "Mélange",
+                    "ingredients": [{"name": "Ingrédient 2", "quantity": 1}],
+                }
+            )
+            + "\n",
+            encoding="utf-8",
+        )
+
+        report = import_directory(shards, self.db_path, workers=2)
+
+        self.assertEqual(report.count(INGREDIENTS), 3)
+        self.assertEqual(report.count(RECIPES), 1)
+
+    def test_export_round_trips_through_import(self):
+        ingredients = self._write(
+            "source.ndjson",
+            [
+                json.dumps(
+                    _ingredient("Tomate", "Fruits et légumes", ["été", "automne"])
+                ),
+                json.dumps(_ingredient("Sel", "Épicerie", [])),
+            ],
+        )
+        import_ingredients_from_json(ingredients, self.db_path)
+        recipes = self._write(
+            "recipes.ndjson",
+            [
+                json.dumps(
+                    {
+                        "id": "salade",
+                        "name": "Salade",
+                        "instructions": "Couper.",
+                        "time": "15min",
+                        "difficulty": "Facile",
+                        "servings": 2,
+                        "ingredients": [
+                            {"name": "Tomate", "quantity": 2},
+                            {"name": "Sel", "quantity": 0.5},
+                        ],
+                    }
+                ),
+                json.dumps({"name": "Eau", "ingredients": []}),
+            ],
+        )
+        import_recipes_from_json(recipes, self.db_path)
+
+        exported = {}
+        for kind, export in (
+            (INGREDIENTS, export_ingredients_ndjson),
+            (RECIPES, export_recipes_ndjson),
+        ):
+            output = self.root / "export" / f"{kind}.ndjson"
+            self.assertEqual(export(output, self.db_path), 2)
+            exported[kind] = output.read_text(encoding="utf-8").splitlines()
+
+        self.assertEqual(
+            json.loads(exported[INGREDIENTS][0]),
+            _ingredient("Tomate", "Fruits et légumes", ["été", "automne"]),
+        )
+        self.assertEqual(
+            [json.loads(line) for line in exported[RECIPES]],
+            [json.loads(line) for line in recipes.read_text().splitlines()][:1]
+            + [
+                {
+                    "name": "Eau",
+                    "instructions": "",
+                    "time": None,
+                    "difficulty": None,
+                    "servings": 1,
+                    "ingredients": [],
+                }
+            ],
+        )
+
+        copy_path = str(self.root / "copy.db")
+        initialize_database(copy_path)
+        report = import_directory(self.root / "export", copy_path)
+        self.assertEqual(report.count(INGREDIENTS), 2)
+        self.assertEqual(report.count(RECIPES), 2)
+
+
 if __name__ == "__main__":
     unittest.main()
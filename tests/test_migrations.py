@@ -0,0 +1,279 @@
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import closing
+from pathlib import Path
+
+from db.connection import close_all_connections, get_connection
+from db.init_db import MIGRATIONS, SCHEMA_VERSION, initialize_database
+from db.migrations import Migration, apply_migrations, get_schema_version
+from services import ingredients as ingredient_service
+from services.recipes import search_recipes
+from services.seasonality import season_mask
+
+
+class MigrationTests(unittest.TestCase):
+    def tearDown(self):
+        close_all_connections()
+
+    def test_initialize_sets_schema_version(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "test.db")
+            applied = initialize_database(db_path)
+
+            self.assertEqual(applied[-1], SCHEMA_VERSION)
+            with closing(get_connection(db_path)) as connection:
+                self.assertEqual(get_schema_version(connection), SCHEMA_VERSION)
+
+    def test_current_database_is_left_untouched(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "test.db")
+            initialize_database(db_path)
+            with closing(get_connection(db_path)) as connection:
+                connection.execute("DELETE FROM aisle WHERE name = 'Autre';")
+                connection.commit()
+
+            self.assertEqual(initialize_database(db_path), [])
+            with closing(get_connection(db_path)) as connection:
+                remaining = connection.execute(
+                    "SELECT COUNT(*) FROM aisle WHERE name = 'Autre';"
+                ).fetchone()[0]
+            self.assertEqual(remaining, 0)
+
+    def test_upgrades_unversioned_database(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "test.db")
+            with closing(sqlite3.connect(db_path)) as connection:
+                connection.executescript(
+                    """
+                    CREATE TABLE recipe (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        name TEXT NOT NULL,
+                        total_minutes INTEGER NOT NULL,
+                        source_url TEXT,
+                        notes TEXT
+                    );
+                    CREATE TABLE season (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        name TEXT NOT NULL UNIQUE
+                    );
+                    INSERT INTO season (name) VALUES ('summer');
+                    """
+                )
+
+            initialize_database(db_path)
+
+            with closing(get_connection(db_path)) as connection:
+                columns = {
+                    row["name"]
+                    for row in connection.execute("PRAGMA table_info(recipe);")
+                }
+                seasons = {
+                    row["name"]
+                    for row in connection.execute("SELECT name FROM season;")
+                }
+            self.assertIn("servings", columns)
+            self.assertNotIn("summer", seasons)
+            self.assertIn("été", seasons)
+
+    def test_colliding_name_keys_keep_the_oldest_row(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "test.db")
+            with closing(get_connection(db_path)) as connection:
+                apply_migrations(connection, MIGRATIONS[:5])
+                connection.execute(
+                    "INSERT INTO unit (name, abbreviation) VALUES ('Piece', 'pc');"
+                )
+                connection.commit()
+
+            initialize_database(db_path)
+
+            with closing(get_connection(db_path)) as connection:
+                keys = [
+                    row["name_key"]
+                    for row in connection.execute(
+                        "SELECT name_key FROM unit WHERE name LIKE 'pi_ce' ORDER BY id;"
+                    )
+                ]
+                season_key = connection.execute(
+                    "SELECT name_key FROM season WHERE name = 'été';"
+                ).fetchone()["name_key"]
+            self.assertEqual(keys[0], "piece")
+            self.assertRegex(keys[1], r"^piece#\d+$")
+            self.assertEqual(season_key, "ete")
+
+    def test_colliding_ingredients_stay_editable(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "test.db")
+            with closing(get_connection(db_path)) as connection:
+                apply_migrations(connection, MIGRATIONS[:5])
+                connection.execute(
+                    """
+                    INSERT INTO ingredient (name, default_aisle_id, unit_id)
+                    VALUES ('Boeuf', 1, 1), ('Bœuf', 1, 1);
+                    """
+                )
+                connection.commit()
+
+            initialize_database(db_path)
+            ingredient_service.update_ingredient(2, "Bœuf", 2, 1, [], db_path=db_path)
+            with self.assertRaises(ValueError):
+                ingredient_service.create_ingredient("BOEUF", 1, 1, [], db_path=db_path)
+            pork_id = ingredient_service.create_ingredient(
+                "Porc", 1, 1, [], db_path=db_path
+            )
+            with self.assertRaises(ValueError):
+                ingredient_service.update_ingredient(
+                    pork_id, "boeuf", 1, 1, [], db_path=db_path
+                )
+
+            with closing(get_connection(db_path)) as connection:
+                row = connection.execute(
+                    "SELECT name_key, default_aisle_id FROM ingredient WHERE id = 2;"
+                ).fetchone()
+            self.assertEqual(tuple(row), ("boeuf#2", 2))
+
+    def test_existing_recipes_are_indexed_for_search(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "test.db")
+            with closing(get_connection(db_path)) as connection:
+                apply_migrations(connection, MIGRATIONS[:7])
+                connection.execute(
+                    """
+                    INSERT INTO recipe (name, total_minutes, notes)
+                    VALUES ('Pot-au-feu', 0, 'Mijoter le bœuf.');
+                    """
+                )
+                connection.commit()
+
+            initialize_database(db_path)
+
+            self.assertEqual(
+                [recipe["name"] for recipe in search_recipes("boeuf", db_path=db_path)],
+                ["Pot-au-feu"],
+            )
+
+    def test_recipe_seasons_are_backfilled(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "test.db")
+            with closing(get_connection(db_path)) as connection:
+                apply_migrations(connection, MIGRATIONS[:9])
+                connection.executescript(
+                    """
+                    INSERT INTO ingredient (name, default_aisle_id, unit_id)
+                    VALUES ('Tomate', 1, 1);
+                    INSERT INTO ingredient_season (ingredient_id, season_id)
+                    SELECT 1, id FROM season WHERE name = 'été';
+                    INSERT INTO recipe (name, total_minutes) VALUES ('Salade', 0);
+                    INSERT INTO recipe_ingredient (recipe_id, ingredient_id, quantity)
+                    VALUES (1, 1, 1);
+                    """
+                )
+
+            initialize_database(db_path)
+
+            with closing(get_connection(db_path)) as connection:
+                seasons = [
+                    row["name"]
+                    for row in connection.execute(
+                        """
+                        SELECT season.name
+                        FROM recipe_season
+                        JOIN season ON season.id = recipe_season.season_id;
+                        """
+                    )
+                ]
+            self.assertEqual(seasons, ["été"])
+
+    def test_season_masks_are_backfilled(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "test.db")
+            with closing(get_connection(db_path)) as connection:
+                apply_migrations(connection, MIGRATIONS[:10])
+                connection.executescript(
+                    """
+                    INSERT INTO ingredient (name, default_aisle_id, unit_id)
+                    VALUES ('Tomate', 1, 1), ('Sel', 1, 1);
+                    INSERT INTO ingredient_season (ingredient_id, season_id)
+                    SELECT 1, id FROM season WHERE name IN ('été', 'hiver');
+                    """
+                )
+
+            initialize_database(db_path)
+
+            with closing(get_connection(db_path)) as connection:
+                masks = {
+                    row["name"]: row["season_mask"]
+                    for row in connection.execute(
+                        "SELECT name, season_mask FROM ingredient;"
+                    )
+                }
+                season_ids = [
+                    row["id"]
+                    for row in connection.execute(
+                        "SELECT id FROM season WHERE name IN ('été', 'hiver');"
+                    )
+                ]
+            self.assertEqual(
+                masks, {"Tomate": season_mask(season_ids), "Sel": 0}
+            )
+
+    def test_failed_migration_is_rolled_back(self):
+        def broken(connection):
+            connection.execute("CREATE TABLE example (id INTEGER);")
+            raise RuntimeError("boom")
+
+        migrations = [
+            Migration(1, "ok", lambda c: c.execute("CREATE TABLE ok (id INTEGER);")),
+            Migration(2, "broken", broken),
+        ]
+        with closing(sqlite3.connect(":memory:")) as connection:
+            with self.assertRaises(RuntimeError):
+                apply_migrations(connection, migrations)
+            tables = {
+                row[0]
+                for row in connection.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table';"
+                )
+            }
+            self.assertEqual(get_schema_version(connection), 1)
+        self.assertEqual(tables, {"ok"})
+
+    def test_concurrent_upgrades_apply_each_migration_once(self):
+        calls = []
+        started = threading.Event()
+
+        def slow(connection):
+            calls.append(1)
+            started.set()
+            # Leaves the other connection time to read the old version.
+            time.sleep(0.2)
+            connection.execute("CREATE TABLE slow (id INTEGER);")
+
+        def last(connection):
+            calls.append(2)
+            connection.execute("CREATE TABLE last (id INTEGER);")
+
+        migrations = [Migration(1, "slow", slow), Migration(2, "last", last)]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "test.db")
+            results = {}
+
+            def upgrade(name):
+                with closing(get_connection(db_path)) as connection:
+                    results[name] = apply_migrations(connection, migrations)
+
+            first = threading.Thread(target=upgrade, args=("first",))
+            first.start()
+            started.wait()
+            upgrade("second")
+            first.join()
+
+        self.assertEqual(sorted(calls), [1, 2])
+        self.assertEqual(sorted(results["first"] + results["second"]), [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,210 @@
+import json
+import re
+import tempfile
+import unittest
+from pathlib import Path
+
+from db.connection import close_all_connections, get_connection
+from db.init_db import initialize_database
+from services import ingredients as ingredient_service
+from services.consolidation import consolidate_selection_in_db
+from services.importer import import_recipes_from_json
+from services import recipes as recipes_service
+
+_SCAN = re.compile(r"^SCAN (\w+)")
+
+
+class QueryPlanTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        db_path = str(Path(self.tmpdir.name) / "test.db")
+        initialize_database(db_path)
+        self.connection = get_connection(db_path)
+        aisle_id = ingredient_service.list_aisles(connection=self.connection)[0]["id"]
+        unit_id = ingredient_service.list_units(connection=self.connection)[0]["id"]
+        self.season_id = ingredient_service.list_seasons(
+            connection=self.connection
+        )[0]["id"]
+        self.ingredient_id = ingredient_service.create_ingredient(
+            "Tomate", aisle_id, unit_id, [self.season_id], connection=self.connection
+        )
+        self.recipe_id = recipes_service.create_recipe(
+            "Salade", "Mélanger.", connection=self.connection
+        )
+        self.recipe_ingredient_id = recipes_service.add_recipe_ingredient(
+            self.recipe_id, self.ingredient_id, 1, connection=self.connection
+        )
+
+    def tearDown(self):
+        self.connection.close()
+        close_all_connections()
+        self.tmpdir.cleanup()
+
+    def _capture(self, call):
+        statements = []
+        self.connection.set_trace_callback(statements.append)
+        try:
+            call()
+        finally:
+            self.connection.set_trace_callback(None)
+        # FTS5 reads its shadow tables through 'main'.'name' statements of
+        # its own; only the service's statements are checked.
+        return [
+            statement
+            for statement in statements
+            if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE"))
+            and "'main'." not in statement
+        ]
+
+    def _assert_no_full_scan(self, call, allowed_scans=()):
+        statements = self._capture(call)
+        self.assertTrue(statements)
+        for statement in statements:
+            plan = self.connection.execute(
+                f"EXPLAIN QUERY PLAN {statement}"
+            ).fetchall()
+            for row in plan:
+                match = _SCAN.match(row["detail"])
+                if match and match.group(1) not in allowed_scans:
+                    self.fail(
+                        f"Full scan of {match.group(1)!r} in query:\n{statement}"
+                    )
+
+    def test_ingredient_queries_use_indexes(self):
+        connection = self.connection
+        self._assert_no_full_scan(
+            lambda: ingredient_service.list_aisles(connection=connection), {"aisle"}
+        )
+        self._assert_no_full_scan(
+            lambda: ingredient_service.list_units(connection=connection), {"unit"}
+        )
+        self._assert_no_full_scan(
+            lambda: ingredient_service.list_seasons(connection=connection),
+            {"season"},
+        )
+        self._assert_no_full_scan(
+            lambda: ingredient_service.list_ingredients(
+                self.season_id, connection=connection
+            ),
+            {"ingredient", "season"},
+        )
+        # Season names are read from the few season rows whose bit is set in
+        # the ingredient's mask.
+        self._assert_no_full_scan(
+            lambda: ingredient_service.search_ingredients(
+                "tom", self.season_id, connection=connection
+            ),
+            {"season", "ingredient_fts", "ingredient_alias_fts"},
+        )
+        self._assert_no_full_scan(
+            lambda: ingredient_service.get_ingredient(
+                self.ingredient_id, connection=connection
+            )
+        )
+        self._assert_no_full_scan(
+            lambda: ingredient_service.delete_ingredient(
+                self.ingredient_id + 1, connection=connection
+            )
+        )
+
+    def test_recipe_queries_use_indexes(self):
+        connection = self.connection
+        self._assert_no_full_scan(
+            lambda: recipes_service.list_recipes(connection=connection), {"recipe"}
+        )
+        self._assert_no_full_scan(
+            lambda: recipes_service.list_recipes(
+                season_id=self.season_id, connection=connection
+            ),
+            {"recipe"},
+        )
+        self._assert_no_full_scan(
+            lambda: recipes_service.list_recipes(
+                connection=connection, difficulties=["Facile"], limit=10
+            )
+        )
+        self._assert_no_full_scan(
+            lambda: recipes_service.list_recipes(
+                connection=connection, limit=10, after=("Salade", self.recipe_id)
+            )
+        )
+        # The MATCH is served by the full-text index, reported as a virtual
+        # table scan.
+        self._assert_no_full_scan(
+            lambda: recipes_service.search_recipes("sal", connection=connection),
+            {"recipe_fts"},
+        )
+        self._assert_no_full_scan(
+            lambda: recipes_service.get_recipe(self.recipe_id, connection=connection)
+        )
+        self._assert_no_full_scan(
+            lambda: recipes_service.list_recipe_ingredients(
+                self.recipe_id, connection=connection
+            )
+        )
+        self._assert_no_full_scan(
+            lambda: recipes_service.list_recipe_ingredients_with_metadata(
+                self.recipe_id, connection=connection
+            )
+        )
+        self._assert_no_full_scan(
+            lambda: recipes_service.list_ingredients_for_recipes(
+                [self.recipe_id, self.recipe_id + 1], connection=connection
+            )
+        )
+        self._assert_no_full_scan(
+            lambda: recipes_service.get_recipe_ingredient(
+                self.recipe_ingredient_id, connection=connection
+            )
+        )
+        self._assert_no_full_scan(
+            lambda: recipes_service.add_recipe_ingredient(
+                self.recipe_id, self.ingredient_id, 2, connection=connection
+            )
+        )
+        self._assert_no_full_scan(
+            lambda: recipes_service.delete_recipe_ingredient(
+                self.recipe_ingredient_id, connection=connection
+            )
+        )
+
+    def test_database_consolidation_uses_indexes(self):
+        self._assert_no_full_scan(
+            lambda: consolidate_selection_in_db(
+                [(self.recipe_id, 2.0)], connection=self.connection
+            ),
+            {"shopping_selection"},
+        )
+
+    def test_recipe_import_matches_existing_rows_by_index(self):
+        path = Path(self.tmpdir.name) / "recipes.json"
+        path.write_text(
+            json.dumps(
+                {
+                    "recipes": [
+                        {
+                            "id": "salade",
+                            "name": "Salade",
+                            "ingredients": [{"name": "Tomate", "quantity": 3}],
+                        }
+                    ]
+                }
+            ),
+            encoding="utf-8",
+        )
+        self._assert_no_full_scan(
+            lambda: import_recipes_from_json(path, connection=self.connection)
+        )
+
+    def test_ingredient_delete_checks_recipe_lines_by_index(self):
+        plan = self.connection.execute(
+            "EXPLAIN QUERY PLAN SELECT 1 FROM recipe_ingredient WHERE ingredient_id = ?;",
+            (self.ingredient_id,),
+        ).fetchall()
+        self.assertTrue(
+            any("idx_recipe_ingredient_ingredient" in row["detail"] for row in plan)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
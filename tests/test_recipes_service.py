@@ -2,13 +2,25 @@ import tempfile
 import unittest
 from pathlib import Path
 
-from db.connection import get_connection
+from db.connection import close_all_connections, get_connection
 from db.init_db import initialize_database
 from services.ingredients import create_ingredient
-from services.recipes import add_recipe_ingredient, create_recipe, list_recipes
+from services.recipes import (
+    add_recipe_ingredient,
+    create_recipe,
+    delete_recipe,
+    list_ingredients_for_recipes,
+    list_recipe_ingredients_with_metadata,
+    list_recipes,
+    search_recipes,
+    update_recipe,
+)
 
 
 class RecipeServiceTests(unittest.TestCase):
+    def tearDown(self):
+        close_all_connections()
+
     def _get_ids(self, db_path: str, season_name: str):
         with get_connection(db_path) as connection:
             aisle_id = connection.execute(
@@ -117,6 +129,116 @@ class RecipeServiceTests(unittest.TestCase):
 
             self.assertEqual([recipe["name"] for recipe in recipes], ["Assaisonnement"])
 
+    def test_lists_ingredients_for_many_recipes_at_once(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "test.db")
+            initialize_database(db_path)
+            aisle_id, unit_id, _ = self._get_ids(db_path, "été")
+            tomato = create_ingredient("Tomate", aisle_id, unit_id, [], db_path=db_path)
+            onion = create_ingredient("Oignon", aisle_id, unit_id, [], db_path=db_path)
+            salad_id = create_recipe("Salade", None, db_path=db_path)
+            soup_id = create_recipe("Soupe", None, db_path=db_path)
+            empty_id = create_recipe("Vide", None, db_path=db_path)
+            add_recipe_ingredient(salad_id, tomato, 2, db_path=db_path)
+            add_recipe_ingredient(salad_id, onion, 1, db_path=db_path)
+            add_recipe_ingredient(soup_id, onion, 3, db_path=db_path)
+
+            grouped = list_ingredients_for_recipes(
+                [soup_id, salad_id, empty_id], db_path=db_path
+            )
+
+            self.assertEqual(list(grouped), [soup_id, salad_id, empty_id])
+            self.assertEqual(grouped[empty_id], [])
+            for recipe_id in (salad_id, soup_id):
+                expected = list_recipe_ingredients_with_metadata(
+                    recipe_id, db_path=db_path
+                )
+                self.assertEqual(
+                    [
+                        {key: row[key] for key in expected[0]}
+                        for row in grouped[recipe_id]
+                    ],
+                    expected,
+                )
+
+    def test_search_ranks_names_and_ignores_accents(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "test.db")
+            initialize_database(db_path)
+            flan_id = create_recipe("Flan", "Battre les œufs.", db_path=db_path)
+            create_recipe("Œufs brouillés", "Cuire doucement.", db_path=db_path)
+            create_recipe("Crème brûlée", None, db_path=db_path)
+
+            self.assertEqual(
+                [recipe["name"] for recipe in search_recipes("oeuf", db_path=db_path)],
+                ["Œufs brouillés", "Flan"],
+            )
+            self.assertEqual(
+                [recipe["name"] for recipe in search_recipes("CREME bru", db_path=db_path)],
+                ["Crème brûlée"],
+            )
+            self.assertEqual(
+                len(search_recipes("oeuf", limit=1, offset=1, db_path=db_path)), 1
+            )
+            self.assertEqual(search_recipes('" OR *', db_path=db_path), [])
+
+            update_recipe(flan_id, "Flan pâtissier", "Cuire au four.", db_path=db_path)
+            self.assertEqual(
+                [recipe["id"] for recipe in search_recipes("patiss", db_path=db_path)],
+                [flan_id],
+            )
+            self.assertEqual(
+                [recipe["name"] for recipe in search_recipes("oeuf", db_path=db_path)],
+                ["Œufs brouillés"],
+            )
+            delete_recipe(flan_id, db_path=db_path)
+            self.assertEqual(search_recipes("four", db_path=db_path), [])
+
+    def test_filters_and_pages_recipes_in_sql(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = str(Path(tmpdir) / "test.db")
+            initialize_database(db_path)
+            create_recipe("Salade", None, "15min", "Facile", db_path=db_path)
+            create_recipe("Salade", None, "1h", "Facile", db_path=db_path)
+            create_recipe("Soupe", None, "30", "Moyen", db_path=db_path)
+            create_recipe("Rôti", None, "2h", "Difficile", db_path=db_path)
+            create_recipe("Sans temps", None, None, "Facile", db_path=db_path)
+
+            pages = []
+            after = None
+            while True:
+                page = list_recipes(db_path=db_path, limit=2, after=after)
+                if not page:
+                    break
+                pages.append([recipe["name"] for recipe in page])
+                after = (page[-1]["name"], page[-1]["id"])
+            self.assertEqual(
+                pages,
+                [["Rôti", "Salade"], ["Salade", "Sans temps"], ["Soupe"]],
+            )
+
+            def names(**filters):
+                return [
+                    recipe["name"]
+                    for recipe in list_recipes(db_path=db_path, **filters)
+                ]
+
+            self.assertEqual(names(max_minutes=60), ["Salade", "Salade", "Soupe"])
+            self.assertEqual(
+                names(difficulties=["Moyen", "Difficile"]), ["Rôti", "Soupe"]
+            )
+            self.assertEqual(names(name="sal", max_minutes=30), ["Salade"])
+            self.assertEqual(names(name="ROTI"), ["Rôti"])
+            self.assertEqual(
+                [
+                    recipe["name"]
+                    for recipe in search_recipes(
+                        "s", difficulties=["Facile"], max_minutes=15, db_path=db_path
+                    )
+                ],
+                ["Salade"],
+            )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,231 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from db.connection import close_all_connections, get_connection
+from db.init_db import initialize_database
+from services import ingredients as ingredient_service
+from services import recipes as recipes_service
+from services.importer import import_ingredients_from_json, import_recipes_from_json
+from services.seasonality import (
+    check_recipe_seasons,
+    rebuild_recipe_seasons,
+    season_mask,
+)
+
+
+class RecipeSeasonTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmpdir.name)
+        self.db_path = str(self.root / "test.db")
+        initialize_database(self.db_path)
+        self.seasons = {
+            row["name"]: row["id"]
+            for row in ingredient_service.list_seasons(db_path=self.db_path)
+        }
+
+    def tearDown(self):
+        close_all_connections()
+        self.tmpdir.cleanup()
+
+    def _seasons_of(self, recipe_id):
+        with get_connection(self.db_path) as connection:
+            return {
+                row["name"]
+                for row in connection.execute(
+                    """
+                    SELECT season.name
+                    FROM recipe_season
+                    JOIN season ON season.id = recipe_season.season_id
+                    WHERE recipe_season.recipe_id = ?;
+                    """,
+                    (recipe_id,),
+                )
+            }
+
+    def test_services_keep_recipe_seasons_current(self):
+        summer, winter = self.seasons["été"], self.seasons["hiver"]
+        tomato = ingredient_service.create_ingredient(
+            "Tomate", 1, 1, [summer], db_path=self.db_path
+        )
+        salt = ingredient_service.create_ingredient("Sel", 1, 1, [], db_path=self.db_path)
+        recipe_id = recipes_service.create_recipe("Salade", None, db_path=self.db_path)
+        self.assertEqual(self._seasons_of(recipe_id), set(self.seasons))
+
+        recipes_service.add_recipe_ingredient(recipe_id, salt, 1, db_path=self.db_path)
+        line_id = recipes_service.add_recipe_ingredient(
+            recipe_id, tomato, 2, db_path=self.db_path
+        )
+        self.assertEqual(self._seasons_of(recipe_id), {"été"})
+
+        ingredient_service.update_ingredient(
+            tomato, "Tomate", 1, 1, [summer, winter], db_path=self.db_path
+        )
+        self.assertEqual(self._seasons_of(recipe_id), {"été", "hiver"})
+
+        recipes_service.delete_recipe_ingredient(line_id, db_path=self.db_path)
+        self.assertEqual(self._seasons_of(recipe_id), set(self.seasons))
+        self.assertTrue(check_recipe_seasons(self.db_path).consistent)
+
+    def test_imports_keep_recipe_seasons_current(self):
+        ingredients = self.root / "ingredients.json"
+        recipes = self.root / "recipes.json"
+
+        def write_ingredients(seasons):
+            ingredients.write_text(
+                json.dumps(
+                    {
+                        "ingredients": [
+                            {
+                                "name": "Courge",
+                                "aisle": "Épicerie",
+                                "unit": "pièce",
+                                "seasons": seasons,
+                            }
+                        ]
+                    }
+                ),
+                encoding="utf-8",
+            )
+
+        write_ingredients(["automne"])
+        import_ingredients_from_json(ingredients, self.db_path)
+        recipes.write_text(
+            json.dumps(
+                {
+                    "recipes": [
+                        {
+                            "name": "Velouté",
+                            "ingredients": [{"name": "Courge", "quantity": 1}],
+                        }
+                    ]
+                }
+            ),
+            encoding="utf-8",
+        )
+        import_recipes_from_json(recipes, self.db_path)
+        recipe_id = recipes_service.list_recipes(db_path=self.db_path)[0]["id"]
+        self.assertEqual(self._seasons_of(recipe_id), {"automne"})
+
+        write_ingredients(["automne", "hiver"])
+        import_ingredients_from_json(ingredients, self.db_path)
+        self.assertEqual(self._seasons_of(recipe_id), {"automne", "hiver"})
+        self.assertTrue(check_recipe_seasons(self.db_path).consistent)
+
+    def test_check_reports_drift_and_rebuild_repairs_it(self):
+        summer, winter = self.seasons["été"], self.seasons["hiver"]
+        tomato = ingredient_service.create_ingredient(
+            "Tomate", 1, 1, [summer], db_path=self.db_path
+        )
+        salad_id = recipes_service.create_recipe("Salade", None, db_path=self.db_path)
+        soup_id = recipes_service.create_recipe("Soupe", None, db_path=self.db_path)
+        recipes_service.add_recipe_ingredient(soup_id, tomato, 1, db_path=self.db_path)
+        with get_connection(self.db_path) as connection:
+            connection.execute(
+                "DELETE FROM recipe_season WHERE recipe_id = ? AND season_id = ?;",
+                (salad_id, winter),
+            )
+            connection.execute(
+                "INSERT INTO recipe_season (recipe_id, season_id) VALUES (?, ?);",
+                (soup_id, winter),
+            )
+
+        check = check_recipe_seasons(self.db_path)
+        self.assertFalse(check.consistent)
+        self.assertEqual(check.missing, [(salad_id, winter)])
+        self.assertEqual(check.extra, [(soup_id, winter)])
+
+        self.assertEqual(rebuild_recipe_seasons(self.db_path), len(self.seasons) + 1)
+        self.assertTrue(check_recipe_seasons(self.db_path).consistent)
+
+
+class SeasonMaskTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmpdir.name)
+        self.db_path = str(self.root / "test.db")
+        initialize_database(self.db_path)
+        self.seasons = {
+            row["name"]: row["id"]
+            for row in ingredient_service.list_seasons(db_path=self.db_path)
+        }
+
+    def tearDown(self):
+        close_all_connections()
+        self.tmpdir.cleanup()
+
+    def _assert_masks_match_links(self):
+        with get_connection(self.db_path) as connection:
+            rows = connection.execute(
+                "SELECT id, season_mask FROM ingredient;"
+            ).fetchall()
+            for row in rows:
+                season_ids = [
+                    link["season_id"]
+                    for link in connection.execute(
+                        "SELECT season_id FROM ingredient_season WHERE ingredient_id = ?;",
+                        (row["id"],),
+                    )
+                ]
+                self.assertEqual(row["season_mask"], season_mask(season_ids))
+
+    def test_services_and_imports_keep_masks_current(self):
+        summer, winter = self.seasons["été"], self.seasons["hiver"]
+        tomato = ingredient_service.create_ingredient(
+            "Tomate", 1, 1, [summer], db_path=self.db_path
+        )
+        ingredient_service.create_ingredient("Sel", 1, 1, [], db_path=self.db_path)
+        self._assert_masks_match_links()
+
+        ingredient_service.update_ingredient(
+            tomato, "Tomate", 1, 1, [summer, winter], db_path=self.db_path
+        )
+        path = self.root / "ingredients.json"
+        path.write_text(
+            json.dumps(
+                {
+                    "ingredients": [
+                        {
+                            "name": "Courge",
+                            "aisle": "Épicerie",
+                            "unit": "pièce",
+                            "seasons": ["automne", "hiver"],
+                        },
+                        {
+                            "name": "Sel",
+                            "aisle": "Épicerie",
+                            "unit": "pièce",
+                            "seasons": ["printemps"],
+                        },
+                    ]
+                }
+            ),
+            encoding="utf-8",
+        )
+        import_ingredients_from_json(path, self.db_path)
+        self._assert_masks_match_links()
+
+    def test_list_filters_and_names_seasons_from_the_mask(self):
+        summer, winter = self.seasons["été"], self.seasons["hiver"]
+        ingredient_service.create_ingredient(
+            "Tomate", 1, 1, [winter, summer], db_path=self.db_path
+        )
+        ingredient_service.create_ingredient(
+            "Courge", 1, 1, [self.seasons["automne"]], db_path=self.db_path
+        )
+        ingredient_service.create_ingredient("Sel", 1, 1, [], db_path=self.db_path)
+
+        rows = ingredient_service.list_ingredients(summer, db_path=self.db_path)
+        self.assertEqual(
+            {row["name"]: row["seasons"] for row in rows},
+            {"Sel": None, "Tomate": "hiver, été"},
+        )
+        self.assertEqual(
+            len(ingredient_service.list_ingredients(db_path=self.db_path)), 3
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()